@@ -195,6 +195,18 @@ def setup(app):
     cm.add_conf('confluence_publish_headers')
     # Whether to publish a generated intersphinx database to the root document
     cm.add_conf_bool('confluence_publish_intersphinx')
+    # Maximum number of connections to use when publishing.
+    cm.add_conf_int('confluence_publish_connections')
+    # Track publish results to skip unchanged content on later publishes.
+    cm.add_conf_bool('confluence_publish_manifest')
+    # Generate a report of build phase and publish request metrics.
+    cm.add_conf_bool('confluence_publish_metrics')
+    # Publish documents while other documents are still being written.
+    cm.add_conf_bool('confluence_publish_pipeline')
+    # Prefetch information for all pages in a space before publishing.
+    cm.add_conf_bool('confluence_publish_prefetch')
+    # Number of workers to use when publishing documents and assets.
+    cm.add_conf_int('confluence_publish_workers')
     # Manipulate a requests instance.
     cm.add_conf('confluence_request_session_override')
     # Authentication passthrough for Confluence REST interaction.
@@ -205,6 +217,8 @@ def setup(app):
     cm.add_conf('confluence_version_comment')
 
     # (configuration - advanced processing)
+    # Maximum number of doctrees to hold in memory when preparing documents.
+    cm.add_conf_int('confluence_doctree_cache_size')
     # Filename suffix for generated files.
     cm.add_conf('confluence_file_suffix', 'env')
     # Translation of docname to a filename.
@@ -6,6 +6,7 @@ from sphinx.util.console import nocolor  # pylint: disable=no-name-in-module
 from sphinxcontrib.confluencebuilder import __version__ as version
 from sphinxcontrib.confluencebuilder.cmd.build import build_main
 from sphinxcontrib.confluencebuilder.cmd.report import report_main
+from sphinxcontrib.confluencebuilder.cmd.watch import watch_main
 from sphinxcontrib.confluencebuilder.cmd.wipe import wipe_main
 from sphinxcontrib.confluencebuilder.logger import ConfluenceLogger as logger
 import argparse
@@ -46,6 +47,8 @@ def main():
     # invoke a desired command mainline
     if args.action == 'report':
         rv = report_main(parser)
+    elif args.action == 'watch':
+        rv = watch_main(parser)
     elif args.action == 'wipe':
         rv = wipe_main(parser)
     else:
@@ -71,12 +74,20 @@ sphinx-build-confluence [action] <options>
  <builder>             specify a builder to invoke (defaults to 'confluence')
  report                generate a report of this system and the configuration
                         to be shared when generating an issue for developers
+ watch                 build/publish documentation and rebuild/republish
+                        affected documents when sources change
  wipe                  wipe the contents of a configured Confluence space
 
 (builder arguments)
  -o, --output-dir      alter the output directory for generated documentation
                         (defaults to `_build/confluence`)
 
+(watch arguments)
+ --interval            interval (in seconds) to check for changes
+                        (defaults to 1 second)
+ -o, --output-dir      alter the output directory for generated documentation
+                        (defaults to `_build/confluence`)
+
 (report arguments)
  -C, --full-config     include all known sphinx configuration entries
  --no-sanitize         do not sanitize report content
@@ -0,0 +1,104 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright Sphinx Confluence Builder Contributors (AUTHORS)
+
+from docutils import nodes
+from sphinx import addnodes
+from sphinxcontrib.confluencebuilder.compat import docutils_findall as findall
+from sphinxcontrib.confluencebuilder.nodes import confluence_metadata
+
+# module prefixes of node types which are not provided by a third-party
+# extension (i.e. node types which no extension-specific transmute applies to)
+KNOWN_NODE_MODULES = (
+    'docutils.',
+    'sphinx.',
+    'sphinxcontrib.confluencebuilder.',
+)
+
+
+class ConfluenceDoctreeAnalysis:
+    """
+    a confluence doctree analysis
+
+    Preparing a document for writing requires various pieces of information
+    from a document's doctree (e.g. the title, toctree depth hints, section
+    titles, metadata and more). Instead of traversing a doctree for each piece
+    of information, an analysis will traverse a doctree once and collect all
+    information that is needed when preparing a document. The analysis also
+    tracks the node types found in a doctree, allowing processing stages to
+    skip traversing a doctree for node types which do not exist.
+
+    Processing stages which inject new node types into an analyzed doctree
+    should register these types into the analysis (see ``track``).
+
+    Args:
+        doctree: the doctree to analyze
+    """
+    def __init__(self, doctree):
+        self.metadata = []
+        self.section_titles = []
+        self.title_element = None
+        self.toctree = None
+        self.types = set()
+
+        first_section = None
+
+        for node in findall(doctree, include_self=False):
+            node_type = type(node)
+            self.types.add(node_type)
+
+            if node_type is nodes.Text:
+                continue
+
+            if isinstance(node, nodes.title):
+                if isinstance(node.parent, nodes.section):
+                    self.section_titles.append(node)
+
+                if first_section and self.title_element is None:
+                    parent = node.parent
+                    while parent and parent is not first_section:
+                        parent = parent.parent
+
+                    if parent:
+                        self.title_element = node
+
+            elif isinstance(node, nodes.section):
+                if first_section is None:
+                    first_section = node
+
+            elif isinstance(node, addnodes.toctree):
+                if self.toctree is None:
+                    self.toctree = node
+
+            elif isinstance(node, confluence_metadata):
+                self.metadata.append(node)
+
+    def contains(self, *types):
+        """
+        return whether the analyzed doctree contains any of the node types
+
+        Args:
+            *types: the node types to check for
+
+        Returns:
+            whether any node type exists
+        """
+        return any(issubclass(node_type, types) for node_type in self.types)
+
+    def has_extension_nodes(self):
+        """
+        return whether the analyzed doctree contains third-party node types
+
+        Returns:
+            whether a third-party node type exists
+        """
+        return any(not node_type.__module__.startswith(KNOWN_NODE_MODULES)
+            for node_type in self.types)
+
+    def track(self, *types):
+        """
+        track node types injected into the analyzed doctree
+
+        Args:
+            *types: the node types to track
+        """
+        self.types.update(types)
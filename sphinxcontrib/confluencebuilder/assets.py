@@ -1,6 +1,7 @@
 # SPDX-License-Identifier: BSD-2-Clause
 # Copyright Sphinx Confluence Builder Contributors (AUTHORS)
 
+from concurrent.futures import ThreadPoolExecutor
 from docutils import nodes
 from sphinx import addnodes
 from sphinx.util.osutil import canon_path
@@ -11,8 +12,15 @@ from sphinxcontrib.confluencebuilder.std.confluence import INVALID_CHARS
 from sphinxcontrib.confluencebuilder.std.confluence import SUPPORTED_IMAGE_TYPES
 from sphinxcontrib.confluencebuilder.util import ConfluenceUtil
 from sphinxcontrib.confluencebuilder.util import find_env_abspath
+import json
 import os
 
+# filename of the asset hash index (stored in the doctree directory)
+ASSET_HASHES_FILENAME = 'confluence-asset-hashes.json'
+
+# version of the asset hash index format (indexes of other versions are ignored)
+ASSET_HASHES_VERSION = 1
+
 # default content type to use if a type cannot be detected for an asset
 DEFAULT_CONTENT_TYPE = 'application/octet-stream'
 
@@ -37,6 +45,157 @@ class ConfluenceAsset:
         self.type = type_
 
 
+class ConfluenceAssetHashes:
+    """
+    a confluence asset hash index
+
+    Assets are hashed to detect duplicate assets and to determine if an asset
+    needs to be published again. Hashing large assets can be expensive, so the
+    index tracks the hash of each asset along with the asset's file state
+    (size, modification time and inode). When an asset's file state has not
+    changed since it was last hashed, the indexed hash is used instead of
+    hashing the asset again. Assets which do need to be hashed can be hashed
+    using multiple workers (see ``prepare``).
+
+    Args:
+        path (optional): the path of the index (if persisted)
+    """
+    def __init__(self, path=None):
+        self.entries = {}
+        self.path = path
+        self._used = set()
+
+    def hash(self, path):
+        """
+        return the hash of an asset
+
+        Args:
+            path: the absolute path to the asset
+
+        Returns:
+            the hash
+        """
+        state = self._state(path)
+        entry = self.entries.get(path)
+        if not entry or entry[:3] != state:
+            hash_ = ConfluenceUtil.hash_asset(path)
+            entry = [*state, hash_]
+            self.entries[path] = entry
+
+        self._used.add(path)
+        return entry[3]
+
+    def load(self):
+        """
+        load the asset hash index
+
+        Loads the index's entries from its respective path (if any). If the
+        index does not exist or was generated by another index version, no
+        entries will be loaded.
+        """
+        self.entries = {}
+
+        if not self.path:
+            return
+
+        try:
+            with open(self.path, encoding='utf-8') as file:
+                data = json.load(file)
+        except (IOError, OSError):
+            return
+        except ValueError:
+            logger.verbose('ignoring invalid asset hash index')
+            return
+
+        if not isinstance(data, dict) or \
+                data.get('version') != ASSET_HASHES_VERSION:
+            logger.verbose('ignoring asset hash index (version change)')
+            return
+
+        self.entries = data.get('entries', {})
+
+    def prepare(self, paths, workers=None):
+        """
+        prepare hashes for a series of assets
+
+        Hashes all provided assets which are not indexed (or have changed)
+        using multiple workers, allowing future ``hash`` calls for these
+        assets to return indexed values.
+
+        Args:
+            paths: the absolute paths to the assets
+            workers (optional): the maximum number of workers to hash with
+        """
+        pending = {}
+        for path in paths:
+            if path in pending:
+                continue
+
+            try:
+                state = self._state(path)
+            except OSError:
+                continue
+
+            entry = self.entries.get(path)
+            if not entry or entry[:3] != state:
+                pending[path] = state
+
+        if not pending:
+            return
+
+        logger.verbose('hashing %d asset(s)' % len(pending))
+
+        if len(pending) == 1:
+            hashes = map(ConfluenceUtil.hash_asset, pending)
+        else:
+            executor = ThreadPoolExecutor(max_workers=workers)
+            hashes = executor.map(ConfluenceUtil.hash_asset, pending)
+
+        try:
+            for (path, state), hash_ in zip(pending.items(), hashes):
+                self.entries[path] = [*state, hash_]
+        finally:
+            if len(pending) > 1:
+                executor.shutdown()
+
+    def save(self):
+        """
+        save the asset hash index
+
+        Saves the entries of all assets hashed (or looked up) since the index
+        was loaded to its respective path.
+        """
+        if not self.path:
+            return
+
+        data = {
+            'entries': {k: v for k, v in self.entries.items()
+                if k in self._used},
+            'version': ASSET_HASHES_VERSION,
+        }
+
+        try:
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as file:
+                json.dump(data, file, indent=1, sort_keys=True)
+            os.replace(tmp_path, self.path)
+        except (IOError, OSError) as err:
+            logger.warn(f'error writing asset hash index {self.path}: {err}')
+
+    def _state(self, path):
+        """
+        return the file state of an asset
+
+        Args:
+            path: the absolute path to the asset
+
+        Returns:
+            the size, modification time and inode of the asset
+        """
+        stat = os.stat(path)
+        return [stat.st_size, stat.st_mtime_ns, stat.st_ino]
+
+
 class ConfluenceAssetManager:
     """
     a confluence assets tracker
@@ -61,7 +220,9 @@ class ConfluenceAssetManager:
         self.env = env
         self.force_standalone = config.confluence_asset_force_standalone
         self.hash2asset = {}
+        self.hashes = ConfluenceAssetHashes()
         self.keys = set()
+        self.journal = None
         self.outdir = outdir
         self.path2asset = {}
         self.root_doc = config.root_doc
@@ -119,6 +280,18 @@ class ConfluenceAssetManager:
                 data.append(entry)
         return data
 
+    def changes(self):
+        """
+        return tracked asset changes
+
+        Returns a list of asset entries registered into this manager since
+        tracking changes was requested (see ``track_changes``).
+
+        Returns:
+            the list of asset entry changes
+        """
+        return list(self.journal or [])
+
     def fetch(self, node, docname=None):
         """
         return key and target document name for provided asset
@@ -162,6 +335,31 @@ class ConfluenceAssetManager:
 
         return key, docname, path
 
+    def merge(self, changes):
+        """
+        merge asset changes into this manager
+
+        Applies asset entry changes tracked from another manager instance
+        (e.g. from a manager in a parallel writing process) into this manager.
+        Asset entries are merged using the keys assigned by the originating
+        manager, since these keys may already be referenced in generated
+        documents.
+
+        Args:
+            changes: the asset entry changes to apply
+        """
+        for path, key, asset_path, type_, hash_, docname in changes:
+            asset = self.path2asset.get(asset_path)
+            if not asset:
+                asset = ConfluenceAsset(key, asset_path, type_, hash_)
+                self.assets.append(asset)
+                self.keys.add(key)
+                self.path2asset[asset_path] = asset
+                self.hash2asset.setdefault(hash_, asset)
+
+            self.path2asset.setdefault(path, asset)
+            asset.docnames.add(docname)
+
     def process(self, docnames):
         """
         process a list of document for assets
@@ -174,6 +372,33 @@ class ConfluenceAssetManager:
         Args:
             docnames: the document names to search
         """
+        # hash any new/changed assets (in parallel) before processing
+        #
+        # Only the paths of assets are collected from each document (instead
+        # of the asset nodes), so that only a single document's doctree is
+        # required to be loaded at a time.
+        paths = []
+        for docname in docnames:
+            doctree = self.env.get_doctree(docname)
+
+            targets = []
+            for node in findall(doctree, nodes.image):
+                target = str(node['uri'])
+                if not target.startswith('data:'):
+                    targets.append((node, target))
+            for node in findall(doctree, addnodes.download_reference):
+                targets.append((node, node['reftarget']))
+
+            for node, target in targets:
+                if target.find('://') != -1:
+                    continue
+
+                path = self._interpret_asset_path(node)
+                if path and path not in self.path2asset:
+                    paths.append(path)
+
+        self.hashes.prepare(paths)
+
         for docname in docnames:
             doctree = self.env.get_doctree(docname)
             self.process_document(doctree, docname)
@@ -252,6 +477,16 @@ class ConfluenceAssetManager:
 
         return None, None, None
 
+    def track_changes(self):
+        """
+        track asset changes made to this manager
+
+        Requests this manager to track all asset entries registered from this
+        point onward. Tracked changes can be acquired using ``changes`` and
+        applied to another manager using ``merge``.
+        """
+        self.journal = []
+
     def _handle_entry(self, path, docname, standalone=False):
         """
         handle an asset entry
@@ -273,7 +508,7 @@ class ConfluenceAssetManager:
         """
 
         if path not in self.path2asset:
-            hash_ = ConfluenceUtil.hash_asset(path)
+            hash_ = self.hashes.hash(path)
             type_ = guess_mimetype(path, default=DEFAULT_CONTENT_TYPE)
         else:
             hash_ = self.path2asset[path].hash
@@ -313,6 +548,10 @@ class ConfluenceAssetManager:
         # track (if not already) that this document uses this asset
         asset.docnames.add(docname)
 
+        if self.journal is not None:
+            self.journal.append((path, asset.key, asset.path, asset.type,
+                asset.hash, docname))
+
         return asset.key, docname, asset.path
 
     def _interpret_asset_path(self, node):
@@ -2,15 +2,25 @@
 # Copyright Sphinx Confluence Builder Contributors (AUTHORS)
 # Copyright 2007-2021 by the Sphinx team (sphinx-doc/sphinx#AUTHORS)
 
+from collections import OrderedDict
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import as_completed
 from docutils import nodes
-from docutils.io import StringOutput
 from os import path
 from sphinx import addnodes
 from sphinx import version_info as sphinx_version_info
 from sphinx.builders import Builder
+from sphinx.environment import CONFIG_OK
 from sphinx.locale import _ as SL
+from sphinx.util.build_phase import BuildPhase
+from sphinx.util.docutils import LoggingReporter
 from sphinx.util.osutil import ensuredir
+from sphinx.util.parallel import ParallelTasks
+from sphinx.util.parallel import make_chunks
+from sphinxcontrib.confluencebuilder.analysis import ConfluenceDoctreeAnalysis
+from sphinxcontrib.confluencebuilder.assets import ASSET_HASHES_FILENAME
+from sphinxcontrib.confluencebuilder.assets import ConfluenceAssetHashes
 from sphinxcontrib.confluencebuilder.assets import ConfluenceAssetManager
 from sphinxcontrib.confluencebuilder.assets import ConfluenceSupportedImages
 from sphinxcontrib.confluencebuilder.compat import docutils_findall as findall
@@ -19,27 +29,45 @@ from sphinxcontrib.confluencebuilder.config import process_ask_configs
 from sphinxcontrib.confluencebuilder.config.checks import validate_configuration
 from sphinxcontrib.confluencebuilder.config.defaults import apply_defaults
 from sphinxcontrib.confluencebuilder.config.env import apply_env_overrides
+from sphinxcontrib.confluencebuilder.dependencies import DEPENDENCIES_FILENAME
+from sphinxcontrib.confluencebuilder.dependencies import ConfluenceDependencies
+from sphinxcontrib.confluencebuilder.exceptions import ConfluenceBadApiError
 from sphinxcontrib.confluencebuilder.intersphinx import build_intersphinx
 from sphinxcontrib.confluencebuilder.logger import ConfluenceLogger
+from sphinxcontrib.confluencebuilder.manifest import MANIFEST_FILENAME
+from sphinxcontrib.confluencebuilder.manifest import ConfluencePublishManifest
+from sphinxcontrib.confluencebuilder.metrics import METRICS_FILENAME
+from sphinxcontrib.confluencebuilder.metrics import ConfluenceMetrics
+from sphinxcontrib.confluencebuilder.nodes import confluence_doc_card
+from sphinxcontrib.confluencebuilder.nodes import confluence_doc_card_inline
+from sphinxcontrib.confluencebuilder.nodes import confluence_excerpt_include
 from sphinxcontrib.confluencebuilder.nodes import confluence_footer
 from sphinxcontrib.confluencebuilder.nodes import confluence_header
 from sphinxcontrib.confluencebuilder.nodes import confluence_metadata
 from sphinxcontrib.confluencebuilder.nodes import confluence_page_generation_notice
 from sphinxcontrib.confluencebuilder.nodes import confluence_source_link
+from sphinxcontrib.confluencebuilder.pipeline import ConfluencePublishPipeline
 from sphinxcontrib.confluencebuilder.publisher import ConfluencePublisher
+from sphinxcontrib.confluencebuilder.render import RENDER_CACHE_FILENAME
+from sphinxcontrib.confluencebuilder.render import ConfluenceRenderCache
+from sphinxcontrib.confluencebuilder.rest import FileContent
 from sphinxcontrib.confluencebuilder.state import ConfluenceState
 from sphinxcontrib.confluencebuilder.storage.index import generate_storage_format_domainindex
 from sphinxcontrib.confluencebuilder.storage.index import generate_storage_format_genindex
 from sphinxcontrib.confluencebuilder.storage.search import generate_storage_format_search
 from sphinxcontrib.confluencebuilder.storage.translator import ConfluenceStorageFormatTranslator
+from sphinxcontrib.confluencebuilder.transmute import doctree_prerender
 from sphinxcontrib.confluencebuilder.transmute import doctree_transmute
 from sphinxcontrib.confluencebuilder.util import ConfluenceUtil
 from sphinxcontrib.confluencebuilder.util import extract_strings_from_file
-from sphinxcontrib.confluencebuilder.util import first
 from sphinxcontrib.confluencebuilder.util import handle_cli_file_subset
 from sphinxcontrib.confluencebuilder.writer import ConfluenceWriter
 import os
+import pickle
+import posixpath
+import shutil
 import tempfile
+import threading
 
 
 class ConfluenceBuilder(Builder):
@@ -62,13 +90,18 @@ class ConfluenceBuilder(Builder):
         else:
             super().__init__(app)  # pylint: disable=E1120
 
-        self.cache_doctrees = {}
+        self.cache_doctrees = OrderedDict()
         self.cloud = False
+        self.dependencies = None
         self.domain_indices = {}
         self.file_suffix = '.conf'
         self.info = ConfluenceLogger.info
+        self.keep_alive = False
         self.link_suffix = None
+        self.render_cache = None
+        self.manifest = None
         self.metadata = defaultdict(dict)
+        self.metrics = ConfluenceMetrics()
         self.nav_next = {}
         self.nav_prev = {}
         self.omitted_docnames = []
@@ -76,6 +109,7 @@ class ConfluenceBuilder(Builder):
         self.publish_allowlist = None
         self.publish_denylist = None
         self.publish_docnames = []
+        self.publish_pipeline = None
         self.publisher = ConfluencePublisher()
         self.root_doc_page_id = None
         self.secnumbers = {}
@@ -84,9 +118,16 @@ class ConfluenceBuilder(Builder):
         self.use_search = None
         self.verbose = ConfluenceLogger.verbose
         self.warn = ConfluenceLogger.warn
-        self._cached_footer_data = None
-        self._cached_header_data = None
+        self._doctree_spill_dir = None
+        self._manifest_lock = threading.RLock()
+        self._manifest_pages = {}
+        self._manifest_repaired = set()
+        self._modified_doctrees = set()
         self._original_get_doctree = None
+        self._pipelined_docnames = set()
+        self._spilled_doctrees = {}
+        self._target_uris = None
+        self._templates = {}
         self._verbose = self.app.verbosity
 
         # state tracking is set at initialization (not cleanup) so its content's
@@ -146,8 +187,27 @@ class ConfluenceBuilder(Builder):
         self.assets = ConfluenceAssetManager(config, self.env, self.outdir)
         self.writer = ConfluenceWriter(self)
         self.config.sphinx_verbosity = self._verbose
+        self.publisher.metrics = self.metrics
         self.publisher.init(self.config, self.cloud)
 
+        # track dependencies between documents from previous runs, used to
+        # determine which documents need to be re-written on an update
+        dependencies_file = path.join(self.doctreedir, DEPENDENCIES_FILENAME)
+        self.dependencies = ConfluenceDependencies(dependencies_file)
+        self.dependencies.load()
+
+        # track rendered images (e.g. diagrams) from previous runs, allowing
+        # identical renders to be shared between documents and builds
+        render_cache_file = path.join(self.outdir, RENDER_CACHE_FILENAME)
+        self.render_cache = ConfluenceRenderCache(render_cache_file)
+        self.render_cache.load()
+
+        # track asset hashes from previous runs, to avoid re-hashing assets
+        # which have not changed
+        asset_hashes_file = path.join(self.doctreedir, ASSET_HASHES_FILENAME)
+        self.assets.hashes = ConfluenceAssetHashes(asset_hashes_file)
+        self.assets.hashes.load()
+
         self.create_template_bridge()
         self.templates.init(self)
 
@@ -182,10 +242,27 @@ class ConfluenceBuilder(Builder):
 
         if self.config.confluence_publish:
             self.publish = True
-            self.publisher.connect()
+            with self.metrics.phase('publish'):
+                self.publisher.connect()
         else:
             self.publish = False
 
+        # track publish results between runs (if configured); ignored for
+        # publish modes which do not modify content
+        if self.publish and config.confluence_publish_manifest and \
+                not config.confluence_publish_dryrun and \
+                not config.confluence_publish_onlynew:
+            target = [
+                config.confluence_server_url,
+                config.confluence_space_key,
+                config.confluence_parent_page,
+                config.confluence_publish_root,
+            ]
+
+            manifest_file = path.join(self.outdir, MANIFEST_FILENAME)
+            self.manifest = ConfluencePublishManifest(manifest_file, target)
+            self.manifest.load()
+
         def prepare_subset(option):
             value = getattr(config, option)
             if value is None:
@@ -208,34 +285,137 @@ class ConfluenceBuilder(Builder):
     def get_outdated_docs(self):
         """
         Return an iterable of input files that are outdated.
+
+        A document is outdated if it is new, or if its source (or any file it
+        depends on; e.g. an included file or a header/footer template) is newer
+        than its generated output.
+        Since a document's output can also be influenced by other documents
+        (e.g. titles of linked documents), any document which depends on a
+        changed, new or removed document is also considered outdated.
         """
-        # This method is taken from TextBuilder.get_outdated_docs()
-        # with minor changes to support :confval:`rst_file_transform`.
-        for docname in self.env.found_docs:
-            if docname not in self.env.all_docs:
-                yield docname
+        env = self.env
+
+        # without dependency records from a previous run (e.g. the first run
+        # after upgrading), dependents cannot be determined; assume all
+        # documents are outdated
+        if env.all_docs and not self.dependencies.loaded:
+            return set(env.found_docs)
+
+        changed = set(env.all_docs) - env.found_docs
+        outdated = set()
+
+        # header/footer templates are injected into every document
+        templates = []
+        for name in ('header', 'footer'):
+            template_file = self.config['confluence_{}_file'.format(name)]
+            if template_file:
+                templates.append(path.join(env.srcdir, template_file))
+
+        for docname in env.found_docs:
+            if docname not in env.all_docs:
+                changed.add(docname)
+                outdated.add(docname)
                 continue
-            sourcename = path.join(self.env.srcdir, docname +
-                                   self.file_suffix)
-            targetname = path.join(self.outdir, self.file_transform(docname))
 
+            targetname = path.join(self.outdir, self.file_transform(docname))
             try:
                 targetmtime = path.getmtime(targetname)
-            except Exception:
-                targetmtime = 0
-            try:
-                srcmtime = path.getmtime(sourcename)
-                if srcmtime > targetmtime:
-                    yield docname
             except EnvironmentError:
-                # source doesn't exist anymore
-                pass
+                targetmtime = 0
+
+            sources = [env.doc2path(docname), *templates]
+            for dep in env.dependencies.get(docname, ()):
+                sources.append(path.join(env.srcdir, dep))
+
+            for sourcename in sources:
+                try:
+                    if path.getmtime(sourcename) > targetmtime:
+                        changed.add(docname)
+                        outdated.add(docname)
+                        break
+                except EnvironmentError:
+                    # source doesn't exist anymore
+                    pass
+
+        if changed:
+            # a change in the document structure (a changed toctree, or a new
+            # or removed document) can change the navigational neighbors of
+            # any document; if navigational buttons are used, consider all
+            # documents outdated
+            prev_next_loc = self.config.confluence_prev_next_buttons_location
+            if prev_next_loc:
+                if not changed.isdisjoint(env.toctree_includes) or \
+                        not changed.issubset(env.all_docs) or \
+                        not env.found_docs.issuperset(env.all_docs):
+                    return set(env.found_docs)
+
+            dependents = self.dependencies.dependents(changed)
+            outdated.update(dependents & env.found_docs)
+
+        return outdated
 
     def get_target_uri(self, docname, typ=None):
         return self.link_transform(docname)
 
+    def resolve_relative_uri(self, from_, uri):
+        """
+        resolve the document a relative uri (from a document) points to
+
+        Internal references to other documents are built from the relative
+        uri between two documents' target uris (which are influenced by any
+        configured link transform). This call reverses the process by
+        resolving a uri against the target uri of the document holding the
+        reference, and finding the document with a matching target uri.
+
+        Args:
+            from_: the name of the document holding the reference
+            uri: the relative uri
+
+        Returns:
+            the name of the referenced document; ``None`` if unknown
+        """
+
+        target = uri.split('#')[0]
+        if not target:
+            return None
+
+        # map target uris to documents on first use (the target uris of
+        # documents do not change over the course of writing); documents
+        # sharing a target uri cannot be resolved from it
+        if self._target_uris is None:
+            self._target_uris = {}
+            for docname in self.env.found_docs:
+                target_uri = self.get_target_uri(docname).split('#')[0]
+                if target_uri in self._target_uris:
+                    self._target_uris[target_uri] = None
+                else:
+                    self._target_uris[target_uri] = docname
+
+        if not target.startswith('/'):
+            base = self.get_target_uri(from_).split('#')[0].split('/')[:-1]
+            parts = target.split('/')
+            while parts and parts[0] == '..':
+                parts.pop(0)
+                if base:
+                    base.pop()
+            target = '/'.join(base + parts)
+
+        return self._target_uris.get(target)
+
     def prepare_writing(self, docnames):
+        with self.metrics.phase('prepare'):
+            self._prepare_writing(docnames)
+
+        # when pipelining, documents are published as soon as they are written
+        if self.publish and self.config.confluence_publish_pipeline:
+            with self.metrics.phase('publish'):
+                self._publish_prepare()
+
+            self._start_publish_pipeline()
+
+    def _prepare_writing(self, docnames):
         ordered_docnames = []
+        self._target_uris = None
         traversed = [self.config.root_doc]
 
         # default enable special document names if they are references in the
@@ -290,15 +470,28 @@ class ConfluenceBuilder(Builder):
             self.orphan_docnames = [x for x in docnames if x not in traversed]
             ordered_docnames.extend(self.orphan_docnames)
 
+        # when building in parallel, render any diagrams/math images for all
+        # documents using multiple workers (which documents processed below
+        # will use instead of rendering one image at a time)
+        if self.app.parallel > 1:
+            with self.metrics.phase('transmute'):
+                doctree_prerender(self, ordered_docnames, self.app.parallel)
+
+        asset_docnames = []
         for docname in ordered_docnames:
             doctree = self.env.get_doctree(docname)
 
+            # analyze the doctree once for all information needed to prepare
+            # the document
+            analysis = ConfluenceDoctreeAnalysis(doctree)
+
             # acquire title from override (if any), or parse first title entity
             if (self.config.confluence_title_overrides and
                     docname in self.config.confluence_title_overrides):
                 doctitle = self.config.confluence_title_overrides[docname]
             else:
-                doctitle = self._parse_doctree_title(docname, doctree)
+                doctitle = self._parse_doctree_title(docname, doctree,
+                    title_element=analysis.title_element)
 
             # only register title/track for publishing if there is a title
             # value that can be applied to this document
@@ -316,7 +509,7 @@ class ConfluenceBuilder(Builder):
 
             # track the toctree depth for a document, which a translator can
             # use as a hint when dealing with max-depth capabilities
-            toctree = first(findall(doctree, addnodes.toctree))
+            toctree = analysis.toctree
             if toctree and toctree.get('maxdepth') > 0:
                 self.state.register_toctree_depth(
                     docname, toctree.get('maxdepth'))
@@ -326,10 +519,18 @@ class ConfluenceBuilder(Builder):
             # directly to headers, so we will need to still generate anchors
             # for these headers
             if self.config.confluence_editor != 'v2':
-                self._register_doctree_title_targets(docname, doctree)
+                self._register_doctree_title_targets(docname, doctree,
+                    section_titles=analysis.section_titles)
 
             # post-prepare a ready doctree
-            self._prepare_doctree_writing(docname, doctree)
+            self._prepare_doctree_writing(docname, doctree, analysis)
+
+            # track documents which may have assets to process
+            if analysis.contains(nodes.image, addnodes.download_reference):
+                asset_docnames.append(docname)
+
+            # ensure the prepared doctree is retained for the writing stage
+            self._cache_doctree(docname, doctree, modified=True)
 
         # register titles for special documents (if needed); if a title is not
         # already set from a placeholder document, configure a default title
@@ -400,18 +601,23 @@ class ConfluenceBuilder(Builder):
         # images and other late-injected assets are processed in a translator
         # when needed.
         if self.name != 'singleconfluence':
-            self.assets.process(ordered_docnames)
+            self.assets.process(asset_docnames)
+
+    def _prepare_doctree_writing(self, docname, doctree, analysis=None):
+        if analysis is None:
+            analysis = ConfluenceDoctreeAnalysis(doctree)
 
-    def _prepare_doctree_writing(self, docname, doctree):
         # extract metadata information
-        self._extract_metadata(docname, doctree)
+        self._extract_metadata(docname, doctree, analysis.metadata)
 
         # convert any desired nodes in a doctree to node types supported by the
         # translator implementation
-        doctree_transmute(self, doctree)
+        with self.metrics.phase('transmute'):
+            doctree_transmute(self, doctree, analysis)
 
         # for every doctree, pick the best image candidate
-        self.post_process_images(doctree)
+        if analysis.contains(nodes.image):
+            self.post_process_images(doctree)
 
     def process_tree_structure(self, ordered, docname, traversed):
         ordered.append(docname)
@@ -425,6 +631,79 @@ class ConfluenceBuilder(Builder):
 
                     self.process_tree_structure(ordered, child, traversed)
 
+    def template_data(self, name):
+        """
+        return the data of a header/footer template
+
+        Provides the (rendered) data of a configured header or footer template
+        (i.e. ``confluence_header_file`` or ``confluence_footer_file``) to be
+        injected into a document. Each template is read and compiled only once,
+        until the template file is modified. Since template data is typically
+        static, rendered data is cached as well; templates are only rendered on
+        each request if the configured template data includes callables (which
+        may provide different values for each document).
+
+        Args:
+            name: the name of the template (``header`` or ``footer``)
+
+        Returns:
+            the template's data; ``None`` if the template is not configured
+        """
+
+        template_file = self.config['confluence_{}_file'.format(name)]
+        if template_file is None:
+            return None
+
+        template_data = self.config['confluence_{}_data'.format(name)]
+
+        # a cached template is only used while the template file remains
+        # unchanged (e.g. a template may be modified between rebuilds)
+        fname = path.join(self.env.srcdir, template_file)
+        try:
+            st = os.stat(fname)
+            key = (fname, st.st_mtime_ns, st.st_size)
+        except OSError:
+            key = (fname, None, None)
+
+        cached = self._templates.get(name)
+        if not cached or cached[0] != key:
+            source = ''
+            try:
+                with open(fname, encoding='utf-8') as file:
+                    source = file.read()
+            except (IOError, OSError) as err:
+                self.warn(f'error reading file {fname}: {err}')
+
+            # if no data is supplied, the file is plain text
+            if template_data is None:
+                template = source
+            else:
+                # compile the template once (if supported by the template
+                # bridge); otherwise, render from the source on each request
+                environment = getattr(self.templates, 'environment', None)
+                if environment:
+                    compiled = environment.from_string(source)
+                    render = compiled.render
+                else:
+                    def render(context, source=source):
+                        return self.templates.render_string(source, context)
+
+                dynamic = any(callable(value)
+                    for value in template_data.values())
+
+                if dynamic:
+                    template = render
+                else:
+                    template = render(template_data)
+
+            self._templates[name] = (key, template)
+
+        template = self._templates[name][1]
+        if callable(template):
+            return template(template_data)
+
+        return template
+
     def write_doc(self, docname, doctree):
         if docname in self.omitted_docnames:
             return
@@ -468,20 +747,102 @@ class ConfluenceBuilder(Builder):
 
                 title_element.parent.remove(title_element)
 
+        # track other documents which can influence this document's output
+        self._track_dependencies(docname, doctree)
+
         # This method is taken from TextBuilder.write_doc()
         # with minor changes to support :confval:`rst_file_transform`.
-        destination = StringOutput(encoding='utf-8')
-
-        self.writer.write(doctree, destination)
+        #
+        # Translated output is streamed directly into the output file (instead
+        # of building the entire document's output in memory).
         outfilename = path.join(self.outdir, self.file_transform(docname))
-        if self.writer.output is not None:
-            ensuredir(path.dirname(outfilename))
-            try:
-                with open(outfilename, 'w', encoding='utf-8') as file:
-                    if self.writer.output:
-                        file.write(self.writer.output)
-            except (IOError, OSError) as err:
-                self.warn(f'error writing file {outfilename}: {err}')
+        ensuredir(path.dirname(outfilename))
+        try:
+            with open(outfilename, 'w', encoding='utf-8') as file:
+                self.writer.write(doctree, file)
+        except (IOError, OSError) as err:
+            self.warn(f'error writing file {outfilename}: {err}')
+
+        if self.publish_pipeline and docname in self._pipelined_docnames:
+            self.publish_pipeline.submit(docname)
+
+    def _write_serial(self, docnames):
+        with self.metrics.phase('write'):
+            super()._write_serial(docnames)
+
+    def _write_parallel(self, docnames, nproc):
+        # worker processes are forked when writing in parallel, which is not
+        # safe while other threads may be running (e.g. a forked process could
+        # inherit a lock held by a publishing thread, such as a connection
+        # pool's lock); a publish pipeline is only started once all documents
+        # have been written, where all documents are submitted when finishing
+        pipeline = self.publish_pipeline
+        self.publish_pipeline = None
+
+        try:
+            with self.metrics.phase('write'):
+                self._write_parallel_docs(docnames, nproc)
+        finally:
+            self.publish_pipeline = pipeline
+
+    def _write_parallel_docs(self, docnames, nproc):
+        # Sphinx's parallel writing invokes `write_doc` in forked worker
+        # processes, where any changes to this builder's state (e.g. assets
+        # registered while translating a document) would be lost. This is a
+        # variant of Sphinx's implementation, where each worker returns the
+        # changes made while writing its documents, to be merged back into the
+        # main process.
+        def write_process(docs):
+            self.app.phase = BuildPhase.WRITING
+            self.assets.track_changes()
+            state = self.state.snapshot()
+
+            for docname, doctree in docs:
+                self.write_doc(docname, doctree)
+
+            dependencies = {}
+            for docname, _ in docs:
+                if docname in self.dependencies.docs:
+                    dependencies[docname] = self.dependencies.docs[docname]
+
+            return {
+                'assets': self.assets.changes(),
+                'dependencies': dependencies,
+                'state': self.state.changes(state),
+            }
+
+        # warm up caches/compile templates using the first document
+        firstname, docnames = docnames[0], docnames[1:]
+        self.app.phase = BuildPhase.RESOLVING
+        doctree = self.env.get_and_resolve_doctree(firstname, self)
+        self.app.phase = BuildPhase.WRITING
+        self.write_doc_serialized(firstname, doctree)
+        self.write_doc(firstname, doctree)
+
+        tasks = ParallelTasks(nproc)
+        chunks = make_chunks(docnames, nproc)
+
+        progress = status_iterator(chunks, 'writing output... ', 'darkgreen',
+            len(chunks), self.app.verbosity)
+
+        def on_chunk_done(args, result):
+            self.assets.merge(result['assets'])
+            self.dependencies.docs.update(result['dependencies'])
+            self.state.merge(result['state'])
+            next(progress)
+
+        self.app.phase = BuildPhase.RESOLVING
+        for chunk in chunks:
+            arg = []
+            for docname in chunk:
+                doctree = self.env.get_and_resolve_doctree(docname, self)
+                self.write_doc_serialized(docname, doctree)
+                arg.append((docname, doctree))
+            tasks.add_task(write_process, arg, on_chunk_done)
+
+        # make sure all processes have finished
+        tasks.join()
+        self.info('')
 
     def publish_doc(self, docname, output):
         conf = self.config
@@ -516,20 +877,70 @@ class ConfluenceBuilder(Builder):
         if 'labels' in metadata:
             data['labels'].extend([v for v in metadata['labels']])
 
-        if conf.confluence_publish_root and is_root_doc:
+        # check if this document is unchanged since it was last published
+        fingerprint = None
+        tracked_id = None
+        if self.manifest:
+            fingerprint = self.manifest.fingerprint(title, data, parent_id,
+                conf.confluence_editor, conf.confluence_full_width)
+            tracked_id = self.manifest.page(docname, fingerprint)
+
+            # if legacy pages have been discovered, ensure a tracked page still
+            # exists before trusting it
+            if self.legacy_pages is not None and \
+                    tracked_id not in self.legacy_pages:
+                tracked_id = None
+
+            # if the space's pages have been prefetched, ensure a tracked page
+            # has not been removed or modified since it was last published
+            if tracked_id:
+                version = self.manifest.version(docname)
+                if self.publisher.check_page_version(
+                        tracked_id, version) is False:
+                    self.verbose(f'{docname} has changed since last publish')
+                    tracked_id = None
+
+        if tracked_id:
+            self.verbose(f'{docname} is unchanged since last publish')
+            uploaded_id = tracked_id
+            with self._manifest_lock:
+                self._manifest_pages[str(tracked_id)] = docname
+        elif conf.confluence_publish_root and is_root_doc:
             uploaded_id = self.publisher.store_page_by_id(title,
                 conf.confluence_publish_root, data)
         else:
-            uploaded_id = self.publisher.store_page(title, data, parent_id)
+            try:
+                uploaded_id = self.publisher.store_page(title, data, parent_id)
+            except ConfluenceBadApiError as ex:
+                # if the parent page (trusted from the publish manifest) no
+                # longer exists, publish the parent again and retry
+                if not self._repair_tracked_page(parent_id, ex):
+                    raise
+
+                parent = self.state.parent_docname(docname)
+                parent_id = self.state.upload_id(parent)
+                uploaded_id = self.publisher.store_page(title, data, parent_id)
         self.state.register_upload_id(docname, uploaded_id)
 
+        if self.manifest and uploaded_id and not tracked_id:
+            version = self.publisher.get_page_version(uploaded_id)
+            self.manifest.track_page(docname, uploaded_id, version, fingerprint)
+
         if self.config.root_doc == docname:
             self.root_doc_page_id = uploaded_id
 
             # populate ancestors to be used to pre-check ancestors assignments
             # on new pages (`uploaded_id` may not be set if dry run)
             if uploaded_id:
-                root_ancestors = self.publisher.get_ancestors(uploaded_id)
+                try:
+                    root_ancestors = self.publisher.get_ancestors(uploaded_id)
+                except ConfluenceBadApiError as ex:
+                    # if the page (trusted from the publish manifest) no longer
+                    # exists, the document has been published again
+                    if not self._repair_tracked_page(uploaded_id, ex):
+                        raise
+                    return
+
                 self.publisher.restrict_ancestors(root_ancestors)
 
         # if purging is enabled and we have yet to populate a list of legacy
@@ -562,10 +973,14 @@ class ConfluenceBuilder(Builder):
             # configured to check or push assets to the target space
             asset_override = conf.confluence_asset_override
             if asset_override is None or asset_override:
-                for legacy_page in self.legacy_pages:
+                def fetch_legacy_assets(legacy_page):
                     attachments = self.publisher.get_attachments(legacy_page)
                     self.legacy_assets[legacy_page] = attachments
 
+                for _ in self._process_entries(
+                        fetch_legacy_assets, self.legacy_pages):
+                    pass
+
         if self.post_cleanup:
             if uploaded_id in self.legacy_pages:
                 self.legacy_pages.remove(uploaded_id)
@@ -591,15 +1006,41 @@ class ConfluenceBuilder(Builder):
                 return
 
         attachment_id = None
+        force = None
 
         if conf.confluence_asset_override is None:
-            # "automatic" management -- check if already published; if not, push
-            attachment_id = publisher.store_attachment(
-                page_id, key, output, type_, hash_)
+            # check if the asset is unchanged since it was last published
+            if self.manifest:
+                attachment_id = self.manifest.attachment(
+                    docname, page_id, key, hash_)
+
+            if attachment_id:
+                self.verbose(f'{key} is unchanged since last publish')
+            else:
+                # "automatic" management -- check if already published; if
+                # not, push
+                force = False
         elif conf.confluence_asset_override:
             # forced publishing of the asset
-            attachment_id = publisher.store_attachment(
-                page_id, key, output, type_, hash_, force=True)
+            force = True
+
+        if force is not None:
+            try:
+                attachment_id = publisher.store_attachment(
+                    page_id, key, output, type_, hash_, force=force)
+            except ConfluenceBadApiError as ex:
+                # if the target page (trusted from the publish manifest) no
+                # longer exists, publish the page again and retry
+                if not self._repair_tracked_page(page_id, ex):
+                    raise
+
+                page_id = self.state.upload_id(docname)
+                output.seek(0)
+                attachment_id = publisher.store_attachment(
+                    page_id, key, output, type_, hash_, force=force)
+
+        if attachment_id and self.manifest:
+            self.manifest.track_attachment(docname, key, attachment_id, hash_)
 
         if attachment_id and self.post_cleanup:
             if page_id in self.legacy_assets:
@@ -634,15 +1075,7 @@ class ConfluenceBuilder(Builder):
                 return
 
             if self.legacy_pages:
-                if self.config.confluence_adv_bulk_archiving:
-                    print('archiving legacy pages...')
-                    self.publisher.archive_pages(self.legacy_pages)
-                else:
-                    for legacy_page_id in status_iterator(
-                            self.legacy_pages, 'archiving legacy pages... ',
-                            length=len(self.legacy_pages),
-                            verbosity=self._verbose):
-                        self.publisher.archive_page(legacy_page_id)
+                self._archive_legacy_pages()
 
         # check if purging is enabled
         if self.config.confluence_cleanup_purge:
@@ -653,10 +1086,11 @@ class ConfluenceBuilder(Builder):
 
             if self.legacy_pages:
                 for legacy_page_id in status_iterator(
-                        self.legacy_pages, 'removing legacy pages... ',
+                        self._process_entries(
+                            self.publisher.remove_page, self.legacy_pages),
+                        'removing legacy pages... ',
                         length=len(self.legacy_pages),
                         verbosity=self._verbose):
-                    self.publisher.remove_page(legacy_page_id)
                     # remove any pending assets to remove from the page (as they
                     # are already been removed)
                     self.legacy_assets.pop(legacy_page_id, None)
@@ -670,20 +1104,31 @@ class ConfluenceBuilder(Builder):
                 def to_asset_name(attachment_id):
                     return legacy_assets[attachment_id]
 
-                for attachment_id in status_iterator(
-                        legacy_assets.keys(),
+                for _ in status_iterator(
+                        self._process_entries(
+                            self.publisher.remove_attachment,
+                            list(legacy_assets.keys())),
                         'removing legacy assets... ',
                         length=len(legacy_assets.keys()),
                         verbosity=self._verbose,
                         stringify_func=to_asset_name):
-
-                    self.publisher.remove_attachment(attachment_id)
+                    pass
 
     def finish(self):
         # restore environment's get_doctree if it was temporarily replaced
         if self._original_get_doctree:
             self.env.get_doctree = self._original_get_doctree
 
+        # store document dependencies for future (incremental) runs
+        self.dependencies.prune(self.env.found_docs)
+        self.dependencies.save()
+
+        # store rendered images for future runs
+        self.render_cache.save()
+
+        # store asset hashes for future runs
+        self.assets.hashes.save()
+
         # build index
         if self.use_index:
             self.info('generating index...', nonl=(not self._verbose))
@@ -718,65 +1163,455 @@ class ConfluenceBuilder(Builder):
 
         # publish generated output (if desired)
         if self.publish:
-            self.legacy_assets = {}
-            self.legacy_pages = None
-            self.parent_id = self.publisher.get_base_page_id()
-
-            for docname in status_iterator(
-                    self.publish_docnames, 'publishing documents... ',
-                    length=len(self.publish_docnames),
-                    verbosity=self._verbose):
-                if self._check_publish_skip(docname):
-                    self.verbose(docname + ' skipped due to configuration')
-                    continue
-                docfile = path.join(self.outdir, self.file_transform(docname))
+            with self.metrics.phase('publish'):
+                if not self.publish_pipeline:
+                    self._publish_prepare()
 
-                try:
-                    with open(docfile, 'r', encoding='utf-8') as file:
-                        output = file.read()
-                        self.publish_doc(docname, output)
-
-                except (IOError, OSError) as err:
-                    self.warn(f'error reading file {docfile}: {err}')
-
-            self.info('building intersphinx... ', nonl=(not self._verbose))
-            build_intersphinx(self)
-            self.info('done')
-
-            if self.config.confluence_publish_intersphinx:
-                inv = path.join(self.outdir, 'objects.inv')
-                if os.path.exists(inv):
-                    self.verbose('registering intersphinx database attachment')
-                    self.assets.add(inv, self.config.root_doc)
-                else:
-                    self.verbose('no generated intersphinx database detected')
-
-            def to_asset_name(asset):
-                return asset[0]
-
-            assets = self.assets.build()
-            for asset in status_iterator(assets, 'publishing assets... ',
-                    length=len(assets), verbosity=self._verbose,
-                    stringify_func=to_asset_name):
-                key, absfile, type_, hash_, docname = asset
-                if self._check_publish_skip(docname):
-                    self.verbose(key + ' skipped due to configuration')
-                    continue
+                # a pool of workers is only created when documents or assets
+                # are published concurrently (and is always shutdown, even if
+                # publishing fails)
+                workers = self.config.confluence_publish_workers
+                concurrent = workers and workers > 1
+                publish_executor = None
 
                 try:
-                    with open(absfile, 'rb') as file:
-                        output = file.read()
-                        self.publish_asset(key, docname, output, type_, hash_)
-                except (IOError, OSError) as err:
-                    self.warn(f'error reading asset {key}: {err}')
-
-            self.publish_cleanup()
-            self.publish_finalize()
+                    if self.publish_pipeline:
+                        # submit any documents not published while writing
+                        # (e.g. special documents) and wait for all documents
+                        # to be published
+                        for docname in self.publish_docnames:
+                            self.publish_pipeline.submit(docname)
+
+                        for _ in status_iterator(self.publish_pipeline.join(),
+                                'publishing documents... ',
+                                length=len(self.publish_docnames),
+                                verbosity=self._verbose):
+                            pass
+                    elif concurrent:
+                        publish_executor = ThreadPoolExecutor(
+                            max_workers=workers)
+
+                        for _ in status_iterator(
+                                self._publish_docnames_concurrently(
+                                    publish_executor),
+                                'publishing documents... ',
+                                length=len(self.publish_docnames),
+                                verbosity=self._verbose):
+                            pass
+                    else:
+                        for docname in status_iterator(
+                                self.publish_docnames,
+                                'publishing documents... ',
+                                length=len(self.publish_docnames),
+                                verbosity=self._verbose):
+                            self._publish_docname(docname)
+
+                    self.info('building intersphinx... ',
+                        nonl=(not self._verbose))
+                    build_intersphinx(self)
+                    self.info('done')
+
+                    if self.config.confluence_publish_intersphinx:
+                        inv = path.join(self.outdir, 'objects.inv')
+                        if os.path.exists(inv):
+                            self.verbose('registering intersphinx database '
+                                'attachment')
+                            self.assets.add(inv, self.config.root_doc)
+                        else:
+                            self.verbose('no generated intersphinx database '
+                                'detected')
+
+                    def to_asset_name(asset):
+                        return asset[0]
+
+                    assets = self.assets.build()
+                    if concurrent and assets:
+                        if not publish_executor:
+                            publish_executor = ThreadPoolExecutor(
+                                max_workers=workers)
+
+                        # all target pages have been published at this point,
+                        # so all assets can be published at the same time
+                        for _ in status_iterator(
+                                self._process_concurrently(publish_executor,
+                                    self._publish_asset_entry, assets),
+                                'publishing assets... ',
+                                length=len(assets), verbosity=self._verbose,
+                                stringify_func=to_asset_name):
+                            pass
+                    else:
+                        for asset in status_iterator(assets,
+                                'publishing assets... ', length=len(assets),
+                                verbosity=self._verbose,
+                                stringify_func=to_asset_name):
+                            self._publish_asset_entry(asset)
+                finally:
+                    if publish_executor:
+                        publish_executor.shutdown()
+
+            with self.metrics.phase('cleanup'):
+                self.publish_cleanup()
+
+            with self.metrics.phase('publish'):
+                self.publish_finalize()
+
+            if self.manifest:
+                self.manifest.prune(self.env.all_docs)
+                self.manifest.save()
+
+        # store a report of build/publish metrics (if configured)
+        if self.config.confluence_publish_metrics:
+            metrics_file = path.join(self.outdir, METRICS_FILENAME)
+            self.metrics.save(metrics_file)
+
+    def build(self, *args, **kwargs):
+        try:
+            super().build(*args, **kwargs)
+        except BaseException:
+            # a builder is not cleaned up when a build fails; ensure any
+            # publish pipeline does not continue to publish (or hold threads)
+            if self.publish_pipeline:
+                self.publish_pipeline.shutdown()
+            raise
 
     def cleanup(self):
-        if self.publish:
+        if self.publish_pipeline:
+            self.publish_pipeline.shutdown()
+
+        # retain the publisher's session if this builder is kept alive for
+        # additional builds (see `prepare_rebuild`)
+        if self.publish and not self.keep_alive:
             self.publisher.disconnect()
 
+        if self._doctree_spill_dir:
+            shutil.rmtree(self._doctree_spill_dir, ignore_errors=True)
+            self._doctree_spill_dir = None
+
+    def prepare_rebuild(self):
+        """
+        prepare the builder for another build
+
+        Allows a builder which is kept alive (``keep_alive``) to perform
+        another build with the same environment and publisher session (e.g.
+        when watching for changes). Any tracking specific to a single build is
+        reset, while information which remains valid between builds (e.g. the
+        page identifiers of published documents) is retained.
+
+        Since a rebuild only publishes documents which have changed, legacy
+        pages and assets are not cleaned up on a rebuild.
+        """
+        # restore the environment's get_doctree if a previous build failed
+        # before finishing (to avoid replacing it with its own replacement)
+        if self._original_get_doctree:
+            self.env.get_doctree = self._original_get_doctree
+            self._original_get_doctree = None
+
+        hashes = self.assets.hashes
+        self.assets = ConfluenceAssetManager(self.config, self.env, self.outdir)
+        self.assets.hashes = hashes
+
+        self.cache_doctrees = OrderedDict()
+        self.metadata = defaultdict(dict)
+        self.nav_next = {}
+        self.nav_prev = {}
+        self.post_cleanup = False
+        self.publish_docnames = []
+        self.publish_pipeline = None
+        self.root_doc_page_id = None
+        self._modified_doctrees = set()
+        self._pipelined_docnames = set()
+        self._spilled_doctrees = {}
+        self._templates = {}
+
+        # the environment has been updated for the active configuration (avoid
+        # re-reading all documents, as done when the configuration changes)
+        self.env.config_status = CONFIG_OK
+        self.env.config_status_extra = ''
+
+        # (similar to Sphinx's testing application) as of Sphinx v7.0.x, the
+        # environment caches each document's pickled doctree once loaded,
+        # which would return stale doctrees for documents read again
+        pickled_cache = getattr(self.env, '_pickled_doctree_cache', None)
+        if pickled_cache:
+            pickled_cache.clear()
+
+        # documents written by the previous build have tracked their
+        # dependencies, which can be used to find outdated documents
+        self.dependencies.loaded = True
+
+        # titles and targets are registered again when preparing documents
+        upload_ids = dict(self.state.doc2uploadId)
+        self.state.reset()
+        self.state.doc2uploadId.update(upload_ids)
+
+        # imgmath removes its temporary directory at the end of each build
+        ensuredir(self._imgmath_tempdir)
+
+    def _archive_legacy_pages(self):
+        """
+        archive all legacy pages
+
+        Archives all tracked legacy pages. Unless bulk archiving has been
+        explicitly disabled, pages are first archived using bulk archive
+        requests. If the Confluence instance does not support bulk archiving
+        (and bulk archiving was not explicitly requested), each page will be
+        archived individually instead.
+        """
+        bulk_archiving = self.config.confluence_adv_bulk_archiving
+
+        if bulk_archiving is not False:
+            self.info('archiving legacy pages... ', nonl=(not self._verbose))
+
+            try:
+                self.publisher.archive_pages(self.legacy_pages)
+            except ConfluenceBadApiError as ex:
+                if bulk_archiving or 'bulk archive' not in str(ex):
+                    raise
+
+                if not self._verbose:
+                    self.info(' unsupported')
+                self.verbose('bulk archiving unsupported; '
+                    'archiving pages individually')
+            else:
+                if not self._verbose:
+                    self.info(' done')
+                return
+
+        for _ in status_iterator(
+                self._process_entries(
+                    self.publisher.archive_page, self.legacy_pages),
+                'archiving legacy pages... ',
+                length=len(self.legacy_pages),
+                verbosity=self._verbose):
+            pass
+
+    def _process_entries(self, func, entries):
+        """
+        process a series of entries
+
+        Invokes the provided call for each entry. If publishing has been
+        configured to use multiple workers, entries will be processed
+        concurrently (see ``_process_concurrently``).
+
+        Args:
+            func: the call to invoke for each entry
+            entries: the entries to process
+
+        Yields:
+            each entry as it has been processed
+        """
+        workers = self.config.confluence_publish_workers
+        if workers and workers > 1:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                yield from self._process_concurrently(executor, func, entries)
+        else:
+            for entry in entries:
+                func(entry)
+                yield entry
+
+    def _publish_asset_entry(self, asset):
+        """
+        publish an asset entry
+
+        Publishes an asset entry (see ``ConfluenceAssetManager.build``) to its
+        respective document, unless the document has been flagged to be
+        skipped.
+
+        Args:
+            asset: the asset entry to publish
+        """
+        key, absfile, type_, hash_, docname = asset
+        if self._check_publish_skip(docname):
+            self.verbose(key + ' skipped due to configuration')
+            return
+
+        # provide the file object to publish with (instead of reading the
+        # asset's contents) to allow large assets to be streamed when uploaded
+        try:
+            with open(absfile, 'rb') as file:
+                self.publish_asset(key, docname, file, type_, hash_)
+        except (IOError, OSError) as err:
+            self.warn(f'error reading asset {key}: {err}')
+
+    def _repair_tracked_page(self, page_id, ex):
+        """
+        republish a document whose tracked page is missing or has changed
+
+        Documents which are unchanged since they were last published are not
+        published again, trusting the page tracked in the publish manifest. If
+        a request made for a tracked page fails (e.g. the page has been
+        removed from the Confluence instance), the manifest entry is discarded
+        and the document is published again.
+
+        Args:
+            page_id: the identifier of the page a failed request was made for
+            ex: the failure
+
+        Returns:
+            whether the page was a tracked page which has been republished
+        """
+        if not page_id or ex.status_code not in (404, 409):
+            return False
+
+        with self._manifest_lock:
+            docname = self._manifest_pages.get(str(page_id))
+            if not docname:
+                return False
+
+            if docname not in self._manifest_repaired:
+                self._manifest_repaired.add(docname)
+                self.verbose(f'{docname} page ({page_id}) is missing or has '
+                    'changed; republishing')
+                self.manifest.discard(docname)
+                self._publish_docname(docname)
+
+        return True
+
+    def _publish_docname(self, docname):
+        """
+        publish a document
+
+        Publishes the generated output of a document, unless the document has
+        been flagged to be skipped.
+
+        Args:
+            docname: the document to publish
+        """
+        if self._check_publish_skip(docname):
+            self.verbose(docname + ' skipped due to configuration')
+            return
+
+        docfile = path.join(self.outdir, self.file_transform(docname))
+
+        # (the document's content is streamed from the generated file when
+        # publishing, instead of loading the entire document into memory)
+        try:
+            self.publish_doc(docname, FileContent(docfile))
+
+        except (IOError, OSError) as err:
+            self.warn(f'error reading file {docfile}: {err}')
+
+    def _publish_prepare(self):
+        """
+        prepare to publish documents
+
+        Prepares the state required before any document is published (e.g.
+        the base page to publish under and any prefetched page information).
+        """
+        self.legacy_assets = {}
+        self.legacy_pages = None
+        self.parent_id = self.publisher.get_base_page_id()
+        self._manifest_pages = {}
+        self._manifest_repaired = set()
+
+        if self.config.confluence_publish_prefetch:
+            self.info('prefetching pages... ', nonl=(not self._verbose))
+            self.publisher.prefetch_pages()
+            if not self._verbose:
+                self.info(' done')
+
+    def _start_publish_pipeline(self):
+        """
+        start a pipeline to publish documents as they are written
+
+        Creates a publish pipeline for all documents to be published, where
+        documents are submitted to the pipeline as soon as they are written.
+        Special documents (e.g. genindex) are not submitted when written, since
+        their content is only generated when finishing a build.
+        """
+        special_docnames = set(self.domain_indices)
+        if self.use_index:
+            special_docnames.add('genindex')
+        if self.use_search:
+            special_docnames.add('search')
+
+        self._pipelined_docnames = \
+            set(self.publish_docnames) - special_docnames
+
+        # the first document to publish (e.g. the root document) is published
+        # before any other document, since the first publish event will
+        # populate any state required by other documents (e.g. ancestor
+        # restrictions or legacy pages)
+        root = None
+        for docname in self.publish_docnames:
+            if not self._check_publish_skip(docname):
+                root = docname
+                break
+
+        self.publish_pipeline = ConfluencePublishPipeline(
+            self._publish_docname, self.publish_docnames,
+            self.state.parent_docname, root=root,
+            workers=self.config.confluence_publish_workers)
+
+    def _publish_docnames_concurrently(self, executor):
+        """
+        publish all documents using a pool of workers
+
+        Publishes each document to be published using the provided executor.
+        Since a parent page must exist before its children can be published,
+        documents are scheduled by their depth in the document hierarchy --
+        all documents at a given depth are published at the same time, before
+        the next depth is processed.
+
+        Args:
+            executor: the executor to publish with
+
+        Yields:
+            each document name as it has been processed
+        """
+        remaining = list(self.publish_docnames)
+
+        # publish the first published document (e.g. the root document) on its
+        # own, since the first publish event will populate any state required
+        # by other documents (e.g. ancestor restrictions or legacy pages)
+        while remaining:
+            docname = remaining.pop(0)
+            self._publish_docname(docname)
+            yield docname
+
+            if not self._check_publish_skip(docname):
+                break
+
+        levels = defaultdict(list)
+        for docname in remaining:
+            depth = 0
+            parent = self.state.parent_docname(docname)
+            while parent:
+                depth += 1
+                parent = self.state.parent_docname(parent)
+
+            levels[depth].append(docname)
+
+        for depth in sorted(levels):
+            yield from self._process_concurrently(
+                executor, self._publish_docname, levels[depth])
+
+    def _process_concurrently(self, executor, func, entries):
+        """
+        process a series of entries using an executor
+
+        Submits a call for each provided entry into an executor and yields
+        each entry as it has been processed. If an entry fails to be processed,
+        any pending entries will be cancelled and the exception is raised.
+
+        Args:
+            executor: the executor to use
+            func: the call to invoke for each entry
+            entries: the entries to process
+
+        Yields:
+            each entry as it has been processed
+        """
+        futures = {executor.submit(func, entry): entry for entry in entries}
+
+        try:
+            for future in as_completed(futures):
+                future.result()
+                yield futures[future]
+        finally:
+            for future in futures:
+                future.cancel()
+
     def _check_publish_skip(self, docname):
         """
         check publishing should be skipped for the provided docname
@@ -797,7 +1632,7 @@ class ConfluenceBuilder(Builder):
 
         return False
 
-    def _extract_metadata(self, docname, doctree):
+    def _extract_metadata(self, docname, doctree, metadata_nodes=None):
         """
         extract metadata from a document
 
@@ -808,10 +1643,14 @@ class ConfluenceBuilder(Builder):
         Args:
             docname: the document
             doctree: the doctree to extract metadata from
+            metadata_nodes (optional): the metadata nodes of the doctree
         """
         metadata = self.metadata.setdefault(docname, {})
 
-        for node in findall(doctree, confluence_metadata):
+        if metadata_nodes is None:
+            metadata_nodes = list(findall(doctree, confluence_metadata))
+
+        for node in metadata_nodes:
             labels = metadata.setdefault('labels', [])
             labels.extend(node.params['labels'])
             node.parent.remove(node)
@@ -854,60 +1693,50 @@ class ConfluenceBuilder(Builder):
         if docname not in self.publish_docnames:
             self.publish_docnames.append(docname)
 
-        # render and cache header data (if any)
-        if self._cached_header_data is None:
-            self._cached_header_data = ''
-            header_template_data = ''
-
-            if self.config.confluence_header_file is not None:
-                fname = path.join(self.env.srcdir,
-                    self.config.confluence_header_file)
-                try:
-                    with open(fname, encoding='utf-8') as file:
-                        header_template_data = file.read() + '\n'
-                except (IOError, OSError) as err:
-                    self.warn(f'error reading file {fname}: {err}')
-
-                # if no data is supplied, the file is plain text
-                if self.config.confluence_header_data is None:
-                    self._cached_header_data = header_template_data
-                else:
-                    self._cached_header_data = self.templates.render_string(
-                        header_template_data,
-                        self.config.confluence_header_data)
-
-        # render and cache footer data (if any)
-        if self._cached_footer_data is None:
-            self._cached_footer_data = ''
-            footer_template_data = ''
-
-            if self.config.confluence_footer_file is not None:
-                fname = path.join(self.env.srcdir,
-                    self.config.confluence_footer_file)
-                try:
-                    with open(fname, encoding='utf-8') as file:
-                        footer_template_data = file.read() + '\n'
-                except (IOError, OSError) as err:
-                    self.warn(f'error reading file {fname}: {err}')
-
-                # if no data is supplied, the file is plain text
-                if self.config.confluence_footer_data is None:
-                    self._cached_footer_data = footer_template_data
-                else:
-                    self._cached_header_data = self.templates.render_string(
-                        footer_template_data,
-                        self.config.confluence_footer_data)
-
         # generate/replace the document in the output directory
         fname = path.join(self.outdir, docname + self.file_suffix)
         try:
-            with open(fname, 'w', encoding='utf-8') as f:
-                f.write(self._cached_header_data)
+            with open(fname, 'w', encoding='utf-8') as f, \
+                    self.metrics.phase('write'):
+                header = self.template_data('header')
+                if header is not None:
+                    f.write(header + '\n')
+
                 generator(self, docname, f)
-                f.write(self._cached_footer_data)
+
+                footer = self.template_data('footer')
+                if footer is not None:
+                    f.write(footer + '\n')
         except (IOError, OSError) as err:
             self.warn('error writing file %s: %s', docname, err)
 
+    def _cache_doctree(self, docname, doctree, modified=False):
+        """
+        cache a doctree for a document
+
+        Tracks a document's doctree in the doctree cache (as the most recently
+        used entry). If the cache exceeds a configured size, the least recently
+        used doctrees are evicted. Evicted doctrees which have been modified
+        are stored into the doctree directory, to be restored if requested
+        again.
+
+        Args:
+            docname: the document name
+            doctree: the doctree
+            modified (optional): whether the doctree has been modified
+        """
+        self.cache_doctrees[docname] = doctree
+        self.cache_doctrees.move_to_end(docname)
+
+        if modified:
+            self._modified_doctrees.add(docname)
+
+        cache_size = self.config.confluence_doctree_cache_size
+        while cache_size and len(self.cache_doctrees) > cache_size:
+            old_docname, old_doctree = self.cache_doctrees.popitem(last=False)
+            if old_docname in self._modified_doctrees:
+                self._spill_doctree(old_docname, old_doctree)
+
     def _get_doctree(self, docname):
         """
         override 'get_doctree' method
@@ -917,11 +1746,62 @@ class ConfluenceBuilder(Builder):
         doctree's from their source so there is no way to pre-load and pass a
         document's doctree into the writing stage. To overcome this, this
         extension hooks into the environment's 'get_doctree' method and
-        caches loaded document's doctree's into a map.
+        caches loaded document's doctree's into a map (or, when the cache is
+        limited in size, into the doctree directory).
+        """
+        doctree = self.cache_doctrees.get(docname)
+        if doctree is not None:
+            self.cache_doctrees.move_to_end(docname)
+            return doctree
+
+        spill_file = self._spilled_doctrees.pop(docname, None)
+        if spill_file:
+            with open(spill_file, 'rb') as f:
+                doctree = pickle.load(f)
+            os.remove(spill_file)
+
+            doctree.settings.env = self.env
+            doctree.reporter = LoggingReporter(self.env.doc2path(docname))
+        else:
+            doctree = self._original_get_doctree(docname)
+
+        self._cache_doctree(docname, doctree)
+        return doctree
+
+    def _spill_doctree(self, docname, doctree):
         """
-        if docname not in self.cache_doctrees:
-            self.cache_doctrees[docname] = self._original_get_doctree(docname)
-        return self.cache_doctrees[docname]
+        store an evicted doctree into the doctree directory
+
+        Args:
+            docname: the document name
+            doctree: the doctree
+        """
+        if not self._doctree_spill_dir:
+            self._doctree_spill_dir = tempfile.mkdtemp(
+                prefix='.confluence-doctrees-', dir=self.doctreedir)
+
+        spill_file = path.join(self._doctree_spill_dir, docname + '.doctree')
+        ensuredir(path.dirname(spill_file))
+
+        # (similar to Sphinx) drop references which cannot be pickled
+        env = doctree.settings.env
+        reporter = doctree.reporter
+        transformer = doctree.transformer
+        warning_stream = doctree.settings.warning_stream
+        doctree.settings.env = None
+        doctree.settings.warning_stream = None
+        doctree.reporter = None
+        doctree.transformer = None
+        try:
+            with open(spill_file, 'wb') as f:
+                pickle.dump(doctree, f, pickle.HIGHEST_PROTOCOL)
+        finally:
+            doctree.settings.env = env
+            doctree.settings.warning_stream = warning_stream
+            doctree.reporter = reporter
+            doctree.transformer = transformer
+
+        self._spilled_doctrees[docname] = spill_file
 
     def _header_footer_init(self, docname, doctree):
         """
@@ -1052,7 +1932,8 @@ class ConfluenceBuilder(Builder):
 
         return True
 
-    def _register_doctree_title_targets(self, docname, doctree):
+    def _register_doctree_title_targets(self, docname, doctree,
+            section_titles=None):
         """
         register title targets for a doctree
 
@@ -1063,12 +1944,16 @@ class ConfluenceBuilder(Builder):
         Args:
             docname: the docname of the doctree
             doctree: the doctree to search for targets
+            section_titles (optional): the section title nodes of the doctree
         """
 
         doc_used_names = {}
         secnumbers = self.env.toc_secnumbers.get(docname, {})
 
-        for node in findall(doctree, nodes.title):
+        if section_titles is None:
+            section_titles = findall(doctree, nodes.title)
+
+        for node in section_titles:
             if isinstance(node.parent, nodes.section):
                 section_node = node.parent
                 if 'ids' in section_node:
@@ -1093,6 +1978,60 @@ class ConfluenceBuilder(Builder):
                         id_ = f'{docname}#{id_}'
                         self.state.register_target(id_, target)
 
+    def _track_dependencies(self, docname, doctree):
+        """
+        track the documents a document's output depends on
+
+        Examines a document's (resolved) doctree for references to other
+        documents whose state is used when translating the document -- links
+        to other documents (including navigational links), document cards,
+        excerpt includes and documents hosting shared assets.
+
+        Args:
+            docname: the document name
+            doctree: the doctree
+        """
+        docparent = docname[0:docname.rfind('/') + 1]
+        dependencies = set()
+
+        def track_uri(uri):
+            target = uri.split('#')[0]
+            if target:
+                dependencies.add(posixpath.normpath(
+                    docparent + path.splitext(target)[0]))
+
+        for node in findall(doctree, nodes.reference):
+            if 'refdocname' in node:
+                dependencies.add(node['refdocname'])
+            elif 'refuri' in node and node.get('internal'):
+                target = self.resolve_relative_uri(docname, node['refuri'])
+                if target:
+                    dependencies.add(target)
+                else:
+                    track_uri(node['refuri'])
+
+        for node in findall(doctree, confluence_doc_card):
+            track_uri(node.params['href'])
+
+        for node in findall(doctree, confluence_doc_card_inline):
+            track_uri(node['reftarget'])
+
+        for node in findall(doctree, confluence_excerpt_include):
+            if node['doclink'].startswith('!'):
+                dependencies.add(node['doclink'][1:])
+
+        # (standalone assets are always hosted on the document using them)
+        if self.name != 'singleconfluence' and \
+                not self.config.confluence_asset_force_standalone:
+            for node in findall(doctree, nodes.image):
+                uri = str(node['uri'])
+                if not uri.startswith('data:') and uri.find('://') == -1:
+                    _, hosting_docname, _ = self.assets.fetch(node)
+                    if hosting_docname:
+                        dependencies.add(hosting_docname)
+
+        self.dependencies.track(docname, dependencies)
+
     def _top_ref_check(self, node):
         """
         report if the provided node is consider a #top reference
@@ -1108,7 +2047,7 @@ class ConfluenceBuilder(Builder):
         """
         return False
 
-    def _parse_doctree_title(self, docname, doctree):
+    def _parse_doctree_title(self, docname, doctree, title_element=None):
         """
         parse a doctree for a raw title value
 
@@ -1117,7 +2056,8 @@ class ConfluenceBuilder(Builder):
         generated (if configuration permits) or a `None` value is returned.
         """
         doctitle = None
-        title_element = self._find_title_element(doctree)
+        if title_element is None:
+            title_element = self._find_title_element(doctree)
         if title_element:
             doctitle = title_element.astext()
 
@@ -25,6 +25,36 @@ def build_main(args_parser):
         the exit code
     """
 
+    args = parse_build_args(args_parser)
+
+    # run sphinx engine
+    with docutils_namespace():
+        builder = args.action if args.action else DEFAULT_BUILDER
+        app = prepare_app(args, builder)
+        if not app:
+            return 1
+
+        app.build(force_all=True)
+
+    return 0
+
+
+def parse_build_args(args_parser):
+    """
+    parse the arguments used to build documentation
+
+    Registers the arguments used when building documentation (e.g. defines
+    and the output directory) and parses the provided command line. Any
+    arguments specific to an action should be registered on the parser before
+    invoking this call.
+
+    Args:
+        args_parser: the argument parser to use for argument processing
+
+    Returns:
+        the parsed arguments
+    """
+
     args_parser.add_argument('-D', action='append', default=[], dest='define')
     args_parser.add_argument('--output-dir', '-o')
 
@@ -33,6 +63,25 @@ def build_main(args_parser):
     if unknown_args:
         logger.warn('unknown arguments: {}'.format(' '.join(unknown_args)))
 
+    return args
+
+
+def prepare_app(args, builder):
+    """
+    prepare a sphinx application to build documentation
+
+    Creates a Sphinx application for the working directory and options
+    provided in the parsed arguments (see ``parse_build_args``). This call
+    should be invoked inside a docutils namespace.
+
+    Args:
+        args: the parsed arguments
+        builder: the name of the builder to execute
+
+    Returns:
+        the sphinx application; ``None`` if the arguments are invalid
+    """
+
     defines = {}
     for val in args.define:
         try:
@@ -40,7 +89,7 @@ def build_main(args_parser):
             defines[key] = val
         except ValueError:
             logger.error('invalid define provided in command line')
-            return 1
+            return None
 
     work_dir = args.work_dir if args.work_dir else os.getcwd()
     if args.output_dir:
@@ -48,26 +97,20 @@ def build_main(args_parser):
     else:
         output_dir = os.path.join(work_dir, '_build', 'confluence')
     doctrees_dir = os.path.join(output_dir, '.doctrees')
-    builder = args.action if args.action else DEFAULT_BUILDER
 
     verbosity = 0
     if args.verbose:
         with suppress(ValueError):
             verbosity = int(args.verbose)
 
-    # run sphinx engine
-    with docutils_namespace():
-        app = Sphinx(
-            work_dir,               # document sources
-            work_dir,               # directory with configuration
-            output_dir,             # output for generated documents
-            doctrees_dir,           # output for doctree files
-            builder,                # builder to execute
-            confoverrides=defines,  # configuration overload
-            status=sys.stdout,      # sphinx status output
-            warning=sys.stderr,     # sphinx warning output
-            freshenv=True,          # fresh environment
-            verbosity=verbosity)    # verbosity
-        app.build(force_all=True)
-
-    return 0
+    return Sphinx(
+        work_dir,               # document sources
+        work_dir,               # directory with configuration
+        output_dir,             # output for generated documents
+        doctrees_dir,           # output for doctree files
+        builder,                # builder to execute
+        confoverrides=defines,  # configuration overload
+        status=sys.stdout,      # sphinx status output
+        warning=sys.stderr,     # sphinx warning output
+        freshenv=True,          # fresh environment
+        verbosity=verbosity)    # verbosity
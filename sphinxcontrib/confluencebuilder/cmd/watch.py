@@ -0,0 +1,131 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright Sphinx Confluence Builder Contributors (AUTHORS)
+
+from contextlib import suppress
+from sphinx.util.docutils import docutils_namespace
+from sphinxcontrib.confluencebuilder.cmd.build import DEFAULT_BUILDER
+from sphinxcontrib.confluencebuilder.cmd.build import parse_build_args
+from sphinxcontrib.confluencebuilder.cmd.build import prepare_app
+from sphinxcontrib.confluencebuilder.logger import ConfluenceLogger as logger
+import os
+import time
+
+#: default interval (in seconds) to check for source changes
+DEFAULT_WATCH_INTERVAL = 1
+
+
+def watch_main(args_parser):
+    """
+    watch mainline
+
+    The mainline for the 'watch' action.
+
+    Args:
+        args_parser: the argument parser to use for argument processing
+
+    Returns:
+        the exit code
+    """
+
+    args_parser.add_argument('--interval', type=float,
+        default=DEFAULT_WATCH_INTERVAL)
+    args = parse_build_args(args_parser)
+
+    # run sphinx engine
+    #
+    # A single Sphinx application is kept alive for the entire watch session,
+    # allowing each rebuild to reuse the existing environment (only reading
+    # and writing documents which are affected by a change) and the builder's
+    # publisher session.
+    with docutils_namespace():
+        app = prepare_app(args, DEFAULT_BUILDER)
+        if not app:
+            return 1
+
+        builder = app.builder
+        builder.keep_alive = True
+
+        try:
+            app.build(force_all=True)
+
+            work_dir = app.srcdir
+            ignored = [os.path.abspath(app.outdir)]
+            snapshot = snapshot_sources(work_dir, ignored)
+            conf_file = os.path.join(app.confdir, 'conf.py')
+
+            logger.info('watching for changes... (press Ctrl+C to stop)')
+            while True:
+                time.sleep(args.interval)
+
+                latest = snapshot_sources(work_dir, ignored)
+                if latest == snapshot:
+                    continue
+
+                # wait for changes to settle (e.g. a series of saved files)
+                # before rebuilding
+                while True:
+                    time.sleep(args.interval)
+                    settled = snapshot_sources(work_dir, ignored)
+                    if settled == latest:
+                        break
+                    latest = settled
+
+                if latest.get(conf_file) != snapshot.get(conf_file):
+                    logger.warn('configuration has changed; restart to apply '
+                        'configuration changes')
+
+                snapshot = latest
+
+                # a failed rebuild (e.g. an invalid document, a publishing
+                # error or a file which could not be written) is reported and
+                # the watch session continues
+                try:
+                    builder.prepare_rebuild()
+                    app.build()
+                except Exception as ex:
+                    logger.error(f'rebuild failed: {ex}')
+
+                logger.info('watching for changes... (press Ctrl+C to stop)')
+        except KeyboardInterrupt:
+            logger.info('')
+        finally:
+            builder.keep_alive = False
+            builder.cleanup()
+
+    return 0
+
+
+def snapshot_sources(src_dir, ignored=None):
+    """
+    take a snapshot of the state of source files
+
+    Generates a snapshot of all files found in a source directory, which can
+    be compared with another snapshot to detect if any files have been added,
+    modified or removed. Hidden files/directories, Python caches and any
+    ignored directories (e.g. the output directory) are not included.
+
+    Args:
+        src_dir: the source directory
+        ignored (optional): absolute paths of directories to ignore
+
+    Returns:
+        a dictionary of file paths to their modification time and size
+    """
+    snapshot = {}
+    ignored = set(ignored or [])
+
+    for root, dirs, files in os.walk(src_dir):
+        dirs[:] = [d for d in dirs if not d.startswith('.') and
+            d != '__pycache__' and
+            os.path.abspath(os.path.join(root, d)) not in ignored]
+
+        for file in files:
+            if file.startswith('.'):
+                continue
+
+            filepath = os.path.join(root, file)
+            with suppress(OSError):
+                stat = os.stat(filepath)
+                snapshot[filepath] = (stat.st_mtime_ns, stat.st_size)
+
+    return snapshot
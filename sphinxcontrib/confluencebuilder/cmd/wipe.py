@@ -127,9 +127,9 @@ pages. Only use this action if you know what you are doing.
     if args.parent:
         base_page_id = publisher.get_base_page_id()
 
-    # find all legacy pages; always search aggressive to prevent any Confluence
-    # caching issues/delays
-    legacy_pages = publisher.get_descendants(base_page_id, 'search-aggressive')
+    # find all legacy pages; always sweep for pages (which re-checks any
+    # inconsistent results) to prevent any Confluence caching issues/delays
+    legacy_pages = publisher.get_descendants(base_page_id, 'sweep')
 
     print('         URL:', server_url)
     print('       Space:', space_key)
@@ -140,6 +140,7 @@ def validate_configuration(builder):
             'direct-aggressive',
             'search',
             'search-aggressive',
+            'sweep',
         )
     except ConfluenceConfigurationError as e:
         raise ConfluenceConfigurationError('''\
@@ -147,7 +148,7 @@ def validate_configuration(builder):
 
 The option 'confluence_cleanup_search_mode' has been provided to override the
 default search method for page descendants. Accepted values include 'direct',
-'search' and '<mode>-aggressive'.
+'search', '<mode>-aggressive' and 'sweep'.
 '''.format(msg=e))
 
     # ##################################################################
@@ -239,6 +240,12 @@ set to a list of domains (strings) to be included.
 
     # ##################################################################
 
+    # confluence_doctree_cache_size
+    validator.conf('confluence_doctree_cache_size') \
+             .int_(positive=True)
+
+    # ##################################################################
+
     # confluence_editor
     validator.conf('confluence_editor') \
              .string()
@@ -542,6 +549,24 @@ names are relative to the documentation's source directory.
 
     # ##################################################################
 
+    # confluence_publish_connections
+    validator.conf('confluence_publish_connections') \
+             .int_(positive=True)
+
+    # ##################################################################
+
+    # confluence_publish_manifest
+    validator.conf('confluence_publish_manifest') \
+             .bool()
+
+    # ##################################################################
+
+    # confluence_publish_metrics
+    validator.conf('confluence_publish_metrics') \
+             .bool()
+
+    # ##################################################################
+
     # confluence_publish_onlynew
     validator.conf('confluence_publish_onlynew') \
              .bool()
@@ -560,12 +585,24 @@ names are relative to the documentation's source directory.
 
     # ##################################################################
 
+    # confluence_publish_pipeline
+    validator.conf('confluence_publish_pipeline') \
+             .bool()
+
+    # ##################################################################
+
     # confluence_publish_postfix
     validator.conf('confluence_publish_postfix') \
              .string()
 
     # ##################################################################
 
+    # confluence_publish_prefetch
+    validator.conf('confluence_publish_prefetch') \
+             .bool()
+
+    # ##################################################################
+
     # confluence_publish_prefix
     validator.conf('confluence_publish_prefix') \
              .string()
@@ -583,6 +620,12 @@ names are relative to the documentation's source directory.
 
     # ##################################################################
 
+    # confluence_publish_workers
+    validator.conf('confluence_publish_workers') \
+             .int_(positive=True)
+
+    # ##################################################################
+
     # confluence_remove_title
     validator.conf('confluence_remove_title') \
              .bool()
@@ -0,0 +1,123 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright Sphinx Confluence Builder Contributors (AUTHORS)
+
+from sphinxcontrib.confluencebuilder.logger import ConfluenceLogger as logger
+import json
+import os
+
+# filename of the dependency cache (stored in the doctree directory)
+DEPENDENCIES_FILENAME = 'confluence-dependencies.json'
+
+# version of the dependency cache format (caches of other versions are ignored)
+DEPENDENCIES_VERSION = 1
+
+
+class ConfluenceDependencies:
+    """
+    a confluence document dependency tracker
+
+    The generated output of a document does not only depend on its own source.
+    A document's storage format output also includes the titles (and anchors)
+    of other documents it links to, the documents hosting any shared assets it
+    uses and the titles of its navigational neighbors. This tracker records,
+    for each written document, the names of other documents whose state can
+    change the document's output. The builder can use these records to
+    determine which documents need to be re-written when other documents have
+    been changed.
+
+    Args:
+        path: the path of the dependency cache
+    """
+    def __init__(self, path):
+        self.docs = {}
+        self.loaded = False
+        self.path = path
+
+    def load(self):
+        """
+        load the dependency cache
+
+        Loads the dependency records from its respective path (if any). If the
+        cache does not exist or was generated by another cache version, no
+        records will be loaded.
+
+        Returns:
+            whether or not records were loaded
+        """
+        self.docs = {}
+        self.loaded = False
+
+        try:
+            with open(self.path, encoding='utf-8') as file:
+                data = json.load(file)
+        except (IOError, OSError):
+            return False
+        except ValueError:
+            logger.verbose('ignoring invalid dependency cache')
+            return False
+
+        if not isinstance(data, dict) or \
+                data.get('version') != DEPENDENCIES_VERSION:
+            logger.verbose('ignoring dependency cache (version change)')
+            return False
+
+        self.docs = data.get('docs', {})
+        self.loaded = True
+        return True
+
+    def save(self):
+        """
+        save the dependency cache
+
+        Saves the dependency records to its respective path.
+        """
+        data = {
+            'docs': self.docs,
+            'version': DEPENDENCIES_VERSION,
+        }
+
+        try:
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as file:
+                json.dump(data, file, indent=1, sort_keys=True)
+            os.replace(tmp_path, self.path)
+        except (IOError, OSError) as err:
+            logger.warn(f'error writing dependency cache {self.path}: {err}')
+
+    def dependents(self, docnames):
+        """
+        return the documents which depend on any of the provided documents
+
+        Args:
+            docnames: the names of the documents to check against
+
+        Returns:
+            the set of dependent document names
+        """
+        dependents = set()
+        for docname, dependencies in self.docs.items():
+            if not docnames.isdisjoint(dependencies):
+                dependents.add(docname)
+
+        return dependents
+
+    def prune(self, docnames):
+        """
+        remove records for documents which no longer exist
+
+        Args:
+            docnames: the names of all known documents
+        """
+        for docname in list(self.docs):
+            if docname not in docnames:
+                del self.docs[docname]
+
+    def track(self, docname, dependencies):
+        """
+        track the dependencies of a written document
+
+        Args:
+            docname: the document's name
+            dependencies: the names of documents the document depends on
+        """
+        self.docs[docname] = sorted(set(dependencies) - {docname})
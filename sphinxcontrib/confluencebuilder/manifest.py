@@ -0,0 +1,227 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright Sphinx Confluence Builder Contributors (AUTHORS)
+
+from hashlib import sha256
+from sphinxcontrib.confluencebuilder.logger import ConfluenceLogger as logger
+from sphinxcontrib.confluencebuilder.rest import iterencode_json
+import json
+import os
+
+# filename of the publish manifest (stored in the output directory)
+MANIFEST_FILENAME = '.confluence-manifest.json'
+
+# version of the manifest format (manifests of other versions are discarded)
+MANIFEST_VERSION = 1
+
+
+class ConfluencePublishManifest:
+    """
+    a confluence publish manifest
+
+    The publish manifest tracks the results of previous publish attempts, for
+    each document: the identifier of the page a document was published to, the
+    last published version of the page, the fingerprint of the published page
+    data and the attachments (and their hashes) published to the page. On a
+    new publish attempt, the builder can use the manifest to skip documents
+    and assets which have not been changed since the last publish, without
+    needing to query the Confluence instance.
+
+    The manifest is trusted optimistically. Pages modified or removed on a
+    Confluence instance outside of this extension are only detected when
+    pages have been prefetched (comparing tracked versions) or when a later
+    request made for a tracked page fails, in which case the entry can be
+    discarded and the document published again.
+
+    Args:
+        path: the path of the manifest
+        target: a value identifying the target publish location
+    """
+    def __init__(self, path, target):
+        self.docs = {}
+        self.path = path
+        self.target = target
+
+    def load(self):
+        """
+        load the manifest
+
+        Loads the manifest's contents from its respective path (if any). If the
+        manifest does not exist, was generated by another manifest version or
+        for another publish target, no entries will be loaded.
+        """
+        self.docs = {}
+
+        try:
+            with open(self.path, encoding='utf-8') as file:
+                data = json.load(file)
+        except (IOError, OSError):
+            return
+        except ValueError:
+            logger.verbose('ignoring invalid publish manifest')
+            return
+
+        if not isinstance(data, dict):
+            logger.verbose('ignoring invalid publish manifest')
+            return
+
+        if data.get('version') != MANIFEST_VERSION:
+            logger.verbose('ignoring publish manifest (version change)')
+            return
+
+        if data.get('target') != self.target:
+            logger.verbose('ignoring publish manifest (target change)')
+            return
+
+        self.docs = data.get('docs', {})
+        logger.verbose('loaded publish manifest (%d entries)' % len(self.docs))
+
+    def save(self):
+        """
+        save the manifest
+
+        Saves the manifest's contents to its respective path.
+        """
+        data = {
+            'docs': self.docs,
+            'target': self.target,
+            'version': MANIFEST_VERSION,
+        }
+
+        try:
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as file:
+                json.dump(data, file, indent=1, sort_keys=True)
+            os.replace(tmp_path, self.path)
+        except (IOError, OSError) as err:
+            logger.warn(f'error writing publish manifest {self.path}: {err}')
+
+    def attachment(self, docname, page_id, key, hash_):
+        """
+        return a tracked attachment identifier for an unchanged asset
+
+        Args:
+            docname: the document's name the asset is published to
+            page_id: the identifier of the page the asset is published to
+            key: the asset's key
+            hash_: the hash of the asset
+
+        Returns:
+            the attachment identifier; ``None`` if not tracked or changed
+        """
+        entry = self.docs.get(docname)
+        if not entry or str(entry['page_id']) != str(page_id):
+            return None
+
+        attachment = entry['attachments'].get(key)
+        if not attachment or attachment['hash'] != hash_:
+            return None
+
+        return attachment['id']
+
+    def page(self, docname, fingerprint):
+        """
+        return a tracked page identifier for an unchanged document
+
+        Args:
+            docname: the document's name
+            fingerprint: the fingerprint of the page data to publish
+
+        Returns:
+            the page identifier; ``None`` if not tracked or changed
+        """
+        entry = self.docs.get(docname)
+        if not entry or entry['fingerprint'] != fingerprint:
+            return None
+
+        return entry['page_id']
+
+    def discard(self, docname):
+        """
+        discard the entry tracked for a document
+
+        Args:
+            docname: the document's name
+        """
+        self.docs.pop(docname, None)
+
+    def prune(self, docnames):
+        """
+        remove entries for documents which no longer exist
+
+        Args:
+            docnames: the names of all known documents
+        """
+        for docname in list(self.docs):
+            if docname not in docnames:
+                del self.docs[docname]
+
+    def track_attachment(self, docname, key, attachment_id, hash_):
+        """
+        track a published attachment
+
+        Args:
+            docname: the document's name the asset was published to
+            key: the asset's key
+            attachment_id: the identifier of the published attachment
+            hash_: the hash of the asset
+        """
+        entry = self.docs.get(docname)
+        if entry:
+            entry['attachments'][key] = {
+                'hash': hash_,
+                'id': attachment_id,
+            }
+
+    def track_page(self, docname, page_id, version, fingerprint):
+        """
+        track a published page
+
+        Tracks the page a document was published to. If the document was
+        published to another page than the one previously tracked, any tracked
+        attachments for the document are discarded.
+
+        Args:
+            docname: the document's name
+            page_id: the identifier of the published page
+            version: the version of the published page
+            fingerprint: the fingerprint of the published page data
+        """
+        entry = self.docs.get(docname)
+        if not entry or str(entry['page_id']) != str(page_id):
+            entry = {
+                'attachments': {},
+            }
+            self.docs[docname] = entry
+
+        entry['fingerprint'] = fingerprint
+        entry['page_id'] = page_id
+        entry['version'] = version
+
+    def version(self, docname):
+        """
+        return the last published version of a tracked page
+
+        Args:
+            docname: the document's name
+
+        Returns:
+            the page version; ``None`` if not tracked
+        """
+        entry = self.docs.get(docname)
+        return entry.get('version') if entry else None
+
+    @staticmethod
+    def fingerprint(*values):
+        """
+        generate a fingerprint for a series of values
+
+        Args:
+            *values: the (json-serializable) values to fingerprint
+
+        Returns:
+            the fingerprint
+        """
+        hasher = sha256()
+        for chunk in iterencode_json(values, sort_keys=True, default=str):
+            hasher.update(chunk.encode('utf-8'))
+        return hasher.hexdigest()
@@ -0,0 +1,287 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright Sphinx Confluence Builder Contributors (AUTHORS)
+
+from contextlib import contextmanager
+from sphinxcontrib.confluencebuilder.logger import ConfluenceLogger as logger
+import json
+import os
+import threading
+import time
+
+# filename of the metrics report (stored in the output directory)
+METRICS_FILENAME = 'confluence-metrics.json'
+
+# version of the metrics report format
+METRICS_VERSION = 1
+
+# upper bounds (in seconds) of each bucket in a request latency histogram
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class ConfluenceMetrics:
+    """
+    confluence build/publish metrics
+
+    Tracks metrics over the course of a build, to help determine where time is
+    spent when building and publishing documentation. Metrics include the
+    duration of each phase of a build (e.g. preparing, writing and publishing
+    documents) as well as statistics of REST requests for each type of
+    operation made on a Confluence instance (e.g. the number of requests made,
+    request latencies, the amount of data sent/received and any time spent
+    waiting on rate-limited requests). This class is thread-safe.
+    """
+    def __init__(self):
+        self.operations = {}
+        self.phases = {}
+        self._lock = threading.Lock()
+
+    def call(self, operation, duration, retries=0, backoff=0, delay=0,
+            failed=False):
+        """
+        track a (logical) operation call
+
+        A call tracks a single invoke of a REST operation, which may consist of
+        multiple requests (when a request is retried).
+
+        Args:
+            operation: the operation name
+            duration: the duration (in seconds) of the entire call
+            retries (optional): the number of retried requests
+            backoff (optional): the time (in seconds) waiting on rate limits
+            delay (optional): the time (in seconds) waiting on a user delay
+            failed (optional): whether or not the call failed
+        """
+        with self._lock:
+            stats = self._operation(operation)
+            stats['calls'] += 1
+            stats['duration'] += duration
+            stats['retries'] += retries
+            stats['backoff'] += backoff
+            stats['delay'] += delay
+            if failed:
+                stats['failures'] += 1
+
+    def request(self, operation, latency, sent=0, received=0, status=None):
+        """
+        track a request made for an operation
+
+        Args:
+            operation: the operation name
+            latency: the latency (in seconds) of the request
+            sent (optional): the number of bytes sent
+            received (optional): the number of bytes received
+            status (optional): the response's status code
+        """
+        with self._lock:
+            stats = self._operation(operation)
+            stats['requests'] += 1
+            stats['sent'] += sent
+            stats['received'] += received
+
+            if status == 429:
+                stats['rate_limited'] += 1
+            elif status and status >= 400:
+                stats['errors'] += 1
+
+            latency_stats = stats['latency']
+            latency_stats['total'] += latency
+            if latency_stats['min'] is None or latency < latency_stats['min']:
+                latency_stats['min'] = latency
+            if latency_stats['max'] is None or latency > latency_stats['max']:
+                latency_stats['max'] = latency
+
+            histogram = latency_stats['histogram']
+            for bound in LATENCY_BUCKETS:
+                if latency <= bound:
+                    histogram[str(bound)] += 1
+                    break
+            else:
+                histogram['inf'] += 1
+
+    @contextmanager
+    def phase(self, name):
+        """
+        track the duration of a build phase
+
+        A context-supported call which adds the time spent in the context to
+        the respective phase. A phase may be entered multiple times (e.g. once
+        per document), where each duration is accumulated.
+
+        Args:
+            name: the phase name
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+
+            with self._lock:
+                stats = self.phases.setdefault(name, {
+                    'count': 0,
+                    'duration': 0,
+                })
+                stats['count'] += 1
+                stats['duration'] += duration
+
+    def report(self):
+        """
+        generate a report of all tracked metrics
+
+        Returns:
+            the report (a json-serializable dictionary)
+        """
+        with self._lock:
+            operations = json.loads(json.dumps(self.operations))
+            phases = json.loads(json.dumps(self.phases))
+
+        totals = {
+            'backoff': 0,
+            'calls': 0,
+            'delay': 0,
+            'rate_limited': 0,
+            'received': 0,
+            'requests': 0,
+            'retries': 0,
+            'sent': 0,
+        }
+
+        for stats in operations.values():
+            for key in totals:
+                totals[key] += stats[key]
+
+            latency_stats = stats['latency']
+            if stats['requests']:
+                latency_stats['mean'] = \
+                    latency_stats['total'] / stats['requests']
+            else:
+                latency_stats['mean'] = None
+
+        return {
+            'operations': operations,
+            'phases': phases,
+            'totals': totals,
+            'version': METRICS_VERSION,
+        }
+
+    def save(self, path):
+        """
+        save a report of all tracked metrics
+
+        Args:
+            path: the path to save the report to
+        """
+        try:
+            tmp_path = path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as file:
+                json.dump(self.report(), file, indent=1, sort_keys=True)
+            os.replace(tmp_path, path)
+        except (IOError, OSError) as err:
+            logger.warn(f'error writing metrics report {path}: {err}')
+
+    def _operation(self, operation):
+        """
+        return the statistics tracked for an operation
+
+        This call should be invoked while holding the metrics' lock.
+
+        Args:
+            operation: the operation name
+
+        Returns:
+            the statistics
+        """
+        stats = self.operations.get(operation)
+        if stats is None:
+            histogram = {str(bound): 0 for bound in LATENCY_BUCKETS}
+            histogram['inf'] = 0
+
+            stats = self.operations[operation] = {
+                'backoff': 0,
+                'calls': 0,
+                'delay': 0,
+                'duration': 0,
+                'errors': 0,
+                'failures': 0,
+                'latency': {
+                    'histogram': histogram,
+                    'max': None,
+                    'min': None,
+                    'total': 0,
+                },
+                'rate_limited': 0,
+                'received': 0,
+                'requests': 0,
+                'retries': 0,
+                'sent': 0,
+            }
+
+        return stats
+
+
+def rest_operation(method, key):
+    """
+    return the (logical) operation name for a rest request
+
+    Maps a REST request's method and API key (e.g. ``content/1/label``) into
+    an operation name (e.g. ``label-update``), which is used to group request
+    metrics.
+
+    Args:
+        method: the request's method (e.g. ``get``)
+        key: the request's api key
+
+    Returns:
+        the operation name
+    """
+    method = method.lower()
+    parts = key.split('?', 1)[0].strip('/').split('/') if key else ['']
+    root = parts[0]
+    leaf = parts[-1]
+
+    if root == 'content':
+        if len(parts) == 1:
+            return {
+                'delete': 'delete',
+                'get': 'page-lookup',
+                'post': 'page-create',
+                'put': 'page-update',
+            }.get(method, f'page-{method}')
+
+        if leaf == 'search':
+            return 'search'
+
+        if leaf == 'archive':
+            return 'page-archive'
+
+        if 'descendant' in parts:
+            return 'descendant-search'
+
+        if 'attachment' in parts:
+            if method == 'get':
+                return 'attachment-lookup'
+            return 'attachment-upload'
+
+        if leaf == 'label':
+            return 'label-update'
+
+        if len(parts) == 2:
+            return {
+                'delete': 'delete',
+                'get': 'page-lookup',
+                'put': 'page-update',
+            }.get(method, f'page-{method}')
+
+    if root == 'search':
+        return 'search'
+
+    if root == 'space':
+        return 'space-lookup' if method == 'get' else 'space-update'
+
+    if root == 'longtask':
+        return 'task-status'
+
+    if root == 'user' and 'watch' in parts:
+        return 'watch-lookup' if method == 'get' else 'watch-update'
+
+    return f'{method}:{root}'
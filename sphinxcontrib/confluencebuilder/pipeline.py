@@ -0,0 +1,210 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright Sphinx Confluence Builder Contributors (AUTHORS)
+
+from concurrent.futures import ThreadPoolExecutor
+import threading
+
+
+class ConfluencePublishPipeline:
+    """
+    a confluence publish pipeline
+
+    Publishes documents in the background as soon as they are ready to be
+    published, allowing documents to be published while other documents are
+    still being written. A document is submitted to the pipeline once its
+    output has been generated, and is published once:
+
+    - the pipeline's root document has been published (since the first
+      publish event may populate state required by other documents); and
+    - the document's parent document (if also expected to be published) has
+      been published.
+
+    Once all documents have been submitted, the pipeline is joined to wait for
+    any remaining documents to be published. If a document fails to publish,
+    no other documents will be published and the failure is raised when
+    submitting or joining.
+
+    Args:
+        publish: the call to invoke to publish a document
+        docnames: the documents expected to be published
+        parent: the call to invoke to find the parent of a document
+        root (optional): the document to publish before any other document
+        workers (optional): the number of documents to publish at the same time
+    """
+    def __init__(self, publish, docnames, parent, root=None, workers=None):
+        self.publish = publish
+        self.parent = parent
+        self.root = root
+        self._completed = []
+        self._cond = threading.Condition()
+        self._error = None
+        self._executor = ThreadPoolExecutor(max_workers=workers or 1)
+        self._expected = set(docnames)
+        self._inflight = 0
+        self._joined = False
+        self._pending = []
+        self._published = set()
+        self._submitted = set()
+
+    def submit(self, docname):
+        """
+        submit a document to be published
+
+        Args:
+            docname: the document to publish
+        """
+        with self._cond:
+            self._raise_error()
+
+            if docname in self._submitted:
+                return
+
+            self._expected.add(docname)
+            self._submitted.add(docname)
+            self._pending.append(docname)
+            self._dispatch()
+
+    def join(self):
+        """
+        wait for all submitted documents to be published
+
+        Once joined, documents which are expected to be published but have not
+        been submitted will no longer prevent other documents from being
+        published.
+
+        Yields:
+            each document name as it has been published
+        """
+        yielded = 0
+
+        try:
+            while True:
+                with self._cond:
+                    if not self._joined:
+                        self._joined = True
+                        self._dispatch()
+
+                    while yielded == len(self._completed) and \
+                            not self._error and \
+                            (self._pending or self._inflight):
+                        self._cond.wait()
+
+                    self._raise_error()
+
+                    completed = self._completed[yielded:]
+                    yielded = len(self._completed)
+
+                    if not completed:
+                        break
+
+                yield from completed
+        finally:
+            self.shutdown()
+
+    def shutdown(self):
+        """
+        shutdown the pipeline
+
+        Any documents which have yet to be published will not be published.
+        """
+        with self._cond:
+            self._pending = []
+
+        self._executor.shutdown()
+
+    def _dispatch(self):
+        """
+        dispatch documents which are ready to be published
+
+        This call should be invoked while holding the pipeline's lock.
+        """
+        if self._error:
+            return
+
+        for docname in list(self._pending):
+            if self._ready(docname):
+                self._pending.remove(docname)
+                self._inflight += 1
+                self._executor.submit(self._publish, docname)
+
+    def _publish(self, docname):
+        """
+        publish a document (invoked from a worker)
+
+        Args:
+            docname: the document to publish
+        """
+        try:
+            self.publish(docname)
+        except Exception as ex:
+            with self._cond:
+                if not self._error:
+                    self._error = ex
+                self._inflight -= 1
+                self._cond.notify_all()
+            return
+
+        with self._cond:
+            self._completed.append(docname)
+            self._published.add(docname)
+            self._inflight -= 1
+            self._dispatch()
+            self._cond.notify_all()
+
+    def _raise_error(self):
+        """
+        raise the failure of a previously published document (if any)
+
+        This call should be invoked while holding the pipeline's lock.
+        """
+        if self._error:
+            raise self._error
+
+    def _ready(self, docname):
+        """
+        check if a document is ready to be published
+
+        This call should be invoked while holding the pipeline's lock.
+
+        Args:
+            docname: the document to check
+
+        Returns:
+            whether or not the document can be published
+        """
+        if docname == self.root:
+            return True
+
+        if self._blocked_by(self.root):
+            return False
+
+        parent = self.parent(docname)
+        if parent and parent != docname and self._blocked_by(parent):
+            return False
+
+        return True
+
+    def _blocked_by(self, docname):
+        """
+        check if a document's publishing is blocked by another document
+
+        A document blocks other documents until it has been published, unless
+        it is not expected to be published (or, once the pipeline has been
+        joined, it has not been submitted).
+
+        Args:
+            docname: the document which may block publishing
+
+        Returns:
+            whether or not the document blocks publishing
+        """
+        if not docname or docname in self._published:
+            return False
+
+        if docname not in self._expected:
+            return False
+
+        if self._joined and docname not in self._submitted:
+            return False
+
+        return True
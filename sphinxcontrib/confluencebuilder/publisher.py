@@ -19,19 +19,50 @@ from sphinxcontrib.confluencebuilder.exceptions import ConfluencePublishSelfAnce
 from sphinxcontrib.confluencebuilder.exceptions import ConfluenceUnreconciledPageError
 from sphinxcontrib.confluencebuilder.logger import ConfluenceLogger as logger
 from sphinxcontrib.confluencebuilder.rest import Rest
+from sphinxcontrib.confluencebuilder.rest import iterencode_json
+from collections import defaultdict
+from hashlib import sha256
 import json
 import logging
+import threading
 import time
 
 
+# content property key used to track the fingerprint of a published page
+PAGE_FINGERPRINT_KEY = 'scb_fingerprint'
+
+# maximum number of pages to archive in a single (bulk) archive request
+ARCHIVE_BATCH_SIZE = 300
+
+# data expanded on for pages tracked in a prefetched page index
+PAGE_INDEX_EXPAND = [
+    'ancestors',
+    'metadata.labels',
+    'metadata.properties.' + PAGE_FINGERPRINT_KEY,
+    'version',
+]
+
+
 class ConfluencePublisher:
     def __init__(self):
         self.cloud = None
         self.editor = None
+        self.metrics = None
         self.space_display_name = None
+        self.space_homepage_id = None
         self.space_type = None
         self._ancestors_cache = set()
+        self._attachment_cache = {}
+        self._attachment_cache_lock = threading.Lock()
+        self._attachment_locks = {}
         self._name_cache = {}
+        self._page_index = None
+        self._page_index_ids = {}
+        self._page_versions = {}
+        self._page_ancestors = {}
+        self._labels_on_create = None
+        self._watching = {}
+        self._watching_lock = threading.Lock()
 
     def init(self, config, cloud=None):
         self.cloud = cloud
@@ -60,13 +91,14 @@ class ConfluencePublisher:
             rlog.setLevel(logging.DEBUG)
 
     def connect(self):
-        self.rest_client = Rest(self.config)
+        self.rest_client = Rest(self.config, self.metrics)
         server_url = self.config.confluence_server_url
 
         try:
             rsp = self.rest_client.get('space', {
                 'spaceKey': self.space_key,
                 'limit': 1,
+                'expand': 'homepage',
             })
         except ConfluenceBadApiError as e:
             raise ConfluenceBadServerUrlError(server_url, e)
@@ -148,6 +180,10 @@ reported a success (which can be permitted for anonymous users).
         self.space_display_name = result['name']
         self.space_type = result['type']
 
+        homepage = result.get('homepage')
+        if isinstance(homepage, dict) and homepage.get('id'):
+            self.space_homepage_id = str(homepage['id'])
+
     def disconnect(self):
         self.rest_client.close()
 
@@ -159,28 +195,17 @@ reported a success (which can be permitted for anonymous users).
             self._onlynew('page archive restricted', page_id)
             return
 
+        self._invalidate_page_index(page_id=page_id)
+
         try:
             data = {
                 'pages': [{'id': page_id}],
             }
 
             rsp = self.rest_client.post('content/archive', data)
-            longtask_id = rsp['id']
 
             # wait for the archiving of the page to complete
-            MAX_WAIT_FOR_PAGE_ARCHIVE = 4  # ~2 seconds
-            attempt = 1
-            while attempt <= MAX_WAIT_FOR_PAGE_ARCHIVE:
-                time.sleep(0.5)
-
-                rsp = self.rest_client.get(f'longtask/{longtask_id}')
-                if rsp['finished']:
-                    break
-
-                attempt += 1
-                if attempt > MAX_WAIT_FOR_PAGE_ARCHIVE:
-                    raise ConfluenceBadApiError(
-                        -1, 'timeout waiting for archive completion')
+            self._wait_for_archive(rsp['id'], 4)  # ~2 seconds
         except ConfluencePermissionError:
             raise ConfluencePermissionError(
                 """Publish user does not have permission to archive """
@@ -188,6 +213,8 @@ reported a success (which can be permitted for anonymous users).
             )
 
     def archive_pages(self, page_ids):
+        page_ids = list(page_ids)
+
         if self.dryrun:
             self._dryrun('archiving pages', ', '.join(page_ids))
             return
@@ -196,17 +223,25 @@ reported a success (which can be permitted for anonymous users).
             return
 
         try:
-            data = {
-                'pages': [],
-            }
+            for offset in range(0, len(page_ids), ARCHIVE_BATCH_SIZE):
+                batch = page_ids[offset:offset + ARCHIVE_BATCH_SIZE]
 
-            for page_id in page_ids:
-                data['pages'].append({'id': page_id})
+                data = {
+                    'pages': [],
+                }
 
-            # Note, multi-page archive can result in Confluence reporting the
-            # following message:
-            #  Cannot use bulk archive feature for non premium edition
-            self.rest_client.post('content/archive', data)
+                for page_id in batch:
+                    data['pages'].append({'id': page_id})
+                    self._invalidate_page_index(page_id=page_id)
+
+                # Note, multi-page archive can result in Confluence reporting
+                # the following message:
+                #  Cannot use bulk archive feature for non premium edition
+                rsp = self.rest_client.post('content/archive', data)
+
+                # wait for the archiving of all pages to complete (allowing
+                # more time for larger sets of pages)
+                self._wait_for_archive(rsp.get('id'), 4 + len(batch))
 
         except ConfluencePermissionError:
             raise ConfluencePermissionError(
@@ -219,7 +254,9 @@ reported a success (which can be permitted for anonymous users).
         generate a list of ancestors
 
         Queries the configured Confluence instance for a set of ancestors for
-        the provided `page_id`.
+        the provided `page_id`. If the ancestors of the page are already known
+        (e.g. the page was looked up or stored by this publisher), no request
+        will be made.
 
         Args:
             page_id: the ancestor to search on
@@ -229,6 +266,11 @@ reported a success (which can be permitted for anonymous users).
         """
 
         assert page_id
+
+        ancestors = self._page_ancestors.get(str(page_id))
+        if ancestors is not None:
+            return set(ancestors)
+
         ancestors = set()
 
         _, page = self.get_page_by_id(page_id, 'ancestors')
@@ -237,6 +279,8 @@ reported a success (which can be permitted for anonymous users).
             for ancestor in page['ancestors']:
                 ancestors.add(ancestor['id'])
 
+        self._page_ancestors[str(page_id)] = set(ancestors)
+
         return ancestors
 
     def get_base_page_id(self):
@@ -246,12 +290,14 @@ reported a success (which can be permitted for anonymous users).
             return base_page_id
 
         if isinstance(self.parent_ref, int):
-            base_page_id, page = self.get_page_by_id(self.parent_ref)
+            base_page_id, page = self.get_page_by_id(self.parent_ref,
+                expand='version,ancestors')
 
             if not page:
                 raise ConfluenceConfigurationError(
                     '''Configured parent page identifier does not exist.''')
 
+            self._track_ancestors(base_page_id, page=page)
             return base_page_id
 
         rsp = self.rest_client.get('content', {
@@ -259,6 +305,7 @@ reported a success (which can be permitted for anonymous users).
             'spaceKey': self.space_key,
             'title': self.parent_ref,
             'status': 'current',
+            'expand': 'ancestors',
         })
         if rsp['size'] == 0:
             raise ConfluenceConfigurationError(
@@ -269,6 +316,7 @@ reported a success (which can be permitted for anonymous users).
                 """page ID and name do not match.""")
         base_page_id = page['id']
         self._name_cache[base_page_id] = self.parent_ref
+        self._track_ancestors(base_page_id, page=page)
 
         if not base_page_id and self.parent_id:
             raise ConfluenceConfigurationError("""Unable to find the """
@@ -311,6 +359,15 @@ reported a success (which can be permitted for anonymous users).
             populating known descendants. However, this call significantly
             increases the amount of API calls performed.
 
+        - `sweep`
+            Descendants will be queried for by fetching all pages in the
+            configured space (along with their ancestors) and building the
+            page tree locally. The resulting descendants are cross-checked
+            against the results of a `search` query, where any pages which do
+            not match will have their descendants searched on again (in the
+            same manner as an aggressive search). This provides a consistency
+            similar to an aggressive search, with a fraction of API calls.
+
         Args:
             page_id: the ancestor to search on (if not `None`)
             mode: the mode to search for descendants
@@ -319,7 +376,9 @@ reported a success (which can be permitted for anonymous users).
             the descendants
         """
 
-        if 'aggressive' in mode:
+        if mode == 'sweep':
+            descendants = self._get_descendants_sweep(page_id)
+        elif 'aggressive' in mode:
             descendants = self._get_descendants_aggressive(page_id, mode)
         else:
             descendants = self._get_descendants(page_id, mode)
@@ -409,6 +468,87 @@ reported a success (which can be permitted for anonymous users).
         find_legacy_pages(page_id, visited_pages)
         return visited_pages
 
+    def _get_descendants_sweep(self, page_id):
+        """
+        generate a list of descendants (sweep)
+
+        Queries the configured Confluence instance for a set of descendants for
+        the provided `page_id` or (if set to `None`) the configured space. All
+        pages in the space are fetched with their ancestors, which are used to
+        build a page tree. The descendants found in the tree are compared with
+        the descendants reported by a CQL search. For any page reported by only
+        one of these sources, another search will be performed for descendants
+        of the page (to handle cases where a Confluence instance does not
+        provide a complete set of descendants).
+
+        Args:
+            page_id: the ancestor to search on (if not `None`)
+
+        Returns:
+            the descendants
+        """
+        api_endpoint = 'content/search'
+        children = defaultdict(set)
+        pages = set()
+
+        search_fields = {
+            'cql': f'space="{self.space_key}" and type=page',
+            'expand': 'ancestors',
+            # Configure a larger limit value than the default (no provided
+            # limit defaults to 25). This should reduce the number of queries
+            # needed to fetch all pages in a space.
+            'limit': 1000,
+        }
+
+        rsp = self.rest_client.get(api_endpoint, search_fields)
+        idx = 0
+        while rsp['size'] > 0:
+            for result in rsp['results']:
+                pages.add(result['id'])
+                self._name_cache[result['id']] = result['title']
+
+                # track this page as a child of each ancestor; if an ancestor
+                # chain is incomplete, the page will still be tracked as a
+                # child of its direct parent
+                for ancestor in result.get('ancestors', []):
+                    children[ancestor['id']].add(result['id'])
+
+            if rsp['size'] != rsp['limit']:
+                break
+
+            idx += int(rsp['limit'])
+            sub_search_fields = dict(search_fields)
+            sub_search_fields['start'] = idx
+            rsp = self.rest_client.get(api_endpoint, sub_search_fields)
+
+        # no base page; all pages in the space are descendants
+        if not page_id:
+            return pages
+
+        # build the descendants of the page from the tree
+        descendants = set()
+        pending = [str(page_id)]
+        while pending:
+            for child in children.get(pending.pop(), ()):
+                if child not in descendants:
+                    descendants.add(child)
+                    pending.append(child)
+
+        # cross-check against the descendants reported by the instance and
+        # re-check any subtrees which do not match
+        searched = self._get_descendants(page_id, 'search')
+        mismatched = descendants.symmetric_difference(searched)
+        descendants.update(searched)
+
+        while mismatched:
+            mismatched_page = mismatched.pop()
+            for descendant in self._get_descendants(mismatched_page, 'search'):
+                if descendant not in descendants:
+                    descendants.add(descendant)
+                    mismatched.add(descendant)
+
+        return descendants
+
     def get_attachment(self, page_id, name):
         """
         get attachment information with the provided page id and name
@@ -455,28 +595,8 @@ reported a success (which can be permitted for anonymous users).
         """
         attachment_info = {}
 
-        url = f'content/{page_id}/child/attachment'
-        search_fields = {}
-
-        # Configure a larger limit value than the default (no provided
-        # limit defaults to 25). This should reduce the number of queries
-        # needed to fetch a complete attachment set (for larger sets).
-        search_fields['limit'] = 1000
-
-        rsp = self.rest_client.get(url, search_fields)
-        idx = 0
-        while rsp['size'] > 0:
-            for result in rsp['results']:
-                attachment_info[result['id']] = result['title']
-                self._name_cache[result['id']] = result['title']
-
-            if rsp['size'] != rsp['limit']:
-                break
-
-            idx += int(rsp['limit'])
-            sub_search_fields = dict(search_fields)
-            sub_search_fields['start'] = idx
-            rsp = self.rest_client.get(url, sub_search_fields)
+        for attachment in self._get_page_attachments(page_id).values():
+            attachment_info[attachment['id']] = attachment['title']
 
         return attachment_info
 
@@ -500,6 +620,27 @@ reported a success (which can be permitted for anonymous users).
         page = None
         page_id = None
 
+        # if the space's pages have been prefetched, use the page index instead
+        # of querying the instance
+        expanded = all(e in PAGE_INDEX_EXPAND for e in expand.split(','))
+        if self._page_index is not None and status == 'current' and expanded:
+            key = page_name.lower()
+
+            # pages not tracked in the index do not exist
+            if key not in self._page_index:
+                return page_id, page
+
+            # an index entry without page information has been modified since
+            # the index was built; fallback to querying the instance
+            indexed_page = self._page_index[key]
+            if indexed_page:
+                if indexed_page['title'] == page_name:
+                    page = indexed_page
+                    page_id = page['id']
+                    self._name_cache[page_id] = page_name
+
+                return page_id, page
+
         rsp = self.rest_client.get('content', {
             'type': 'page',
             'spaceKey': self.space_key,
@@ -543,6 +684,48 @@ reported a success (which can be permitted for anonymous users).
 
         return page_id, page
 
+    def get_page_version(self, page_id):
+        """
+        get the last known version of a page stored by this publisher
+
+        Args:
+            page_id: the page identifier
+
+        Returns:
+            the page version; ``None`` if the page was not stored
+        """
+        return self._page_versions.get(page_id)
+
+    def check_page_version(self, page_id, version):
+        """
+        check if a page matches a known version using a prefetched page index
+
+        Checks if the page with the provided identifier is a current page in
+        the configured space with the provided version, based on the pages
+        prefetched from the space (see ``prefetch_pages``).
+
+        Args:
+            page_id: the page identifier
+            version: the expected version of the page
+
+        Returns:
+            whether or not the page matches; ``None`` if unknown (no prefetched
+            page index or the page has been modified since it was prefetched)
+        """
+        if self._page_index is None:
+            return None
+
+        key = self._page_index_ids.get(str(page_id))
+        if key is None:
+            return False
+
+        page = self._page_index.get(key)
+        if not page:
+            return None
+
+        indexed_version = page.get('version', {}).get('number')
+        return str(indexed_version) == str(version)
+
     def get_page_case_insensitive(self, page_name):
         """
         get page information with the provided page name (case-insensitive)
@@ -564,6 +747,14 @@ reported a success (which can be permitted for anonymous users).
         page_id = None
 
         page_name = page_name.lower()
+
+        # if the space's pages have been prefetched, use the page index instead
+        # of querying the instance
+        if self._page_index is not None and page_name in self._page_index:
+            page = self._page_index[page_name]
+            if page:
+                return self.get_page(page['title'])
+
         search_fields = {'cql': 'space="' + self.space_key +
             '" and type=page and title~"' + page_name + '"'}
         search_fields['limit'] = 1000
@@ -587,6 +778,49 @@ reported a success (which can be permitted for anonymous users).
 
         return page_id, page
 
+    def prefetch_pages(self):
+        """
+        prefetch information for all pages in the configured space
+
+        Performs a series of API calls to acquire known information about all
+        pages in the configured space. The results are tracked in a page index,
+        which will be used for page lookups (e.g. ``get_page``) instead of
+        performing a request for each individual page. Pages which are later
+        created, updated or removed by this publisher will no longer be served
+        from the index.
+        """
+        api_endpoint = 'content/search'
+        page_index = {}
+        self._page_index_ids = {}
+
+        search_fields = {
+            'cql': f'space="{self.space_key}" and type=page',
+            'expand': ','.join(PAGE_INDEX_EXPAND),
+            # Configure a larger limit value than the default (no provided
+            # limit defaults to 25). This should reduce the number of queries
+            # needed to build the page index.
+            'limit': 1000,
+        }
+
+        rsp = self.rest_client.get(api_endpoint, search_fields)
+        idx = 0
+        while rsp['size'] > 0:
+            for result in rsp['results']:
+                key = result['title'].lower()
+                page_index[key] = result
+                self._page_index_ids[result['id']] = key
+
+            if rsp['size'] != rsp['limit']:
+                break
+
+            idx += int(rsp['limit'])
+            sub_search_fields = dict(search_fields)
+            sub_search_fields['start'] = idx
+            rsp = self.rest_client.get(api_endpoint, sub_search_fields)
+
+        logger.verbose('prefetched %d pages' % len(page_index))
+        self._page_index = page_index
+
     def store_attachment(self, page_id, name, data, mimetype, hash_, force=False):
         """
         request to store an attachment on a provided page
@@ -600,7 +834,7 @@ reported a success (which can be permitted for anonymous users).
         Args:
             page_id: the identifier of the page to attach to
             name: the attachment name
-            data: the attachment data
+            data: the attachment data (bytes or a binary file object)
             mimetype: the mime type of this attachment
             hash_: the hash of the attachment
             force (optional): force publishing if exists (defaults to False)
@@ -614,7 +848,7 @@ reported a success (which can be permitted for anonymous users).
         if self.dryrun:
             attachment = None
         else:
-            _, attachment = self.get_attachment(page_id, name)
+            attachment = self._get_page_attachments(page_id).get(name)
 
         # check if attachment (of same hash) is already published to this page
         comment = None
@@ -666,6 +900,7 @@ reported a success (which can be permitted for anonymous users).
                 try:
                     rsp = self.rest_client.post(url, None, files=data)
                     uploaded_attachment_id = rsp['results'][0]['id']
+                    self._cache_attachment(page_id, rsp['results'][0])
                 except ConfluenceBadApiError as ex:
                     # file type restricted? generate a warning
                     #
@@ -711,10 +946,10 @@ reported a success (which can be permitted for anonymous users).
                     page_id, attachment['id'])
                 rsp = self.rest_client.post(url, None, files=data)
                 uploaded_attachment_id = rsp['id']
+                self._cache_attachment(page_id, rsp)
 
             if not self.watch:
-                self.rest_client.delete('user/watch/content',
-                    uploaded_attachment_id)
+                self._unwatch(uploaded_attachment_id, 'attachment')
         except ConfluencePermissionError:
             raise ConfluencePermissionError(
                 """Publish user does not have permission to add an """
@@ -741,7 +976,7 @@ reported a success (which can be permitted for anonymous users).
         uploaded_page_id = None
 
         if self.config.confluence_adv_trace_data:
-            logger.trace('data', data['content'])
+            logger.trace('data', str(data['content']))
 
         if self.dryrun:
             _, page = self.get_page(page_name, 'version,ancestors')
@@ -762,7 +997,7 @@ reported a success (which can be permitted for anonymous users).
                 self._dryrun('updating existing page', page['id'], misc)
                 return page['id']
 
-        expand = 'version'
+        expand = 'ancestors,version,metadata.properties.' + PAGE_FINGERPRINT_KEY
         if self.append_labels:
             expand += ',metadata.labels'
 
@@ -791,8 +1026,21 @@ reported a success (which can be permitted for anonymous users).
                 if parent_id:
                     new_page['ancestors'] = [{'id': parent_id}]
 
+                self._populate_fingerprint(new_page)
+                self._invalidate_page_index(page_name=page_name)
+
+                # if we have labels and this is a non-cloud instance, initial
+                # labels may need to be applied in their own request; request
+                # the labels of the created page to check if the instance has
+                # already applied them (avoiding the additional request)
+                labels = new_page['metadata']['labels']
+                url = 'content'
+                if not self.cloud and labels and \
+                        self._labels_on_create is not False:
+                    url += '?expand=metadata.labels'
+
                 try:
-                    rsp = self.rest_client.post('content', new_page)
+                    rsp = self.rest_client.post(url, new_page)
 
                     if 'id' not in rsp:
                         api_err = ('Confluence reports a successful page ' +
@@ -806,13 +1054,22 @@ reported a success (which can be permitted for anonymous users).
                         raise ConfluenceBadApiError(-1, api_err)
 
                     uploaded_page_id = rsp['id']
+                    self._name_cache[uploaded_page_id] = page_name
+                    self._page_versions[uploaded_page_id] = \
+                        rsp.get('version', {}).get('number', 1)
+
+                    # a new page will have no attachments
+                    with self._attachment_cache_lock:
+                        self._attachment_cache[uploaded_page_id] = {}
 
-                    # if we have labels and this is a non-cloud instance,
-                    # initial labels need to be applied in their own request
-                    labels = new_page['metadata']['labels']
                     if not self.cloud and labels:
-                        url = f'content/{uploaded_page_id}/label'
-                        self.rest_client.post(url, labels)
+                        applied = self._labels_applied(rsp, labels)
+                        if self._labels_on_create is None:
+                            self._labels_on_create = applied
+
+                        if not applied:
+                            url = f'content/{uploaded_page_id}/label'
+                            self.rest_client.post(url, labels)
 
                 except ConfluenceBadApiError as ex:
                     # Check if Confluence reports that the new page request
@@ -837,17 +1094,26 @@ reported a success (which can be permitted for anonymous users).
 
             # update existing page
             if page:
-                self._update_page(page, page_name, data, parent_id=parent_id)
+                updated = self._update_page(
+                    page, page_name, data, parent_id=parent_id)
                 uploaded_page_id = page['id']
 
+                # if the existing page already matches the page to publish,
+                # there is no new content to watch (or not watch)
+                if not updated:
+                    self._track_ancestors(uploaded_page_id, parent_id, page)
+                    return uploaded_page_id
+
         except ConfluencePermissionError:
             raise ConfluencePermissionError(
                 """Publish user does not have permission to add page """
                 """content to the configured space."""
             )
 
+        self._track_ancestors(uploaded_page_id, parent_id, page)
+
         if not self.watch:
-            self.rest_client.delete('user/watch/content', uploaded_page_id)
+            self._unwatch(uploaded_page_id, 'page')
 
         return uploaded_page_id
 
@@ -879,7 +1145,7 @@ reported a success (which can be permitted for anonymous users).
                 self._dryrun('updating existing page', page_id)
                 return page_id
 
-        expand = 'version'
+        expand = 'ancestors,version,metadata.properties.' + PAGE_FINGERPRINT_KEY
         if self.append_labels:
             expand += ',metadata.labels'
 
@@ -890,16 +1156,21 @@ reported a success (which can be permitted for anonymous users).
                 raise
             raise ConfluenceMissingPageIdError(self.space_key, page_id)
 
+        self._track_ancestors(page_id, page=page)
+
         try:
-            self._update_page(page, page_name, data)
+            updated = self._update_page(page, page_name, data)
         except ConfluencePermissionError:
             raise ConfluencePermissionError(
                 """Publish user does not have permission to add page """
                 """content to the configured space."""
             )
 
+        if not updated:
+            return page_id
+
         if not self.watch:
-            self.rest_client.delete('user/watch/content', page_id)
+            self._unwatch(page_id, 'page')
 
         return page_id
 
@@ -920,6 +1191,12 @@ reported a success (which can be permitted for anonymous users).
             self._onlynew('attachment removal restricted', id_)
             return
 
+        with self._attachment_cache_lock:
+            for attachments in self._attachment_cache.values():
+                for name, attachment in list(attachments.items()):
+                    if attachment['id'] == id_:
+                        del attachments[name]
+
         try:
             self.rest_client.delete('content', id_)
         except ConfluencePermissionError:
@@ -936,6 +1213,8 @@ reported a success (which can be permitted for anonymous users).
             self._onlynew('page removal restricted', page_id)
             return
 
+        self._invalidate_page_index(page_id=page_id)
+
         try:
             try:
                 self.rest_client.delete('content', page_id)
@@ -991,7 +1270,27 @@ reported a success (which can be permitted for anonymous users).
             self._onlynew('space home updates restricted')
             return
 
-        page = self.rest_client.get('content/' + page_id, None)
+        # the configured space's homepage is already this page
+        if str(page_id) == self.space_homepage_id:
+            return
+
+        # use a reference to the page if it has been stored by this publisher;
+        # otherwise, query the page from the instance
+        page_id = str(page_id)
+        version = self._page_versions.get(page_id)
+        if version and page_id in self._name_cache:
+            page = {
+                'id': page_id,
+                'status': 'current',
+                'title': self._name_cache[page_id],
+                'type': 'page',
+                'version': {
+                    'number': version,
+                },
+            }
+        else:
+            page = self.rest_client.get('content/' + page_id, None)
+
         try:
             self.rest_client.put('space', self.space_key, {
                 'key': self.space_key,
@@ -1005,6 +1304,8 @@ reported a success (which can be permitted for anonymous users).
                 """space's homepage."""
             )
 
+        self.space_homepage_id = page_id
+
     def _build_page(self, page_name, data):
         """
         build a page entity used for a new or updated page event
@@ -1064,13 +1365,18 @@ reported a success (which can be permitted for anonymous users).
 
         This call is invoked when the updated page data is ready to be published
         to a Confluence instance (i.e. pre-checks like "dry-run" mode have been
-        completed).
+        completed). If the fingerprint tracked on the existing page matches the
+        fingerprint of the page update (and the page has not been modified
+        since it was last published), no update request will be made.
 
         Args:
             page: the page data from confluence to update
             page_name: the page title to use on the update page
             data: the new page data to apply
             parent_id (optional): the id of the ancestor to use
+
+        Returns:
+            whether or not the page was updated
         """
         last_version = int(page['version']['number'])
 
@@ -1104,6 +1410,23 @@ reported a success (which can be permitted for anonymous users).
         elif parent_id is not None:
             update_page['ancestors'] = [{'id': '1'}]
 
+        # check if the page (of same fingerprint) is already published
+        tracked = page.get('metadata', {}).get('properties', {}).get(
+            PAGE_FINGERPRINT_KEY, {}).get('value')
+        if isinstance(tracked, dict):
+            fingerprint = self._fingerprint(update_page)
+            if tracked.get('hash') == fingerprint and \
+                    str(tracked.get('version')) == str(last_version):
+                logger.verbose('page ({}) is already '
+                    'published with same fingerprint'.format(page_name))
+                self._page_versions[page['id']] = last_version
+                return False
+
+        self._populate_fingerprint(update_page)
+        self._invalidate_page_index(
+            page_name=page.get('title'), page_id=page['id'])
+        self._invalidate_page_index(page_name=page_name)
+
         page_id_explicit = page['id'] + '?status=current'
         try:
             self.rest_client.put('content', page_id_explicit, update_page)
@@ -1147,6 +1470,37 @@ reported a success (which can be permitted for anonymous users).
 
                 raise
 
+        self._name_cache[page['id']] = page_name
+        self._page_versions[page['id']] = last_version + 1
+        return True
+
+    def _wait_for_archive(self, longtask_id, max_attempts):
+        """
+        wait for an archive request to complete
+
+        Polls the long-running task of an archive request until the task
+        reports that it has finished. Polling occurs every half-second.
+
+        Args:
+            longtask_id: the identifier of the archive task
+            max_attempts: the maximum number of polling attempts
+        """
+        if not longtask_id:
+            return
+
+        attempt = 1
+        while attempt <= max_attempts:
+            time.sleep(0.5)
+
+            rsp = self.rest_client.get(f'longtask/{longtask_id}')
+            if rsp['finished']:
+                break
+
+            attempt += 1
+            if attempt > max_attempts:
+                raise ConfluenceBadApiError(
+                    -1, 'timeout waiting for archive completion')
+
     def _dryrun(self, msg, id_=None, misc=''):
         """
         log a dry run mode message
@@ -1170,6 +1524,43 @@ reported a success (which can be permitted for anonymous users).
             s += ' ' + misc
         logger.info(s + min(80, 80 - len(s)) * ' ')  # 80c-min clearing
 
+    def _fingerprint(self, page):
+        """
+        generate a fingerprint for a page entity
+
+        Calculates a hash for the content of a new or updated page entity
+        (i.e. the title, body, labels, ancestors and properties). Version
+        information and any tracked fingerprint property are excluded, which
+        allows comparing the fingerprint of a page to be published against the
+        fingerprint of a page already published.
+
+        Args:
+            page: the page
+
+        Returns:
+            the fingerprint
+        """
+        metadata = page.get('metadata', {})
+
+        properties = dict(metadata.get('properties', {}))
+        properties.pop(PAGE_FINGERPRINT_KEY, None)
+
+        labels = sorted(lbl['name'] for lbl in metadata.get('labels', []))
+
+        fingerprint_data = {
+            'ancestors': page.get('ancestors'),
+            'body': page['body'],
+            'labels': labels,
+            'properties': properties,
+            'title': page['title'],
+        }
+
+        hasher = sha256()
+        encoded = iterencode_json(fingerprint_data, sort_keys=True, default=str)
+        for chunk in encoded:
+            hasher.update(chunk.encode('utf-8'))
+        return hasher.hexdigest()
+
     def _onlynew(self, msg, id_=None):
         """
         log an only-new mode message
@@ -1203,3 +1594,209 @@ reported a success (which can be permitted for anonymous users).
         """
         metadata = page.setdefault('metadata', {})
         metadata['labels'] = [{'name': v} for v in set(labels)]
+
+    def _populate_fingerprint(self, page):
+        """
+        populate a page with fingerprint metadata information
+
+        Accepts a page definition (new or existing page) and populates the
+        metadata portion with a content property tracking the page's
+        fingerprint and the version the page will be published as. On a next
+        publish attempt, these values can be used to determine if a page update
+        is required (see ``_update_page``).
+
+        Args:
+            page: the page
+        """
+        metadata = page.setdefault('metadata', {})
+        properties = metadata.setdefault('properties', {})
+        properties[PAGE_FINGERPRINT_KEY] = {
+            'value': {
+                'hash': self._fingerprint(page),
+                'version': page['version']['number'],
+            },
+        }
+
+    def _cache_attachment(self, page_id, attachment):
+        """
+        track a published attachment in the attachment cache
+
+        Args:
+            page_id: the identifier of the page the attachment is on
+            attachment: the attachment object
+        """
+        if not isinstance(attachment, dict) or 'id' not in attachment:
+            return
+
+        with self._attachment_cache_lock:
+            attachments = self._attachment_cache.get(page_id)
+            if attachments is not None:
+                attachments[attachment['title']] = attachment
+
+    def _get_page_attachments(self, page_id):
+        """
+        get all known attachments for a provided page id (cached)
+
+        Query a specific page identifier for all attachments being held by the
+        page. Attachment information for a page is only requested once, where
+        future calls for the same page will return cached results.
+
+        Args:
+            page_id: the page identifier
+
+        Returns:
+            dictionary of attachment names to their respective objects
+        """
+        # track a lock for each page, allowing attachments for multiple pages
+        # to be fetched at the same time
+        with self._attachment_cache_lock:
+            page_lock = self._attachment_locks.setdefault(
+                page_id, threading.Lock())
+
+        with page_lock:
+            with self._attachment_cache_lock:
+                attachments = self._attachment_cache.get(page_id)
+                if attachments is not None:
+                    return attachments
+
+            attachments = {}
+
+            url = f'content/{page_id}/child/attachment'
+            search_fields = {
+                # include the comment field, which tracks an attachment's hash
+                'expand': 'metadata',
+            }
+
+            # Configure a larger limit value than the default (no provided
+            # limit defaults to 25). This should reduce the number of queries
+            # needed to fetch a complete attachment set (for larger sets).
+            search_fields['limit'] = 1000
+
+            rsp = self.rest_client.get(url, search_fields)
+            idx = 0
+            while rsp['size'] > 0:
+                for result in rsp['results']:
+                    attachments[result['title']] = result
+                    self._name_cache[result['id']] = result['title']
+
+                if rsp['size'] != rsp['limit']:
+                    break
+
+                idx += int(rsp['limit'])
+                sub_search_fields = dict(search_fields)
+                sub_search_fields['start'] = idx
+                rsp = self.rest_client.get(url, sub_search_fields)
+
+            with self._attachment_cache_lock:
+                self._attachment_cache[page_id] = attachments
+
+            return attachments
+
+    def _invalidate_page_index(self, page_name=None, page_id=None):
+        """
+        invalidate page index entries for a modified page
+
+        When a page is created, updated or removed, any information tracked
+        for the page in a prefetched page index is no longer accurate. This
+        call will flag the respective entries in the index so that future
+        lookups will query the Confluence instance instead.
+
+        Args:
+            page_name (optional): the name of the modified page
+            page_id (optional): the identifier of the modified page
+        """
+        if self._page_index is None:
+            return
+
+        if page_name:
+            self._page_index[page_name.lower()] = None
+
+        if page_id:
+            key = self._page_index_ids.get(str(page_id))
+            if key:
+                self._page_index[key] = None
+
+    def _labels_applied(self, page, labels):
+        """
+        check if labels have been applied to a page
+
+        Checks if a page returned by a Confluence instance (with expanded label
+        metadata) includes all of the provided labels.
+
+        Args:
+            page: the page
+            labels: the labels to check
+
+        Returns:
+            whether or not all labels have been applied
+        """
+        applied = page.get('metadata', {}).get('labels', {})
+        if isinstance(applied, dict):
+            applied = applied.get('results', [])
+
+        names = {lbl.get('name') for lbl in applied if isinstance(lbl, dict)}
+        return all(lbl['name'] in names for lbl in labels)
+
+    def _track_ancestors(self, page_id, parent_id=None, page=None):
+        """
+        track the ancestors of a page
+
+        Tracks the known ancestors of a page, which allows ancestor queries
+        (e.g. ``get_ancestors``) to be performed without an additional
+        request. Ancestors are either provided from a page (with expanded
+        ancestors) or, when a page is stored under a parent page, derived from
+        the known ancestors of the parent page.
+
+        Args:
+            page_id: the page identifier
+            parent_id (optional): the id of the ancestor used when storing
+            page (optional): the page data from confluence
+        """
+        page_id = str(page_id)
+        ancestors = None
+
+        if parent_id:
+            parent_ancestors = self._page_ancestors.get(str(parent_id))
+            if parent_ancestors is not None:
+                ancestors = parent_ancestors | {str(parent_id)}
+        elif parent_id is not None or not page:
+            ancestors = set()
+        elif 'ancestors' in page:
+            ancestors = {str(a['id']) for a in page['ancestors']}
+
+        if ancestors is None:
+            self._page_ancestors.pop(page_id, None)
+        else:
+            self._page_ancestors[page_id] = ancestors
+
+    def _unwatch(self, content_id, content_type):
+        """
+        remove the publish user's watch on content
+
+        Confluence may (based on a user's preferences) automatically watch
+        content created or updated by a user. The first time content of a
+        given type is stored, the watch state of the content is checked. If
+        the instance does not watch the content, no watch requests will be
+        made for any other content of this type.
+
+        Args:
+            content_id: the content identifier
+            content_type: the type of content (e.g. page or attachment)
+        """
+        if not content_id:
+            return
+
+        with self._watching_lock:
+            watching = self._watching.get(content_type)
+            if watching is None:
+                url = f'user/watch/content/{content_id}'
+                try:
+                    rsp = self.rest_client.get(url, None)
+                    watching = bool(rsp.get('watching', True))
+                except ConfluenceBadApiError:
+                    watching = True
+
+                self._watching[content_type] = watching
+
+        if watching:
+            self.rest_client.delete('user/watch/content', content_id)
@@ -0,0 +1,152 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright Sphinx Confluence Builder Contributors (AUTHORS)
+
+from hashlib import sha256
+from sphinxcontrib.confluencebuilder.logger import ConfluenceLogger as logger
+import json
+import os
+import subprocess
+import threading
+
+# filename of the render cache (stored in the output directory)
+RENDER_CACHE_FILENAME = '.confluence-render-cache.json'
+
+# version of the render cache format (caches of other versions are discarded)
+RENDER_CACHE_VERSION = 1
+
+
+class ConfluenceRenderCache:
+    """
+    a confluence render cache
+
+    Diagrams (e.g. graphviz) are rendered into images by invoking an external
+    tool. The render cache tracks rendered images by a key generated from the
+    respective source, render options and the version of the tool used to
+    render the image. This allows identical diagrams used over multiple
+    documents to be rendered once, as well as to re-use rendered images between
+    builds (as long as the rendered images still exist).
+
+    Args:
+        path: the path of the render cache
+    """
+    def __init__(self, path):
+        self.entries = {}
+        self.path = path
+        self._lock = threading.Lock()
+        self._versions = {}
+
+    def load(self):
+        """
+        load the render cache
+
+        Loads the cache's entries from its respective path (if any). If the
+        cache does not exist or was generated by another cache version, no
+        entries will be loaded.
+        """
+        self.entries = {}
+
+        try:
+            with open(self.path, encoding='utf-8') as file:
+                data = json.load(file)
+        except (IOError, OSError):
+            return
+        except ValueError:
+            logger.verbose('ignoring invalid render cache')
+            return
+
+        if not isinstance(data, dict) or \
+                data.get('version') != RENDER_CACHE_VERSION:
+            logger.verbose('ignoring render cache (version change)')
+            return
+
+        self.entries = data.get('entries', {})
+
+    def save(self):
+        """
+        save the render cache
+
+        Saves the cache's entries to its respective path. Entries for rendered
+        images which no longer exist are discarded.
+        """
+        entries = {k: v for k, v in self.entries.items() if os.path.isfile(v)}
+
+        data = {
+            'entries': entries,
+            'version': RENDER_CACHE_VERSION,
+        }
+
+        try:
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as file:
+                json.dump(data, file, indent=1, sort_keys=True)
+            os.replace(tmp_path, self.path)
+        except (IOError, OSError) as err:
+            logger.warn(f'error writing render cache {self.path}: {err}')
+
+    def fetch(self, key):
+        """
+        return the rendered image for a key
+
+        Args:
+            key: the render key
+
+        Returns:
+            the path of the rendered image; ``None`` if not rendered
+        """
+        filename = self.entries.get(key)
+        if filename and os.path.isfile(filename):
+            return filename
+
+        return None
+
+    def key(self, *values):
+        """
+        generate a render key for a series of values
+
+        Args:
+            *values: the (json-serializable) values to build a key from
+
+        Returns:
+            the key
+        """
+        raw = json.dumps(values, sort_keys=True, default=str)
+        return sha256(raw.encode('utf-8')).hexdigest()
+
+    def store(self, key, filename):
+        """
+        track a rendered image for a key
+
+        Args:
+            key: the render key
+            filename: the path of the rendered image
+        """
+        with self._lock:
+            self.entries[key] = filename
+
+    def tool_version(self, command):
+        """
+        return the version of a render tool
+
+        Returns the version output of a provided render tool (invoked with a
+        ``-V`` argument). The version of a tool is only queried once for the
+        lifetime of this cache.
+
+        Args:
+            command: the command of the tool
+
+        Returns:
+            the version output; an empty string if unknown
+        """
+        with self._lock:
+            if command not in self._versions:
+                try:
+                    rsp = subprocess.run([command, '-V'], capture_output=True,
+                        stdin=subprocess.DEVNULL, check=False, timeout=30)
+                    version = rsp.stdout + rsp.stderr
+                    version = version.decode('utf-8', errors='replace')
+                except (OSError, subprocess.SubprocessError):
+                    version = ''
+
+                self._versions[command] = version.strip()
+
+            return self._versions[command]
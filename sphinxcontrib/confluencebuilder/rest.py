@@ -1,6 +1,7 @@
 # SPDX-License-Identifier: BSD-2-Clause
 # Copyright Sphinx Confluence Builder Contributors (AUTHORS)
 
+from collections import deque
 from functools import wraps
 from email.utils import mktime_tz
 from email.utils import parsedate_tz
@@ -15,15 +16,26 @@ from sphinxcontrib.confluencebuilder.exceptions import ConfluenceSeraphAuthentic
 from sphinxcontrib.confluencebuilder.exceptions import ConfluenceSslError
 from sphinxcontrib.confluencebuilder.exceptions import ConfluenceTimeoutError
 from sphinxcontrib.confluencebuilder.logger import ConfluenceLogger as logger
+from sphinxcontrib.confluencebuilder.metrics import ConfluenceMetrics
+from sphinxcontrib.confluencebuilder.metrics import rest_operation
 from sphinxcontrib.confluencebuilder.std.confluence import API_REST_BIND_PATH
 from sphinxcontrib.confluencebuilder.std.confluence import NOCHECK
+from sphinxcontrib.confluencebuilder.std.confluence import RSP_HEADER_RATELIMIT_FILLRATE
+from sphinxcontrib.confluencebuilder.std.confluence import RSP_HEADER_RATELIMIT_INTERVAL
+from sphinxcontrib.confluencebuilder.std.confluence import RSP_HEADER_RATELIMIT_NEARLIMIT
 from sphinxcontrib.confluencebuilder.std.confluence import RSP_HEADER_RETRY_AFTER
+from requests.adapters import DEFAULT_POOLSIZE
 from requests.adapters import HTTPAdapter
+from uuid import uuid4
+import io
 import json
 import math
+import os
 import random
 import requests
 import ssl
+import tempfile
+import threading
 import time
 
 
@@ -34,6 +46,409 @@ RATE_LIMITED_MAX_RETRIES = 5
 # delayed
 RATE_LIMITED_MAX_RETRY_DURATION = 30
 
+# the minimum rate (requests per second) requests will be paced to
+RATE_LIMIT_MIN_RATE = 0.5
+
+# the maximum rate (requests per second) requests will be paced to; when an
+# adaptive rate grows past this value, requests will no longer be paced
+RATE_LIMIT_MAX_RATE = 50
+
+# the rate increase (requests per second) applied for each successful request
+RATE_LIMIT_RATE_INCREASE = 0.1
+
+# the factor applied to the request rate when requests are rate-limited
+RATE_LIMIT_RATE_DECREASE = 0.5
+
+# the minimum duration (in seconds) between rate decreases (to prevent a burst
+# of concurrent rate-limited requests from repeatedly reducing the rate)
+RATE_LIMIT_DECREASE_COOLDOWN = 1
+
+# the window (in seconds) of recent requests used to estimate a request rate
+RATE_LIMIT_WINDOW = 5
+
+# the size of each chunk read when streaming multipart data
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# the maximum size of an encoded json body held in memory (larger bodies will
+# be spooled to disk when streaming a request)
+JSON_SPOOL_SIZE = 1024 * 1024
+
+
+class RateLimiter:
+    """
+    an adaptive request rate limiter
+
+    Provides a means to pace requests to a rate a Confluence instance can
+    sustain. By default, requests are not paced. When a Confluence instance
+    reports that requests are being rate-limited (or near a rate limit), a
+    request rate is determined (either from rate-limiting information reported
+    by the instance or from the rate of recent requests) and future requests
+    will be paced to this rate. The rate is adjusted using an
+    additive-increase/multiplicative-decrease approach -- each successful
+    request slowly increases the rate, while each rate-limited request
+    reduces the rate. If the rate grows large enough, requests will no longer
+    be paced. This class is thread-safe.
+    """
+    def __init__(self):
+        self.rate = None
+        self._history = deque()
+        self._last_decrease = 0
+        self._lock = threading.Lock()
+        self._next_slot = 0
+
+    def acquire(self):
+        """
+        acquire a slot to perform a request
+
+        Reserves the next available slot to perform a request (based on the
+        current request rate) and returns how long a caller should wait before
+        performing the request.
+
+        Returns:
+            the delay (in seconds) to wait before performing a request
+        """
+        with self._lock:
+            now = time.time()
+
+            self._history.append(now)
+            while self._history[0] < now - RATE_LIMIT_WINDOW:
+                self._history.popleft()
+
+            if not self.rate:
+                return 0
+
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + 1 / self.rate
+            return slot - now
+
+    def limited(self):
+        """
+        flag that a request has been rate-limited
+
+        Reduces the rate requests are paced to. If requests have not been paced
+        yet, the rate of recent requests is used as a starting point.
+        """
+        with self._lock:
+            now = time.time()
+            if now - self._last_decrease < RATE_LIMIT_DECREASE_COOLDOWN:
+                return
+
+            rate = self.rate
+            if not rate:
+                rate = len(self._history) / RATE_LIMIT_WINDOW
+
+            self._last_decrease = now
+            self._update_rate(rate * RATE_LIMIT_RATE_DECREASE)
+
+    def observe(self, headers):
+        """
+        observe rate-limiting headers reported by a response
+
+        Confluence Cloud may report rate-limiting details on responses (e.g. a
+        fill rate of its token bucket or whether a client is near its rate
+        limit). If a response reports that a client is near a rate limit,
+        requests will be paced to the reported fill rate (if available) or
+        reduced in the same manner as a rate-limited request.
+
+        Args:
+            headers: the response headers
+        """
+        near_limit = headers.get(RSP_HEADER_RATELIMIT_NEARLIMIT)
+        if not near_limit or near_limit.lower() != 'true':
+            return
+
+        sustainable_rate = None
+        try:
+            fill_rate = float(headers.get(RSP_HEADER_RATELIMIT_FILLRATE))
+            interval = float(headers.get(RSP_HEADER_RATELIMIT_INTERVAL))
+            if fill_rate > 0 and interval > 0:
+                sustainable_rate = fill_rate / interval
+        except (TypeError, ValueError):
+            pass
+
+        if not sustainable_rate:
+            self.limited()
+            return
+
+        with self._lock:
+            if not self.rate or self.rate > sustainable_rate:
+                self._update_rate(sustainable_rate)
+
+    def succeeded(self):
+        """
+        flag that a request has succeeded
+
+        Increases the rate requests are paced to (if paced).
+        """
+        with self._lock:
+            if self.rate:
+                rate = self.rate + RATE_LIMIT_RATE_INCREASE
+                if rate >= RATE_LIMIT_MAX_RATE:
+                    logger.verbose('rate-limit pacing disabled')
+                    self.rate = None
+                else:
+                    self.rate = rate
+
+    def _update_rate(self, rate):
+        """
+        update the rate requests are paced to
+
+        This call should be invoked while holding the limiter's lock.
+
+        Args:
+            rate: the new rate (in requests per second)
+        """
+        self.rate = max(rate, RATE_LIMIT_MIN_RATE)
+        logger.verbose('pacing requests to {:.2f} requests per second'.format(
+            self.rate))
+
+
+class MultipartStream:
+    """
+    a streamable multipart/form-data body
+
+    Provides a file-like object which produces a multipart/form-data body for a
+    series of form fields. File fields are read from their respective file
+    objects as the body is being sent, avoiding the need to hold the entire
+    contents of a file (or files) in memory when making a request. File objects
+    are rewound when a stream is created, allowing a new stream to be created
+    for the same fields if a request needs to be retried.
+
+    Fields are provided as a dictionary of field names to values. A value can
+    either be a string (a simple form field) or a tuple of a filename, data
+    (bytes or a binary file object) and a content type (a file field).
+
+    Args:
+        fields: the fields to encode
+    """
+    def __init__(self, fields):
+        self.boundary = uuid4().hex
+        self.content_type = 'multipart/form-data; boundary=' + self.boundary
+        self._parts = []
+        self._size = 0
+
+        for name, value in fields.items():
+            disposition = 'form-data; name="{}"'.format(self._quote(name))
+
+            if isinstance(value, tuple):
+                filename, data, mimetype = value
+                disposition += '; filename="{}"'.format(self._quote(filename))
+                header = 'Content-Disposition: {}\r\nContent-Type: {}'.format(
+                    disposition, mimetype)
+
+                if isinstance(data, bytes):
+                    data = io.BytesIO(data)
+            else:
+                header = f'Content-Disposition: {disposition}'
+                data = io.BytesIO(str(value).encode('utf-8'))
+
+            self._add(f'--{self.boundary}\r\n{header}\r\n\r\n'.encode())
+
+            data.seek(0, io.SEEK_END)
+            size = data.tell()
+            data.seek(0)
+            self._parts.append(data)
+            self._size += size
+
+            self._add(b'\r\n')
+
+        self._add(f'--{self.boundary}--\r\n'.encode())
+
+    def __iter__(self):
+        while True:
+            chunk = self.read(STREAM_CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+
+    def __len__(self):
+        return self._size
+
+    def read(self, size=-1):
+        """
+        read data from the stream
+
+        Args:
+            size (optional): the maximum amount of data to read
+
+        Returns:
+            the data read; an empty value when the stream has been consumed
+        """
+        data = b''
+
+        while self._parts and (size < 0 or len(data) < size):
+            part = self._parts[0]
+            chunk = part.read(size - len(data) if size >= 0 else -1)
+            if not chunk:
+                self._parts.pop(0)
+                continue
+
+            data += chunk
+
+        return data
+
+    def _add(self, data):
+        self._parts.append(io.BytesIO(data))
+        self._size += len(data)
+
+    @staticmethod
+    def _quote(value):
+        return value.replace('\\', '\\\\').replace('"', '%22')
+
+
+class FileContent:
+    """
+    a text value provided by a file
+
+    Provides a (string) value whose content is read from a file when needed,
+    such as the storage-format content of a document when publishing a page.
+    When encoded into JSON (see ``iterencode_json``), the file is read and
+    escaped in chunks, avoiding the need to hold the entire value in memory.
+
+    Args:
+        path: the path of the file
+
+    Raises:
+        OSError: if the file cannot be accessed
+    """
+    def __init__(self, path):
+        self.path = path
+        self.size = os.path.getsize(path)
+
+    def __str__(self):
+        # (reads the entire value; only used for debugging/tracing)
+        with open(self.path, encoding='utf-8') as file:
+            return file.read()
+
+    def chunks(self):
+        """
+        read the value in chunks
+
+        Yields:
+            each chunk of the value
+        """
+        with open(self.path, encoding='utf-8') as file:
+            while True:
+                chunk = file.read(STREAM_CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+
+
+def iterencode_json(data, **kwargs):
+    """
+    encode data into json chunks
+
+    Encodes the provided data into a series of JSON-encoded chunks (see
+    ``json.JSONEncoder.iterencode``). Any ``FileContent`` values are read and
+    escaped in chunks as they are encoded, instead of loading their entire
+    content into memory. The encoded data is identical to encoding the data
+    with each ``FileContent`` value replaced by its content.
+
+    Args:
+        data: the data to encode
+        **kwargs: options for the json encoder
+
+    Yields:
+        each encoded chunk
+    """
+    default = kwargs.pop('default', None)
+    files = {}
+
+    # file content values are replaced with a (unique) token which will be
+    # substituted with the file's content when found in the encoded data
+    def encode_default(value):
+        if isinstance(value, FileContent):
+            token = uuid4().hex
+            files[token] = value
+            return token
+
+        if default:
+            return default(value)
+
+        raise TypeError('Object of type {} is not JSON serializable'.format(
+            type(value).__name__))
+
+    encoder = json.JSONEncoder(default=encode_default, **kwargs)
+    if encoder.ensure_ascii:
+        encode_string = json.encoder.encode_basestring_ascii
+    else:
+        encode_string = json.encoder.encode_basestring
+
+    for chunk in encoder.iterencode(data):
+        while files:
+            for token in files:
+                idx = chunk.find(f'"{token}"')
+                if idx != -1:
+                    break
+            else:
+                break
+
+            yield chunk[:idx]
+            yield '"'
+            for part in files.pop(token).chunks():
+                yield encode_string(part)[1:-1]
+            yield '"'
+            chunk = chunk[idx + len(token) + 2:]
+
+        if chunk:
+            yield chunk
+
+
+class JsonStream:
+    """
+    a streamable json body
+
+    Provides a file-like object which produces a JSON-encoded body for provided
+    data. Data is encoded in chunks into a spooled temporary file (held in
+    memory for small bodies and stored on disk for large bodies), avoiding the
+    need to hold an encoded copy of an entire request (e.g. a page update for a
+    large document) in memory when making a request. Any ``FileContent`` values
+    (e.g. the content of a large document) are streamed into the body.
+
+    Args:
+        data: the data to encode
+    """
+    def __init__(self, data):
+        self.content_type = 'application/json'
+        self._file = tempfile.SpooledTemporaryFile(max_size=JSON_SPOOL_SIZE)
+
+        for chunk in iterencode_json(data, allow_nan=False):
+            self._file.write(chunk.encode('utf-8'))
+
+        self._size = self._file.tell()
+        self._file.seek(0)
+
+    def __iter__(self):
+        while True:
+            chunk = self.read(STREAM_CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+
+    def __len__(self):
+        return self._size
+
+    def close(self):
+        """
+        close the stream
+
+        Releases any resources (e.g. spooled data) held by this stream.
+        """
+        self._file.close()
+
+    def read(self, size=-1):
+        """
+        read data from the stream
+
+        Args:
+            size (optional): the maximum amount of data to read
+
+        Returns:
+            the data read; an empty value when the stream has been consumed
+        """
+        return self._file.read(size)
+
 
 class SslAdapter(HTTPAdapter):
     def __init__(self, config, *args, **kwargs):
@@ -76,61 +491,106 @@ def rate_limited_retries():
     a rest rate limited "decorator"
 
     A utility "decorator" to handle rate-limited retries if Confluence reports
-    that API calls should be limited.
+    that API calls should be limited. Rate-limiting state is shared for all
+    requests made on a REST instance; if a request (from any thread) is
+    rate-limited, all requests will wait before attempting to make another
+    request. Rate-limited requests will also reduce the rate future requests
+    are paced to (see ``RateLimiter``).
+
+    Each call is tracked in the instance's metrics, including the number of
+    retries made and the time spent waiting before requests could be made.
     """
     def _decorator(func):
         @wraps(func)
         def _wrapper(self, *args, **kwargs):
+            key = args[0] if args else kwargs.get('key')
+            operation = rest_operation(func.__name__, key)
+            stats = {
+                'backoff': 0,
+                'delay': 0,
+                'retries': 0,
+            }
+
+            start = time.perf_counter()
+            failed = True
+            try:
+                rv = _attempt(self, stats, *args, **kwargs)
+                failed = False
+                return rv
+            finally:
+                self.metrics.call(operation, time.perf_counter() - start,
+                    failed=failed, **stats)
+
+        def _attempt(self, stats, *args, **kwargs):
             # apply any user-set delay on an api request
             if self.config.confluence_publish_delay:
                 delay = self.config.confluence_publish_delay
                 logger.verbose('user-set api delay set; '
                                'waiting {} seconds...'.format(math.ceil(delay)))
                 time.sleep(delay)
+                stats['delay'] += delay
 
             # if confluence asked us to wait so many seconds before a next
             # api request, wait a moment
-            if self.next_delay:
-                delay = self.next_delay
-                logger.verbose('rate-limit header detected; '
-                               'waiting {} seconds...'.format(math.ceil(delay)))
-                time.sleep(delay)
-                self.next_delay = None
-
-            # if we have imposed some rate-limiting requests where confluence
-            # did not provide retry information, slowly decrease our tracked
-            # delay if requests are going through
-            self.last_retry = max(self.last_retry / 2, 1)
+            with self._pacing_lock:
+                if self.next_delay:
+                    delay = self.next_delay
+                    logger.verbose('rate-limit header detected; '
+                                   'waiting {} seconds...'.format(
+                                   math.ceil(delay)))
+                    self._delay_requests(delay)
+                    self.next_delay = None
 
             attempt = 1
             while True:
+                stats['backoff'] += self._wait_for_pacing()
+
                 try:
-                    return func(self, *args, **kwargs)
+                    rv = func(self, *args, **kwargs)
                 except ConfluenceRateLimited as e:
+                    # pace future requests to a slower rate
+                    self.rate_limiter.limited()
+
                     # if max attempts have been reached, stop any more attempts
                     if attempt > RATE_LIMITED_MAX_RETRIES:
                         raise e
 
-                    # determine the amount of delay to wait again -- either from the
-                    # provided delay (if any) or exponential backoff
-                    if self.next_delay:
-                        delay = self.next_delay
-                        self.next_delay = None
-                    else:
-                        delay = 2 * self.last_retry
-
-                    # cap delay to a maximum
-                    delay = min(delay, RATE_LIMITED_MAX_RETRY_DURATION)
-
-                    # add jitter
-                    delay += random.uniform(0.3, 1.3)
-
-                    # wait the calculated delay before retrying again
-                    logger.warn('rate-limit response detected; '
-                                'waiting {} seconds...'.format(math.ceil(delay)))
-                    time.sleep(delay)
-                    self.last_retry = delay
+                    with self._pacing_lock:
+                        # determine the amount of delay to wait again -- either
+                        # from the provided delay (if any) or exponential
+                        # backoff
+                        if self.next_delay:
+                            delay = self.next_delay
+                            self.next_delay = None
+                        else:
+                            delay = 2 * self.last_retry
+
+                        # cap delay to a maximum
+                        delay = min(delay, RATE_LIMITED_MAX_RETRY_DURATION)
+
+                        # add jitter
+                        delay += random.uniform(0.3, 1.3)
+
+                        # hold all requests for the calculated delay before
+                        # retrying again
+                        logger.warn('rate-limit response detected; '
+                                    'waiting {} seconds...'.format(
+                                    math.ceil(delay)))
+                        self._delay_requests(delay)
+                        self.last_retry = delay
+
                     attempt += 1
+                    stats['retries'] += 1
+                    continue
+
+                # if we have imposed some rate-limiting requests where
+                # confluence did not provide retry information, slowly
+                # decrease our tracked delay if requests are going through
+                with self._pacing_lock:
+                    self.last_retry = max(self.last_retry / 2, 1)
+
+                self.rate_limiter.succeeded()
+                return rv
 
         return _wrapper
     return _decorator
@@ -162,16 +622,20 @@ def requests_exception_wrappers():
 class Rest:
     CONFLUENCE_DEFAULT_ENCODING = 'utf-8'
 
-    def __init__(self, config):
+    def __init__(self, config, metrics=None):
         self.bind_path = API_REST_BIND_PATH
         self.config = config
         self.last_retry = 1
+        self.metrics = metrics if metrics else ConfluenceMetrics()
         self.next_delay = None
         self.url = config.confluence_server_url
         self.session = self._setup_session(config)
         self.timeout = config.confluence_timeout
         self.verbosity = config.sphinx_verbosity
+        self._pacing_lock = threading.Lock()
+        self.rate_limiter = RateLimiter()
         self._reported_large_delay = False
+        self._resume_time = 0
 
         if config.confluence_publish_disable_api_prefix:
             self.bind_path = ''
@@ -209,8 +673,25 @@ class Rest:
         else:
             session.verify = True
 
+        # if publishing with multiple workers, ensure the connection pools can
+        # hold a connection for each worker
+        adapter_opts = {}
+        if config.confluence_publish_workers:
+            workers = config.confluence_publish_workers
+            adapter_opts['pool_maxsize'] = max(workers, DEFAULT_POOLSIZE)
+
+        # if the number of connections is limited, requests made when all
+        # connections are in use will wait for an available connection
+        # (instead of opening and discarding additional connections)
+        if config.confluence_publish_connections:
+            adapter_opts['pool_block'] = True
+            adapter_opts['pool_maxsize'] = config.confluence_publish_connections
+
+        if adapter_opts:
+            session.mount('http://', HTTPAdapter(**adapter_opts))
+
         # mount custom ssl adapter to support various secure-session options
-        adapter = SslAdapter(config)
+        adapter = SslAdapter(config, **adapter_opts)
         session.mount('https://', adapter)
 
         if config.confluence_server_auth:
@@ -239,7 +720,7 @@ class Rest:
         rest_url = self.url + self.bind_path + '/' + key
 
         rsp = self.session.get(rest_url, params=params, timeout=self.timeout)
-        self._handle_common_request(rsp)
+        self._handle_common_request(rsp, key)
 
         if not rsp.ok:
             errdata = self._format_error(rsp, key)
@@ -261,15 +742,30 @@ class Rest:
     def post(self, key, data, files=None):
         rest_url = self.url + self.bind_path + '/' + key
 
-        rsp = self.session.post(
-            rest_url, json=data, files=files, timeout=self.timeout)
-        self._handle_common_request(rsp)
+        if files:
+            # stream any multipart content to avoid loading entire files into
+            # memory (i.e. large attachments)
+            body = MultipartStream(files)
+            rsp = self.session.post(rest_url, data=body,
+                headers={'Content-Type': body.content_type},
+                timeout=self.timeout)
+        else:
+            # stream json content to avoid holding an encoded copy of large
+            # requests (i.e. large page content) in memory
+            body = JsonStream(data)
+            try:
+                rsp = self.session.post(rest_url, data=body,
+                    headers={'Content-Type': body.content_type},
+                    timeout=self.timeout)
+            finally:
+                body.close()
+        self._handle_common_request(rsp, key)
 
         if not rsp.ok:
             errdata = self._format_error(rsp, key)
             if self.verbosity > 0:
                 errdata += "\n"
-                errdata += json.dumps(data, indent=2)
+                errdata += json.dumps(data, indent=2, default=str)
             raise ConfluenceBadApiError(rsp.status_code, errdata)
         if not rsp.text:
             raise ConfluenceSeraphAuthenticationFailedUrlError
@@ -288,14 +784,20 @@ class Rest:
     def put(self, key, value, data):
         rest_url = self.url + self.bind_path + '/' + key + '/' + str(value)
 
-        rsp = self.session.put(rest_url, json=data, timeout=self.timeout)
-        self._handle_common_request(rsp)
+        body = JsonStream(data)
+        try:
+            rsp = self.session.put(rest_url, data=body,
+                headers={'Content-Type': body.content_type},
+                timeout=self.timeout)
+        finally:
+            body.close()
+        self._handle_common_request(rsp, key)
 
         if not rsp.ok:
             errdata = self._format_error(rsp, key)
             if self.verbosity > 0:
                 errdata += "\n"
-                errdata += json.dumps(data, indent=2)
+                errdata += json.dumps(data, indent=2, default=str)
             raise ConfluenceBadApiError(rsp.status_code, errdata)
         if not rsp.text:
             raise ConfluenceSeraphAuthenticationFailedUrlError
@@ -315,7 +817,7 @@ class Rest:
         rest_url = self.url + self.bind_path + '/' + key + '/' + str(value)
 
         rsp = self.session.delete(rest_url, timeout=self.timeout)
-        self._handle_common_request(rsp)
+        self._handle_common_request(rsp, key)
 
         if not rsp.ok:
             errdata = self._format_error(rsp, key)
@@ -324,6 +826,46 @@ class Rest:
     def close(self):
         self.session.close()
 
+    def _delay_requests(self, delay):
+        """
+        delay all requests for a given duration
+
+        Flags that no new requests (from any thread) should be made until the
+        provided delay has passed. This call should be invoked while holding
+        the pacing lock.
+
+        Args:
+            delay: the delay (in seconds)
+        """
+        self._resume_time = max(self._resume_time, time.time() + delay)
+
+    def _wait_for_pacing(self):
+        """
+        wait for any delay imposed on requests
+
+        If requests have been delayed (see ``_delay_requests``), this call will
+        block until the delay has passed. Requests will also wait for an
+        available slot if requests are being paced by the rate limiter.
+
+        Returns:
+            the time (in seconds) waited
+        """
+        waited = 0
+
+        with self._pacing_lock:
+            delay = self._resume_time - time.time()
+
+        if delay > 0:
+            time.sleep(delay)
+            waited += delay
+
+        delay = self.rate_limiter.acquire()
+        if delay > 0:
+            time.sleep(delay)
+            waited += delay
+
+        return waited
+
     def _format_error(self, rsp, key):
         err = ""
         err += f"REQ: {rsp.request.method}\n"
@@ -336,7 +878,19 @@ class Rest:
             err += 'DATA: <not-or-invalid-json>'
         return err
 
-    def _handle_common_request(self, rsp):
+    def _handle_common_request(self, rsp, key):
+        # track the request's latency, size and status for this operation
+        try:
+            sent = int(rsp.request.headers.get('Content-Length', 0))
+        except ValueError:
+            sent = 0
+
+        self.metrics.request(rest_operation(rsp.request.method, key),
+            rsp.elapsed.total_seconds(), sent=sent, received=len(rsp.content),
+            status=rsp.status_code)
+
+        # track any rate-limiting hints to pace future requests
+        self.rate_limiter.observe(rsp.headers)
 
         # if confluence or a proxy reports a retry-after delay (to pace us),
         # track it to delay the next request made
@@ -355,7 +909,8 @@ class Rest:
                     delay = target_datetime - time.time()
 
             if delay > 0:
-                self.next_delay = delay
+                with self._pacing_lock:
+                    self.next_delay = delay
 
                 # if this delay is over a minute, provide a notice to a client
                 # that requests are being delayed -- but we'll only notify a
@@ -75,7 +75,8 @@ class SingleConfluenceBuilder(ConfluenceBuilder):
             logger.error('singleconfluence requires title on root_doc')
             return
 
-        with progress_message(C('assembling single confluence document')):
+        with progress_message(C('assembling single confluence document')), \
+                self.metrics.phase('prepare'):
             # assemble toc section/figure numbers
             #
             # Both the environment's `toc_secnumbers` and `toc_fignumbers`
@@ -104,7 +105,8 @@ class SingleConfluenceBuilder(ConfluenceBuilder):
             self._prepare_doctree_writing(self.config.root_doc, doctree)
             self.assets.process_document(doctree, self.config.root_doc)
 
-        with progress_message(C('writing single confluence document')):
+        with progress_message(C('writing single confluence document')), \
+                self.metrics.phase('write'):
             self.write_doc_serialized(self.config.root_doc, doctree)
             self.write_doc(self.config.root_doc, doctree)
 
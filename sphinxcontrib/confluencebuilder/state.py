@@ -6,6 +6,16 @@ from sphinxcontrib.confluencebuilder.exceptions import ConfluenceConfigurationEr
 from sphinxcontrib.confluencebuilder.logger import ConfluenceLogger as logger
 from sphinxcontrib.confluencebuilder.std.confluence import CONFLUENCE_MAX_TITLE_LEN
 
+# names of all state mappings tracked by the confluence state
+STATE_MAPPINGS = [
+    'doc2uploadId',
+    'doc2parentDoc',
+    'doc2title',
+    'doc2ttd',
+    'refid2target',
+    'title2doc',
+]
+
 
 class ConfluenceState:
     """
@@ -169,6 +179,45 @@ class ConfluenceState:
         ConfluenceState.refid2target.clear()
         ConfluenceState.title2doc.clear()
 
+    @staticmethod
+    def snapshot():
+        """
+        return a snapshot of all state information
+
+        Provides a copy of all tracked state information, which can be used to
+        later determine what state has changed (see `changes`).
+        """
+        return {name: dict(getattr(ConfluenceState, name))
+            for name in STATE_MAPPINGS}
+
+    @staticmethod
+    def changes(snapshot):
+        """
+        return state information changed since a provided snapshot
+
+        Provides all state entries which have been added or updated since a
+        snapshot was taken (see `snapshot`). For example, this can be used to
+        capture state changes made in a parallel writing process, to be merged
+        into the main process's state (see `merge`).
+        """
+        changes = {}
+        for name in STATE_MAPPINGS:
+            current = getattr(ConfluenceState, name)
+            previous = snapshot[name]
+            changes[name] = {k: v for k, v in current.items()
+                if k not in previous or previous[k] != v}
+        return changes
+
+    @staticmethod
+    def merge(changes):
+        """
+        merge state information changes into the tracked state
+
+        See `changes` for more information.
+        """
+        for name, entries in changes.items():
+            getattr(ConfluenceState, name).update(entries)
+
     @staticmethod
     def parent_docname(docname):
         """
@@ -471,6 +471,17 @@ else:
 # (see also: https://developer.atlassian.com/cloud/confluence/rate-limiting/)
 RSP_HEADER_RETRY_AFTER = 'Retry-After'
 
+# confluence api rate-limiting headers
+#
+# Confluence Cloud may report rate-limiting information on API responses. This
+# includes the fill rate and interval of the token bucket used to limit
+# requests, as well as a hint when a client is near its rate limit.
+#
+# (see also: https://developer.atlassian.com/cloud/confluence/rate-limiting/)
+RSP_HEADER_RATELIMIT_FILLRATE = 'X-RateLimit-FillRate'
+RSP_HEADER_RATELIMIT_INTERVAL = 'X-RateLimit-Interval-Seconds'
+RSP_HEADER_RATELIMIT_NEARLIMIT = 'X-RateLimit-NearLimit'
+
 # supported image types
 #
 # A list of image types (mostly) supported on a Confluence instance. This
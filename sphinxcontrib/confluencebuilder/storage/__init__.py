@@ -18,20 +18,14 @@ def encode_storage_format(data):
         the encoded text
     """
 
-    STORAGE_FORMAT_REPLACEMENTS = {
-        ('<', '&lt;'),
-        ('>', '&gt;'),
-        ('"', '&quot;'),
-        ("'", '&apos;'),
-    }
-
-    # first pass needs to handle ampersand
-    data = str(data).replace('&', '&amp;')
-
-    for find, encoded in STORAGE_FORMAT_REPLACEMENTS:
-        data = data.replace(find, encoded)
-
-    return data
+    # note: chained replace calls are used over a single-pass approach (e.g.
+    # `str.translate` or a regex) since they are notably faster in CPython;
+    # ampersands need to be encoded first
+    return str(data).replace('&', '&amp;') \
+        .replace('<', '&lt;') \
+        .replace('>', '&gt;') \
+        .replace('"', '&quot;') \
+        .replace("'", '&apos;')
 
 
 def intern_uri_anchor_value(docname, refuri):
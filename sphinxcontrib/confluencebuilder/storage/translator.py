@@ -30,6 +30,7 @@ import sys
 
 
 class ConfluenceStorageFormatTranslator(ConfluenceBaseTranslator):
+    _start_tag_templates = {}
     _tracked_unknown_code_lang = []
 
     """
@@ -59,6 +60,7 @@ class ConfluenceStorageFormatTranslator(ConfluenceBaseTranslator):
         self._list_context = ['']
         self._manpage_url = getattr(config, 'manpages_url', None)
         self._needs_navnode_spacing = False
+        self._open_tags = {}
         self._reference_context = []
         self._thead_context = []
         self.colspecs = []
@@ -1285,8 +1287,11 @@ class ConfluenceStorageFormatTranslator(ConfluenceBaseTranslator):
                 self._reference_context.append(self._end_ac_link_body(node))
 
     def _visit_reference_intern_uri(self, node):
-        docname = posixpath.normpath(
-            self.docparent + path.splitext(node['refuri'].split('#')[0])[0])
+        docname = self.builder.resolve_relative_uri(
+            self.docname, node['refuri'])
+        if not docname:
+            docname = posixpath.normpath(self.docparent +
+                path.splitext(node['refuri'].split('#')[0])[0])
         doctitle = self.state.title(docname)
         if not doctitle:
             self.warn('unable to build link to document due to '
@@ -2986,29 +2991,44 @@ class ConfluenceStorageFormatTranslator(ConfluenceBaseTranslator):
         Returns:
             the content
         """
-        tag = tag.lower()
-        data = [tag]
-
-        attribs = {}
-        for key, value in kwargs.items():
-            attribs[key.lower()] = value
-
-        for key, value in sorted(attribs.items()):
-            data.append(f'{key}="{value}"')
+        # build (or re-use) a template for this tag and set of attributes;
+        # attribute names are normalized (lowercase) and sorted once for each
+        # unique tag/attribute combination
+        template_key = (tag, tuple(kwargs))
+        template = self._start_tag_templates.get(template_key)
+        if template is None:
+            attribs = {}
+            for idx, key in enumerate(kwargs):
+                attribs[key.lower()] = idx
+
+            names = sorted(attribs)
+            fmt = '<' + tag.lower() + ''.join(
+                f' {name}="{{}}"' for name in names)
+            order = tuple(attribs[name] for name in names)
+            template = (tag.lower(), fmt, order)
+            self._start_tag_templates[template_key] = template
+
+        tag, fmt, order = template
+        if order:
+            values = tuple(kwargs.values())
+            data = fmt.format(*[values[idx] for idx in order])
+        else:
+            data = fmt
 
         if suffix is None:
             suffix = ''
 
-        suffix = '>' + suffix
         if empty:
-            suffix = ' /' + suffix
+            return data + ' />' + suffix
+
+        # track the opened tag for this node (to be closed with `_end_tag`)
+        open_tags = self._open_tags.get(id(node))
+        if open_tags is None:
+            self._open_tags[id(node)] = [tag]
         else:
-            try:
-                node.__confluence_tag.append(tag)
-            except AttributeError:
-                node.__confluence_tag = [tag]
+            open_tags.append(tag)
 
-        return '<{}{}'.format(' '.join(data), suffix)
+        return data + '>' + suffix
 
     def _end_tag(self, node, suffix=None):
         """
@@ -3026,11 +3046,14 @@ class ConfluenceStorageFormatTranslator(ConfluenceBaseTranslator):
         Returns:
             the content
         """
-        try:
-            tag = node.__confluence_tag.pop()
-        except IndexError:
+        open_tags = self._open_tags.get(id(node))
+        if not open_tags:
             raise ConfluenceError('end tag invoke without matching start tag')
 
+        tag = open_tags.pop()
+        if not open_tags:
+            del self._open_tags[id(node)]
+
         if suffix is None:
             suffix = self.nl
 
@@ -50,6 +50,10 @@ def confluence_supported_svg(builder, node):
 
     Any SVG files which do not have an XML declaration will have on injected.
 
+    Processed SVGs are tracked in the builder's render cache (by the SVG's
+    path, modification time, size and the requested lengths), allowing an SVG
+    used multiple times (or over multiple builds) to only be processed once.
+
     Args:
         builder: the builder
         node: the image node to check
@@ -71,6 +75,25 @@ def confluence_supported_svg(builder, node):
     if mimetype != 'image/svg+xml':
         return
 
+    try:
+        svg_stat = os.stat(uri_abspath)
+    except (IOError, OSError) as err:
+        builder.warn('error reading svg: %s' % err)
+        return
+
+    # check if this svg has already been processed with the same options
+    cache = builder.render_cache
+    cache_key = cache.key('svg', uri_abspath, svg_stat.st_mtime_ns,
+        svg_stat.st_size, node.get('height'), node.get('width'),
+        node.get('scale'))
+
+    cached_fn = cache.fetch(cache_key)
+    if cached_fn:
+        # the svg itself is tracked when no modifications are needed
+        if cached_fn != uri_abspath:
+            _apply_svg(node, cached_fn)
+        return
+
     try:
         with open(uri_abspath, 'rb') as f:
             svg_data = f.read()
@@ -78,6 +101,7 @@ def confluence_supported_svg(builder, node):
         builder.warn('error reading svg: %s' % err)
         return
 
+    cacheable = True
     modified = False
     svg_root = xml_et.fromstring(svg_data)
 
@@ -172,10 +196,12 @@ def confluence_supported_svg(builder, node):
         height = convert_length(height, hu, pct=False)
         if height is None:
             builder.warn('unsupported svg unit type for confluence: ' + hu)
+            cacheable = False
     if width:
         width = convert_length(width, wu, pct=False)
         if width is None:
             builder.warn('unsupported svg unit type for confluence: ' + wu)
+            cacheable = False
 
     # if we have a height/width to apply, adjust the svg
     if height and width:
@@ -191,6 +217,8 @@ def confluence_supported_svg(builder, node):
 
     # ignore svg file if not modifications are needed
     if not modified:
+        if cacheable:
+            cache.store(cache_key, uri_abspath)
         return
 
     fname = sha256(svg_data).hexdigest() + '.svg'
@@ -209,6 +237,21 @@ def confluence_supported_svg(builder, node):
             builder.warn('error writing svg: %s' % err)
             return
 
+    if cacheable:
+        cache.store(cache_key, outfn)
+
+    _apply_svg(node, outfn)
+
+
+def _apply_svg(node, outfn):
+    """
+    apply a processed svg to an image node
+
+    Args:
+        node: the image node
+        outfn: the processed svg
+    """
+
     # replace the required node attributes
     node['uri'] = outfn
 
@@ -3,7 +3,6 @@
 
 from docutils import nodes
 from docutils.nodes import NodeVisitor as BaseTranslator
-from os import path
 from sphinx.util.images import get_image_size
 from sphinx.util.images import guess_mimetype
 from sphinx.util.osutil import SEP
@@ -15,6 +14,7 @@ from sphinxcontrib.confluencebuilder.svg import confluence_supported_svg
 from sphinxcontrib.confluencebuilder.util import convert_length
 from sphinxcontrib.confluencebuilder.util import extract_length
 from sphinxcontrib.confluencebuilder.util import remove_nonspace_control_chars
+import itertools
 import sys
 
 
@@ -83,53 +83,29 @@ class ConfluenceBaseTranslator(BaseTranslator):
         pass
 
     def depart_document(self, node):
-        self.body_final = ''
+        # track the document's output as a series of chunks (instead of a
+        # single joined string), allowing a writer to stream the output
+        # without needing to build a copy of the entire document
+        header = []
+        footer = []
 
         # prepend header (if any)
-        if self.builder.config.confluence_header_file is not None:
-            header_template_data = ''
-            header_file = path.join(self.builder.env.srcdir,
-                self.builder.config.confluence_header_file)
-            try:
-                with open(header_file, encoding='utf-8') as file:
-                    header_template_data = file.read()
-            except (IOError, OSError) as err:
-                self.warn(f'error reading file {header_file}: {err}')
-
-            # if no data is supplied, the file is plain text
-            if self.builder.config.confluence_header_data is None:
-                header = header_template_data
-            else:
-                header = self.builder.templates.render_string(
-                    header_template_data,
-                    self.builder.config.confluence_header_data)
-
-            self.body_final += header + self.nl
-
-        self.body_final += self.pre_body_data()
-        self.body_final += ''.join(self.body)
-        self.body_final += self.post_body_data()
+        header_data = self.builder.template_data('header')
+        if header_data is not None:
+            header.append(header_data + self.nl)
 
         # append footer (if any)
-        if self.builder.config.confluence_footer_file is not None:
-            footer_template_data = ''
-            footer_file = path.join(self.builder.env.srcdir,
-                self.builder.config.confluence_footer_file)
-            try:
-                with open(footer_file, encoding='utf-8') as file:
-                    footer_template_data = file.read()
-            except (IOError, OSError) as err:
-                self.warn(f'error reading file {footer_file}: {err}')
-
-            # if no data is supplied, the file is plain text
-            if self.builder.config.confluence_footer_data is None:
-                footer = footer_template_data
-            else:
-                footer = self.builder.templates.render_string(
-                    footer_template_data,
-                    self.builder.config.confluence_footer_data)
-
-            self.body_final += footer + self.nl
+        footer_data = self.builder.template_data('footer')
+        if footer_data is not None:
+            footer.append(footer_data + self.nl)
+
+        self.body_final = itertools.chain(
+            header,
+            [self.pre_body_data()],
+            self.body,
+            [self.post_body_data()],
+            footer,
+        )
 
     def pre_body_data(self):
         return ''
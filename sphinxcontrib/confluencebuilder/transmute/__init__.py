@@ -1,9 +1,11 @@
 # SPDX-License-Identifier: BSD-2-Clause
 # Copyright Sphinx Confluence Builder Contributors (AUTHORS)
 
+from concurrent.futures import ThreadPoolExecutor
 from docutils import nodes
 from os import path
 from sphinx.util.math import wrap_displaymath
+from sphinxcontrib.confluencebuilder.analysis import ConfluenceDoctreeAnalysis
 from sphinxcontrib.confluencebuilder.compat import docutils_findall as findall
 from sphinxcontrib.confluencebuilder.logger import ConfluenceLogger
 from sphinxcontrib.confluencebuilder.nodes import confluence_latex_block
@@ -17,6 +19,8 @@ from sphinxcontrib.confluencebuilder.transmute.ext_sphinx_gallery import replace
 from sphinxcontrib.confluencebuilder.transmute.ext_sphinx_toolbox import replace_sphinx_toolbox_nodes
 from sphinxcontrib.confluencebuilder.transmute.ext_sphinxcontrib_mermaid import replace_sphinxcontrib_mermaid_nodes
 import itertools
+import tempfile
+import threading
 
 # load graphviz extension if available to handle node pre-processing
 try:
@@ -40,7 +44,7 @@ if graphviz:
         inheritance_diagram = None
 
 
-def doctree_transmute(builder, doctree):
+def doctree_transmute(builder, doctree, analysis=None):
     """
     replace nodes in a doctree with support node types
 
@@ -48,50 +52,222 @@ def doctree_transmute(builder, doctree):
     from extensions) into alternative node types which can be processed by this
     extension's translator(s).
 
+    If an analysis of the doctree is provided, replacements will only be
+    attempted for node types known to exist in the doctree. The analysis will
+    be updated with any node types injected into the doctree.
+
     Args:
         builder: the builder
         doctree: the doctree to replace blocks on
+        analysis (optional): an analysis of the doctree
     """
 
+    if analysis is None:
+        analysis = ConfluenceDoctreeAnalysis(doctree)
+
     # --------------------------
     # sphinx internal extensions
     # --------------------------
 
-    # replace inheritance diagram with images
-    # (always invoke before _replace_graphviz_nodes)
-    replace_inheritance_diagram(builder, doctree)
+    if graphviz and analysis.contains(graphviz):
+        # replace inheritance diagram with images
+        # (always invoke before _replace_graphviz_nodes)
+        replace_inheritance_diagram(builder, doctree)
+
+        # replace graphviz nodes with images
+        replace_graphviz_nodes(builder, doctree)
 
-    # replace graphviz nodes with images
-    replace_graphviz_nodes(builder, doctree)
+        analysis.track(nodes.image)
 
     # replace math blocks with Confluence LaTeX blocks
-    replace_math_blocks(builder, doctree)
+    if analysis.contains(nodes.math, nodes.math_block):
+        replace_math_blocks(builder, doctree)
+        analysis.track(confluence_latex_block, confluence_latex_inline)
 
     # --------------------------
     # sphinx external extensions
     # --------------------------
 
-    replace_jupyter_sphinx_nodes(builder, doctree)
+    # (only applicable if a doctree contains third-party node types; since the
+    # node types these replacements inject are not known, re-analyze the
+    # doctree afterwards)
+    if analysis.has_extension_nodes():
+        replace_jupyter_sphinx_nodes(builder, doctree)
 
-    replace_nbsphinx_nodes(builder, doctree)
+        replace_nbsphinx_nodes(builder, doctree)
 
-    replace_sphinx_diagrams_nodes(builder, doctree)
+        replace_sphinx_diagrams_nodes(builder, doctree)
 
-    replace_sphinx_gallery_nodes(builder, doctree)
+        replace_sphinx_gallery_nodes(builder, doctree)
 
-    replace_sphinx_toolbox_nodes(builder, doctree)
+        replace_sphinx_toolbox_nodes(builder, doctree)
 
-    replace_sphinxcontrib_mermaid_nodes(builder, doctree)
+        replace_sphinxcontrib_mermaid_nodes(builder, doctree)
+
+        analysis.track(*ConfluenceDoctreeAnalysis(doctree).types)
 
     # -------------------
     # post-transmute work
     # -------------------
 
     # replace Confluence LaTeX blocks with images (if configured/supported)
-    prepare_math_images(builder, doctree)
+    if analysis.contains(confluence_latex_block, confluence_latex_inline):
+        prepare_math_images(builder, doctree)
+        analysis.track(nodes.image)
 
     # re-work svg entries to support confluence
-    prepare_svgs(builder, doctree)
+    if analysis.contains(nodes.image):
+        prepare_svgs(builder, doctree)
+
+
+def doctree_prerender(builder, docnames, workers):
+    """
+    render diagram and math images for a series of documents in parallel
+
+    Diagrams (graphviz and inheritance diagrams) and math blocks are rendered
+    into images when a doctree is transmuted, one node at a time, where each
+    render invokes an external tool (e.g. ``dot`` or ``latex``). This call can
+    be used to render all unique diagrams and math blocks found in a series of
+    documents before any doctree is transmuted, using multiple workers. Since
+    rendered images are tracked in the builder's render cache, the transmute
+    stage will re-use these images instead of rendering them again.
+
+    Any render failures are ignored, where they will be reported when the
+    respective doctree is transmuted.
+
+    Args:
+        builder: the builder
+        docnames: the names of the documents to render images for
+        workers: the number of workers to render with
+    """
+
+    restricted = builder.config.confluence_adv_restricted
+
+    render_graphviz = graphviz and 'ext-graphviz' not in restricted
+    render_inheritance = graphviz and inheritance_diagram and \
+        'ext-inheritance_diagram' not in restricted
+    render_math = imgmath and not builder.config.confluence_latex_macro
+
+    if not render_graphviz and not render_inheritance and not render_math:
+        return
+
+    # gather unique diagram/math sources from all documents
+    dot_jobs = {}
+    math_jobs = set()
+
+    for docname in docnames:
+        doctree = builder.env.get_doctree(docname)
+        analysis = ConfluenceDoctreeAnalysis(doctree)
+
+        if (render_graphviz or render_inheritance) and \
+                analysis.contains(graphviz):
+            for node in findall(doctree, graphviz):
+                if inheritance_diagram and isinstance(
+                        node, inheritance_diagram.inheritance_diagram):
+                    if not render_inheritance:
+                        continue
+
+                    graph_hash = inheritance_diagram.get_graph_hash(node)
+                    name = 'inheritance%s' % graph_hash
+                    dotcode = node['graph'].generate_dot(
+                        name, {}, env=builder.env)
+                    job = (dotcode, {}, 'inheritance')
+                elif render_graphviz:
+                    job = (node['code'], node['options'], 'graphviz')
+                else:
+                    continue
+
+                dot_jobs.setdefault(graph_render_key(builder, *job), job)
+
+        if render_math and 'ext-imgmath' not in restricted and \
+                analysis.contains(nodes.math, nodes.math_block):
+            for node in itertools.chain(findall(doctree, nodes.math),
+                    findall(doctree, nodes.math_block)):
+                if isinstance(node, nodes.math):
+                    math_jobs.add('$' + node.astext() + '$')
+                elif node['nowrap']:
+                    math_jobs.add(node.astext())
+                else:
+                    math_jobs.add(wrap_displaymath(
+                        node.astext(), None, numbering=False))
+
+        if render_math and analysis.contains(
+                confluence_latex_block, confluence_latex_inline):
+            for node in itertools.chain(
+                    findall(doctree, confluence_latex_inline),
+                    findall(doctree, confluence_latex_block)):
+                math_jobs.add(node.astext())
+
+    if not dot_jobs and not math_jobs:
+        return
+
+    # render calls expect a translator to be passed in; mock a translator
+    # tied to our builder
+    class MockTranslator:
+        def __init__(self, builder):
+            self.builder = builder
+
+    # imgmath renders all math into the same temporary directory; provide
+    # each worker a builder-proxy with its own temporary directory
+    class MockMathBuilder:
+        def __init__(self, builder):
+            self._builder = builder
+            self._imgmath_tempdir = tempfile.mkdtemp(
+                dir=getattr(builder, '_imgmath_tempdir', None))
+
+        def __getattr__(self, name):
+            return getattr(self._builder, name)
+
+    mock_translator = MockTranslator(builder)
+    worker_state = threading.local()
+
+    def render_dot_job(job):
+        code, options, prefix = job
+        try:
+            render_graph(builder, mock_translator, code, options, prefix)
+        except GraphvizError:
+            pass
+
+    def render_math_job(latex):
+        if not hasattr(worker_state, 'translator'):
+            worker_state.translator = MockTranslator(MockMathBuilder(builder))
+
+        try:
+            imgmath.render_math(worker_state.translator, latex)
+        except imgmath.MathExtError:
+            pass
+
+    dot_jobs = list(dot_jobs.values())
+    math_jobs = sorted(math_jobs)
+
+    # render the first job of each type in this thread, to ensure any
+    # issues with a tool (e.g. not installed) are only detected once
+    if dot_jobs:
+        render_dot_job(dot_jobs.pop(0))
+        if getattr(builder, '_graphviz_warned_dot', None):
+            dot_jobs = []
+
+    if math_jobs:
+        try:
+            imgmath.render_math(mock_translator, math_jobs.pop(0))
+        except imgmath.MathExtError:
+            pass
+
+        if hasattr(builder, '_imgmath_warned_latex') or \
+                hasattr(builder, '_imgmath_warned_image_translator'):
+            math_jobs = []
+
+    if not dot_jobs and not math_jobs:
+        return
+
+    ConfluenceLogger.verbose('pre-rendering {} diagram(s) and {} math '
+        'block(s)'.format(len(dot_jobs), len(math_jobs)))
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for _ in itertools.chain(
+                executor.map(render_dot_job, dot_jobs),
+                executor.map(render_math_job, math_jobs)):
+            pass
 
 
 def prepare_math_images(builder, doctree):
@@ -181,6 +357,69 @@ def prepare_svgs(builder, doctree):
         confluence_supported_svg(builder, node)
 
 
+def graph_render_key(builder, code, options, prefix):
+    """
+    generate a render key for a graph
+
+    Generates a key for the render cache which identifies the image rendered
+    for a graph. Unlike the names of images generated by ``render_dot``, the
+    key does not include the name of the document a graph was defined in (only
+    its directory, which is used as the working directory when rendering) and
+    includes the version of the ``dot`` tool used to render.
+
+    Args:
+        builder: the builder
+        code: the dot code of the graph
+        options: the graph's options
+        prefix: the prefix of the rendered image
+
+    Returns:
+        the key
+    """
+
+    options = dict(options)
+    docname = options.pop('docname', None)
+    cwd = path.dirname(docname) if docname else None
+
+    dot = options.get('graphviz_dot', builder.config.graphviz_dot)
+    dot_version = builder.render_cache.tool_version(dot)
+
+    return builder.render_cache.key(prefix, code, options, cwd, dot,
+        dot_version, builder.config.graphviz_dot_args,
+        builder.graphviz_output_format)
+
+
+def render_graph(builder, translator, code, options, prefix):
+    """
+    render a graph into an image
+
+    Renders a graph using ``render_dot``, unless the builder's render cache
+    already holds an image for an identical graph.
+
+    Args:
+        builder: the builder
+        translator: the (mocked) translator to render with
+        code: the dot code of the graph
+        options: the graph's options
+        prefix: the prefix of the rendered image
+
+    Returns:
+        the filename of the rendered image; ``None`` if nothing was rendered
+    """
+
+    key = graph_render_key(builder, code, options, prefix)
+    out_filename = builder.render_cache.fetch(key)
+    if out_filename:
+        return out_filename
+
+    _, out_filename = render_dot(translator, code, options,
+        builder.graphviz_output_format, prefix)
+    if out_filename:
+        builder.render_cache.store(key, out_filename)
+
+    return out_filename
+
+
 def replace_graphviz_nodes(builder, doctree):
     """
     replace graphviz nodes with images
@@ -217,8 +456,8 @@ def replace_graphviz_nodes(builder, doctree):
 
     for node in findall(doctree, graphviz):
         try:
-            _, out_filename = render_dot(mock_translator, node['code'],
-                node['options'], builder.graphviz_output_format, 'graphviz')
+            out_filename = render_graph(builder, mock_translator,
+                node['code'], node['options'], 'graphviz')
             if not out_filename:
                 node.parent.remove(node)
                 continue
@@ -278,8 +517,8 @@ def replace_inheritance_diagram(builder, doctree):
         dotcode = graph.generate_dot(name, {}, env=builder.env)
 
         try:
-            _, out_filename = render_dot(mock_translator, dotcode, {},
-                builder.graphviz_output_format, 'inheritance')
+            out_filename = render_graph(builder, mock_translator, dotcode, {},
+                'inheritance')
             if not out_filename:
                 node.parent.remove(node)
                 continue
@@ -15,6 +15,12 @@ import tempfile
 import unicodedata
 
 
+# expression matching non-space control characters (unicode category "Cc")
+NONSPACE_CONTROL_CHARS = re.compile('[{}]'.format(re.escape(''.join(
+    chr(c) for c in range(0xa0)
+    if unicodedata.category(chr(c)) == 'Cc' and not chr(c).isspace()))))
+
+
 class ConfluenceUtil:
     """
     confluence utility helper class
@@ -331,8 +337,7 @@ def remove_nonspace_control_chars(text):
         the sanitized text
     """
 
-    return ''.join(c for c in text if c.isspace()
-        or unicodedata.category(c) != 'Cc')
+    return NONSPACE_CONTROL_CHARS.sub('', text)
 
 
 def str2bool(value):
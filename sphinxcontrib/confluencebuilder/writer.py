@@ -1,6 +1,7 @@
 # SPDX-License-Identifier: BSD-2-Clause
 # Copyright Sphinx Confluence Builder Contributors (AUTHORS)
 
+from docutils import languages
 from docutils import writers
 
 
@@ -19,3 +20,35 @@ class ConfluenceWriter(writers.Writer):
         self.document.walkabout(visitor)
         if hasattr(visitor, 'body_final'):
             self.output = visitor.body_final
+
+    def write(self, document, destination):
+        """
+        translate a document and write the output to a destination
+
+        Unlike docutils' writer implementation, translated output is provided
+        as a series of chunks which are written directly into the provided
+        destination (a text-based file-like object). This avoids building
+        (and encoding) a copy of an entire document's output in memory.
+
+        Args:
+            document: the document to translate
+            destination: the destination to write to
+
+        Returns:
+            whether or not output was written
+        """
+        self.document = document
+        self.language = languages.get_language(
+            document.settings.language_code, document.reporter)
+        self.destination = destination
+        self.output = None
+
+        try:
+            self.translate()
+            if self.output is None:
+                return False
+
+            destination.writelines(self.output)
+            return True
+        finally:
+            self.output = None
@@ -508,7 +508,7 @@ def prepare_dirs(container=None, postfix=None):
 
 @contextmanager
 def prepare_sphinx(src_dir, config=None, out_dir=None, extra_config=None,
-        builder=None, relax=False):
+        builder=None, relax=False, parallel=0):
     """
     prepare a sphinx application instance
 
@@ -523,6 +523,7 @@ def prepare_sphinx(src_dir, config=None, out_dir=None, extra_config=None,
         extra_config (optional): additional configuration data to apply
         builder (optional): the builder to use
         relax (optional): do not generate warnings as errors
+        parallel (optional): number of parallel processes to use
     """
 
     # Enable coloring of warning and other messages. Note that this can
@@ -566,7 +567,8 @@ def prepare_sphinx(src_dir, config=None, out_dir=None, extra_config=None,
             status=sts,              # status output
             warning=sys.stderr,      # warnings output
             warningiserror=warnerr,  # treat warnings as errors
-            verbosity=verbosity)     # verbosity
+            verbosity=verbosity,     # verbosity
+            parallel=parallel)       # parallel processes
 
         yield app
 
@@ -0,0 +1,756 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright Sphinx Confluence Builder Contributors (AUTHORS)
+
+from collections import Counter
+from contextlib import contextmanager
+from sphinxcontrib.confluencebuilder.metrics import rest_operation
+from threading import Lock
+from urllib.parse import parse_qsl
+from urllib.parse import urlencode
+from urllib.parse import urlsplit
+from urllib.request import Request
+from urllib.request import urlopen
+import http.server as http_server
+import json
+import math
+import multiprocessing
+import re
+import time
+
+# api path served by a stand-in instance
+STANDIN_API_PATH = '/rest/api/'
+
+# path used to query a stand-in instance's statistics
+STANDIN_STATS_PATH = '/_standin/stats'
+
+
+class ConfluenceStandInServer(http_server.ThreadingHTTPServer):
+    """
+    confluence stand-in server
+
+    Provides a (stateful) stand-in of a Confluence instance, supporting the
+    subset of REST API calls made when publishing. Unlike a mocked Confluence
+    instance (which replays registered responses), a stand-in tracks pages and
+    attachments published to it. This allows a publisher to be exercised over
+    multiple publish attempts (e.g. for benchmarking). A stand-in can also
+    emulate an instance's latency, rate limiting and an instance which does
+    not support bulk archiving.
+
+    Args:
+        space_key: the key of the (only) space hosted by this instance
+        latency (optional): the latency (in seconds) added to each request
+        rate_limit (optional): the number of requests per second permitted
+                                before requests are rate-limited
+        bulk_archive (optional): whether multiple pages can be archived in a
+                                  single request
+    """
+    def __init__(self, space_key, latency=0, rate_limit=None,
+            bulk_archive=True):
+        LOCAL_RANDOM_PORT = ('127.0.0.1', 0)
+        super().__init__(LOCAL_RANDOM_PORT, ConfluenceStandInRequestHandler)
+
+        self.attachments = {}
+        self.bulk_archive = bulk_archive
+        self.homepage = None
+        self.inflight = 0
+        self.latency = latency
+        self.mtx = Lock()
+        self.pages = {}
+        self.rate_limit = rate_limit
+        self.space_key = space_key
+        self.stats = Counter()
+        self.watches = set()
+        self._last_id = 1000
+        self._last_refill = time.monotonic()
+        self._tokens = rate_limit
+
+    def acquire(self):
+        """
+        acquire permission to serve a request
+
+        If a rate limit is configured, each request consumes a token from a
+        token bucket (refilled at the configured rate). If no tokens are
+        available, the request should be rate-limited.
+
+        This call should be invoked while holding the server's lock.
+
+        Returns:
+            the number of seconds to retry after; zero if permitted
+        """
+        if not self.rate_limit:
+            return 0
+
+        now = time.monotonic()
+        self._tokens = min(self.rate_limit,
+            self._tokens + (now - self._last_refill) * self.rate_limit)
+        self._last_refill = now
+
+        if self._tokens < 1:
+            return max(1, math.ceil((1 - self._tokens) / self.rate_limit))
+
+        self._tokens -= 1
+        return 0
+
+    def ancestors(self, page):
+        """
+        return the ancestors of a page
+
+        Args:
+            page: the page
+
+        Returns:
+            the ancestor identifiers (from the root page)
+        """
+        ancestors = []
+
+        parent_id = page['parent']
+        while parent_id and parent_id in self.pages:
+            ancestors.insert(0, parent_id)
+            parent_id = self.pages[parent_id]['parent']
+
+        return ancestors
+
+    def descendants(self, page_id):
+        """
+        return the (current) descendants of a page
+
+        Args:
+            page_id: the page identifier
+
+        Returns:
+            the descendant pages
+        """
+        return [page for page in self.pages.values()
+            if page['status'] == 'current' and
+                page_id in self.ancestors(page)]
+
+    def next_id(self):
+        """
+        generate a new content identifier
+
+        Returns:
+            the identifier
+        """
+        self._last_id += 1
+        return str(self._last_id)
+
+
+class ConfluenceStandInRequestHandler(http_server.BaseHTTPRequestHandler):
+    """
+    confluence stand-in request handler
+
+    Serves REST API requests made to a stand-in instance. Requests are routed
+    (based on the method and API path) to a handler which operates on the
+    server's state. A handler returns a status code and response data, or
+    raises a ``StandInError`` to report a Confluence-like error.
+    """
+    # avoid delayed responses (headers and bodies are written separately)
+    disable_nagle_algorithm = True
+    protocol_version = 'HTTP/1.1'
+
+    def do_DELETE(self):
+        self._serve('DELETE')
+
+    def do_GET(self):
+        self._serve('GET')
+
+    def do_POST(self):
+        self._serve('POST')
+
+    def do_PUT(self):
+        self._serve('PUT')
+
+    def log_message(self, format, *args):  # noqa: A002
+        pass
+
+    def _serve(self, method):
+        url = urlsplit(self.path)
+        params = dict(parse_qsl(url.query))
+
+        length = int(self.headers.get('Content-Length', 0))
+        body = self.rfile.read(length) if length else b''
+
+        if url.path == STANDIN_STATS_PATH:
+            with self.server.mtx:
+                data = dict(self.server.stats)
+                data['archived'] = sum(1 for page in self.server.pages.values()
+                    if page['status'] == 'archived')
+                data['attachments'] = len(self.server.attachments)
+                data['pages'] = len(self.server.pages)
+            self._respond(200, data)
+            return
+
+        # track the number of requests being served at the same time
+        with self.server.mtx:
+            self.server.inflight += 1
+            self.server.stats['peak_inflight'] = max(
+                self.server.stats['peak_inflight'], self.server.inflight)
+
+        try:
+            self._serve_api(method, url, params, body)
+        finally:
+            with self.server.mtx:
+                self.server.inflight -= 1
+
+    def _serve_api(self, method, url, params, body):
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        key = url.path[len(STANDIN_API_PATH):].strip('/')
+        parts = key.split('/')
+
+        with self.server.mtx:
+            stats = self.server.stats
+            stats['requests'] += 1
+            stats['received'] += len(body)
+            stats['op:' + rest_operation(method, key)] += 1
+
+            headers = None
+            retry_after = self.server.acquire()
+            if retry_after:
+                stats['rate_limited'] += 1
+                code, data = 429, {'message': 'rate limited'}
+                headers = {'Retry-After': str(retry_after)}
+            else:
+                try:
+                    code, data = self._route(method, parts, params, body)
+                except StandInError as ex:
+                    code, data = ex.code, {'message': ex.message}
+
+        self._respond(code, data, headers=headers)
+
+    def _respond(self, code, data, headers=None):
+        payload = json.dumps(data).encode('utf-8') if data is not None else b''
+
+        with self.server.mtx:
+            self.server.stats['sent'] += len(payload)
+
+        self.send_response(code)
+        self.send_header('Content-Length', str(len(payload)))
+        if payload:
+            self.send_header('Content-Type', 'application/json')
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _route(self, method, parts, params, body):
+        server = self.server
+        root = parts[0]
+
+        if root == 'space':
+            if method == 'GET':
+                return self._get_space(params)
+            if method == 'PUT' and len(parts) == 2:
+                data = json.loads(body)
+                homepage = data.get('homepage') or {}
+                server.homepage = homepage.get('id')
+                return 200, self._render_space()
+
+        elif root == 'content':
+            if len(parts) == 1:
+                if method == 'GET':
+                    return self._get_pages(params)
+                if method == 'POST':
+                    return self._create_page(json.loads(body), params)
+
+            elif parts[1] == 'search' and method == 'GET':
+                return self._search(params)
+
+            elif parts[1] == 'archive' and method == 'POST':
+                return self._archive(json.loads(body))
+
+            elif len(parts) == 2:
+                if method == 'GET':
+                    page = self._find_page(parts[1])
+                    return 200, self._render_page(page, params)
+                if method == 'PUT':
+                    return self._update_page(parts[1], json.loads(body))
+                if method == 'DELETE':
+                    return self._delete(parts[1])
+
+            elif parts[2] == 'descendant' and method == 'GET':
+                self._find_page(parts[1])
+                pages = server.descendants(parts[1])
+                return 200, self._paginate(
+                    [self._render_page(p, params) for p in pages], params)
+
+            elif parts[2] == 'label' and method == 'POST':
+                page = self._find_page(parts[1])
+                for label in json.loads(body):
+                    page['labels'].add(label['name'])
+                return 200, self._render_labels(page)
+
+            elif parts[2:4] == ['child', 'attachment']:
+                if method == 'GET' and len(parts) == 4:
+                    return self._get_attachments(parts[1], params)
+                if method == 'POST' and len(parts) == 4:
+                    return self._store_attachment(parts[1], None, body)
+                if method == 'POST' and parts[5:] == ['data']:
+                    return self._store_attachment(parts[1], parts[4], body)
+
+        elif root == 'longtask' and method == 'GET':
+            return 200, {
+                'finished': True,
+                'id': parts[1],
+                'percentageComplete': 100,
+                'successful': True,
+            }
+
+        elif parts[:3] == ['user', 'watch', 'content'] and len(parts) == 4:
+            if method == 'GET':
+                return 200, {'watching': parts[3] in server.watches}
+            if method == 'POST':
+                server.watches.add(parts[3])
+                return 204, None
+            if method == 'DELETE':
+                server.watches.discard(parts[3])
+                return 204, None
+
+        raise StandInError(404, 'unsupported stand-in request')
+
+    def _archive(self, data):
+        pages = data.get('pages', [])
+        if not self.server.bulk_archive and len(pages) > 1:
+            raise StandInError(400,
+                'Cannot use bulk archive feature for non premium edition')
+
+        for entry in pages:
+            page = self._find_page(entry['id'])
+            page['status'] = 'archived'
+
+        return 202, {'id': self.server.next_id()}
+
+    def _create_page(self, data, params=None):
+        server = self.server
+
+        title = data['title']
+        if self._find_page_by_title(title, 'current'):
+            raise StandInError(400,
+                f'A page with this title already exists: {title}')
+
+        parent = None
+        ancestors = data.get('ancestors')
+        if ancestors:
+            parent = self._find_page(ancestors[-1]['id'])['id']
+
+        page = {
+            'attachments': {},
+            'body': data['body']['storage']['value'],
+            'id': server.next_id(),
+            'labels': set(),
+            'parent': parent,
+            'properties': {},
+            'status': 'current',
+            'title': title,
+            'version': 1,
+        }
+        self._apply_metadata(page, data)
+
+        server.pages[page['id']] = page
+        server.watches.add(page['id'])
+        return 200, self._render_page(page, params)
+
+    def _delete(self, content_id):
+        server = self.server
+
+        if content_id in server.attachments:
+            attachment = server.attachments.pop(content_id)
+            container = server.pages.get(attachment['container'])
+            if container:
+                container['attachments'].pop(attachment['title'], None)
+            return 204, None
+
+        page = self._find_page(content_id, status=None)
+        del server.pages[content_id]
+        for attachment_id in page['attachments'].values():
+            server.attachments.pop(attachment_id, None)
+
+        # children of a removed page are moved to the removed page's parent
+        for child in server.pages.values():
+            if child['parent'] == content_id:
+                child['parent'] = page['parent']
+
+        return 204, None
+
+    def _get_attachments(self, page_id, params):
+        page = self._find_page(page_id)
+
+        attachments = []
+        for name, attachment_id in sorted(page['attachments'].items()):
+            if 'filename' in params and params['filename'] != name:
+                continue
+            attachments.append(
+                self._render_attachment(self.server.attachments[attachment_id]))
+
+        return 200, self._paginate(attachments, params)
+
+    def _get_pages(self, params):
+        pages = []
+        if params.get('spaceKey') == self.server.space_key:
+            page = self._find_page_by_title(params.get('title'),
+                params.get('status', 'current'))
+            if page:
+                pages.append(self._render_page(page, params))
+
+        return 200, self._paginate(pages, params)
+
+    def _get_space(self, params):
+        spaces = []
+        if params.get('spaceKey') == self.server.space_key:
+            spaces.append(self._render_space())
+
+        return 200, self._paginate(spaces, params)
+
+    def _search(self, params):
+        server = self.server
+        cql = params.get('cql', '')
+
+        space = re.search(r'space="([^"]*)"', cql)
+        if space and space.group(1) != server.space_key:
+            return 200, self._paginate([], params)
+
+        ancestor = re.search(r'ancestor=(\w+)', cql)
+        if ancestor:
+            pages = server.descendants(ancestor.group(1))
+        else:
+            pages = [page for page in server.pages.values()
+                if page['status'] == 'current']
+
+        title = re.search(r'title~"([^"]*)"', cql)
+        if title:
+            pages = [page for page in pages
+                if title.group(1).lower() in page['title'].lower()]
+
+        return 200, self._paginate(
+            [self._render_page(page, params) for page in pages], params)
+
+    def _store_attachment(self, page_id, attachment_id, body):
+        server = self.server
+        page = self._find_page(page_id)
+        fields = parse_multipart(self.headers.get('Content-Type', ''), body)
+
+        filename, data = fields['file']
+        comment = fields.get('comment', (None, b''))[1].decode('utf-8')
+
+        if attachment_id:
+            attachment = server.attachments.get(attachment_id)
+            if not attachment or attachment['container'] != page_id:
+                raise StandInError(404,
+                    f'No content found with id: {attachment_id}')
+            attachment['version'] += 1
+        else:
+            if filename in page['attachments']:
+                raise StandInError(400, 'Cannot add a new attachment with '
+                    'same file name as an existing attachment: ' + filename)
+
+            attachment = {
+                'container': page_id,
+                'id': 'att' + server.next_id(),
+                'title': filename,
+                'version': 1,
+            }
+            server.attachments[attachment['id']] = attachment
+            page['attachments'][filename] = attachment['id']
+
+        attachment['comment'] = comment
+        attachment['size'] = len(data)
+        server.watches.add(attachment['id'])
+
+        rendered = self._render_attachment(attachment)
+        if attachment_id:
+            return 200, rendered
+        return 200, {'results': [rendered], 'size': 1}
+
+    def _update_page(self, page_id, data):
+        page = self._find_page(page_id)
+
+        version = int(data['version']['number'])
+        if version != page['version'] + 1:
+            raise StandInError(409, 'Version must be incremented on update. '
+                'Current version is: {}'.format(page['version']))
+
+        title = data['title']
+        other = self._find_page_by_title(title, 'current')
+        if other and other is not page:
+            raise StandInError(400,
+                f'A page with this title already exists: {title}')
+
+        ancestors = data.get('ancestors')
+        if ancestors:
+            parent_id = ancestors[-1]['id']
+            if parent_id == '1':
+                page['parent'] = None
+            else:
+                page['parent'] = self._find_page(parent_id)['id']
+
+        page['body'] = data['body']['storage']['value']
+        page['status'] = 'current'
+        page['title'] = title
+        page['version'] = version
+        self._apply_metadata(page, data)
+
+        self.server.watches.add(page['id'])
+        return 200, self._render_page(page)
+
+    def _apply_metadata(self, page, data):
+        metadata = data.get('metadata', {})
+
+        labels = metadata.get('labels')
+        if labels is not None:
+            page['labels'] = {label['name'] for label in labels}
+
+        for key, value in metadata.get('properties', {}).items():
+            page['properties'][key] = value.get('value')
+
+    def _find_page(self, page_id, status='current'):
+        page = self.server.pages.get(str(page_id))
+        if not page or (status and page['status'] != status):
+            raise StandInError(404, f'No content found with id: {page_id}')
+        return page
+
+    def _find_page_by_title(self, title, status):
+        for page in self.server.pages.values():
+            if page['title'] == title and page['status'] == status:
+                return page
+        return None
+
+    def _paginate(self, results, params):
+        limit = int(params.get('limit', 25))
+        start = int(params.get('start', 0))
+        results = results[start:start + limit]
+
+        return {
+            'limit': limit,
+            'results': results,
+            'size': len(results),
+            'start': start,
+        }
+
+    def _render_attachment(self, attachment):
+        return {
+            'extensions': {
+                'fileSize': attachment['size'],
+            },
+            'id': attachment['id'],
+            'metadata': {
+                'comment': attachment['comment'],
+            },
+            'title': attachment['title'],
+            'type': 'attachment',
+            'version': {
+                'number': attachment['version'],
+            },
+        }
+
+    def _render_labels(self, page):
+        labels = [{'name': label, 'prefix': 'global'}
+            for label in sorted(page['labels'])]
+
+        return {
+            'results': labels,
+            'size': len(labels),
+        }
+
+    def _render_page(self, page, params=None):
+        expand = (params or {}).get('expand', '').split(',')
+
+        data = {
+            'id': page['id'],
+            'space': {
+                'key': self.server.space_key,
+            },
+            'status': page['status'],
+            'title': page['title'],
+            'type': 'page',
+            'version': {
+                'number': page['version'],
+            },
+        }
+
+        if 'ancestors' in expand:
+            data['ancestors'] = [{'id': ancestor}
+                for ancestor in self.server.ancestors(page)]
+
+        if 'body.storage' in expand:
+            data['body'] = {
+                'storage': {
+                    'representation': 'storage',
+                    'value': page['body'],
+                },
+            }
+
+        metadata = {}
+        if 'metadata.labels' in expand:
+            metadata['labels'] = self._render_labels(page)
+
+        prefix = 'metadata.properties.'
+        for entry in expand:
+            if entry.startswith(prefix):
+                key = entry[len(prefix):]
+                if key in page['properties']:
+                    metadata.setdefault('properties', {})[key] = {
+                        'key': key,
+                        'value': page['properties'][key],
+                    }
+
+        if metadata:
+            data['metadata'] = metadata
+
+        return data
+
+    def _render_space(self):
+        space = {
+            'key': self.server.space_key,
+            'name': 'Stand-in Space',
+            'type': 'global',
+        }
+
+        if self.server.homepage:
+            space['homepage'] = {'id': self.server.homepage}
+
+        return space
+
+
+class StandInError(Exception):
+    """
+    a confluence-like error reported by a stand-in instance
+
+    Args:
+        code: the status code
+        message: the error message
+    """
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+def parse_multipart(content_type, body):
+    """
+    parse a multipart/form-data body
+
+    Args:
+        content_type: the content type of the body
+        body: the body
+
+    Returns:
+        dictionary of field names to a tuple of a filename and value
+    """
+    fields = {}
+
+    boundary = re.search(r'boundary=([^;]+)', content_type)
+    if not boundary:
+        return fields
+
+    delimiter = b'--' + boundary.group(1).strip('"').encode()
+    for part in body.split(delimiter)[1:]:
+        if part.startswith(b'--'):
+            break
+
+        header_data, _, value = part[2:].partition(b'\r\n\r\n')
+        headers = header_data.decode('utf-8')
+
+        name = re.search(r'name="([^"]*)"', headers)
+        filename = re.search(r'filename="([^"]*)"', headers)
+        if name:
+            fields[name.group(1)] = (
+                filename.group(1) if filename else None, value[:-2])
+
+    return fields
+
+
+def fetch_standin_stats(url):
+    """
+    fetch the statistics tracked by a stand-in instance
+
+    Args:
+        url: the url of the stand-in instance
+
+    Returns:
+        the statistics
+    """
+    with urlopen(url.rstrip('/') + STANDIN_STATS_PATH) as rsp:  # noqa: S310
+        return json.loads(rsp.read().decode('utf-8'))
+
+
+def standin_request(url, method, key, params=None):
+    """
+    perform a rest api request on a stand-in instance
+
+    Allows a test to inspect or modify the state of a stand-in instance (e.g.
+    removing a page outside of a publish attempt).
+
+    Args:
+        url: the url of the stand-in instance
+        method: the request method
+        key: the api key to request
+        params (optional): the query parameters to provide
+
+    Returns:
+        the response data (if any)
+    """
+    request_url = url.rstrip('/') + STANDIN_API_PATH + key
+    if params:
+        request_url += '?' + urlencode(params)
+
+    request = Request(request_url, method=method)
+    with urlopen(request) as rsp:  # noqa: S310
+        data = rsp.read()
+
+    return json.loads(data.decode('utf-8')) if data else None
+
+
+def _serve_standin(queue, space_key, latency, rate_limit, bulk_archive):
+    server = ConfluenceStandInServer(space_key, latency, rate_limit,
+        bulk_archive)
+    queue.put(server.server_address)
+
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+
+@contextmanager
+def standin_confluence_instance(config=None, space_key='STANDIN', latency=0,
+        rate_limit=None, bulk_archive=True):
+    """
+    spawns a stand-in confluence instance
+
+    The following spawns a stand-in Confluence instance in a separate process
+    (to avoid the instance's processing or memory usage from influencing the
+    process publishing to it).
+
+    Args:
+        config (optional): the configuration to populate a publisher url on
+        space_key (optional): the key of the space hosted by this instance
+        latency (optional): the latency (in seconds) added to each request
+        rate_limit (optional): the number of requests per second permitted
+                                before requests are rate-limited
+        bulk_archive (optional): whether multiple pages can be archived in a
+                                  single request
+
+    Yields:
+        the url of the instance
+    """
+
+    ctx = multiprocessing.get_context('spawn')
+    queue = ctx.Queue()
+    process = ctx.Process(target=_serve_standin,
+        args=(queue, space_key, latency, rate_limit, bulk_archive),
+        daemon=True)
+    process.start()
+
+    try:
+        host, port = queue.get(timeout=60)
+        url = f'http://{host}:{port}/'
+
+        if config is not None:
+            config['confluence_server_url'] = url
+            config['confluence_space_key'] = space_key
+
+        yield url
+    finally:
+        process.terminate()
+        process.join()
@@ -0,0 +1,516 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright Sphinx Confluence Builder Contributors (AUTHORS)
+
+from collections import defaultdict
+from tests.lib import prepare_conf
+from tests.lib import prepare_dirs
+from tests.lib import prepare_sphinx
+from tests.lib.standin import fetch_standin_stats
+from tests.lib.standin import standin_confluence_instance
+import argparse
+import io
+import os
+import random
+import statistics
+import struct
+import sys
+import time
+import tracemalloc
+import zlib
+
+# default number of times each benchmark case is run
+DEFAULT_ITERATIONS = 5
+
+# default scale applied to the size of generated benchmark documents
+DEFAULT_SCALE = 1
+
+# default number of pages (per scale) in a generated publish set
+DEFAULT_PUBLISH_PAGES = 50
+
+# default (maximum) depth of a generated publish set's page hierarchy
+DEFAULT_PUBLISH_DEPTH = 3
+
+# default number of images on each page in a generated publish set
+DEFAULT_PUBLISH_IMAGES = 1
+
+# default number of cross-references on each page in a generated publish set
+DEFAULT_PUBLISH_REFERENCES = 3
+
+
+def generate_lists(scale):
+    """
+    generate a document with deep/wide nested lists
+
+    Args:
+        scale: the scale of the document
+
+    Returns:
+        the document's source
+    """
+    lines = ['lists', '=====', '']
+
+    def add_list(depth, indent):
+        for idx in range(4):
+            lines.append('{}- item {} (depth {}) with *emphasis* and '
+                '``literal`` content'.format(indent, idx, depth))
+            if depth < 6:
+                lines.append('')
+                add_list(depth + 1, indent + '  ')
+                lines.append('')
+
+    for _ in range(scale * 2):
+        add_list(1, '')
+        lines.append('')
+
+    return '\n'.join(lines)
+
+
+def generate_references(scale):
+    """
+    generate a document with many (internal and external) references
+
+    Args:
+        scale: the scale of the document
+
+    Returns:
+        the document's source
+    """
+    lines = ['references', '==========', '']
+
+    for idx in range(scale * 250):
+        lines.append(f'.. _target-{idx}:')
+        lines.append('')
+        lines.append(f'target {idx}')
+        lines.append('-' * len(f'target {idx}'))
+        lines.append('')
+        lines.append('See :ref:`target-{}`, :doc:`tables` and '
+            '`site <https://example.com/{}?a=1&b=2>`__.'.format(
+                (idx + 1) % (scale * 250), idx))
+        lines.append('')
+
+    return '\n'.join(lines)
+
+
+def generate_tables(scale):
+    """
+    generate a document with large tables
+
+    Args:
+        scale: the scale of the document
+
+    Returns:
+        the document's source
+    """
+    lines = ['tables', '======', '']
+
+    columns = 8
+    for table_idx in range(scale * 2):
+        lines.append(f'.. list-table:: table {table_idx}')
+        lines.append('   :header-rows: 1')
+        lines.append('')
+
+        for row in range(250):
+            for col in range(columns):
+                prefix = '*' if col == 0 else ' '
+                lines.append('   {} - cell {}x{} <&> "quoted"'.format(
+                    prefix, row, col))
+        lines.append('')
+
+    return '\n'.join(lines)
+
+
+def generate_text(scale):
+    """
+    generate a document with many paragraphs of (escapable) text
+
+    Args:
+        scale: the scale of the document
+
+    Returns:
+        the document's source
+    """
+    lines = ['text', '====', '']
+
+    for idx in range(scale * 1000):
+        lines.append('Paragraph {} contains text with characters such as '
+            '<, >, &, " and \' which require encoding, along with **strong**, '
+            '*emphasized* and ``literal`` text.'.format(idx))
+        lines.append('')
+
+    return '\n'.join(lines)
+
+
+# benchmark documents to generate (and translate)
+TRANSLATOR_CASES = {
+    'lists': generate_lists,
+    'references': generate_references,
+    'tables': generate_tables,
+    'text': generate_text,
+}
+
+
+def benchmark_translator(iterations, scale):
+    """
+    benchmark translating (large) documents into storage format
+
+    Generates a series of large documents, builds them and then repeatedly
+    translates each document's (prepared) doctree with the storage format
+    translator.
+
+    Args:
+        iterations: the number of times to translate each document
+        scale: the scale of the generated documents
+
+    Returns:
+        a dictionary of case names to measurements (a list of durations)
+    """
+    src_dir = prepare_dirs('benchmark-translator', postfix='-src')
+    os.makedirs(src_dir)
+
+    with open(os.path.join(src_dir, 'index.rst'), 'w', encoding='utf-8') as f:
+        f.write('index\n=====\n\n.. toctree::\n\n')
+        for name, generator in TRANSLATOR_CASES.items():
+            f.write(f'    {name}\n')
+
+            fname = os.path.join(src_dir, name + '.rst')
+            with open(fname, 'w', encoding='utf-8') as doc:
+                doc.write(generator(scale))
+
+    out_dir = prepare_dirs('benchmark-translator')
+    with prepare_sphinx(src_dir, config=prepare_conf(), out_dir=out_dir,
+            relax=True) as app:
+        builder = app.builder
+
+        # capture each document's doctree when written, to be translated
+        # again for each benchmark iteration
+        doctrees = {}
+        original_write_doc = builder.write_doc
+
+        def write_doc(docname, doctree):
+            doctrees[docname] = doctree
+            original_write_doc(docname, doctree)
+        builder.write_doc = write_doc
+
+        app.build(force_all=True)
+
+        results = {}
+        for name in TRANSLATOR_CASES:
+            doctree = doctrees[name]
+
+            durations = []
+            for _ in range(iterations):
+                output = io.StringIO()
+                start = time.perf_counter()
+                builder.writer.write(doctree, output)
+                durations.append(time.perf_counter() - start)
+
+            results[name] = {'time': durations}
+
+    return results
+
+
+def generate_png(seed, size=32):
+    """
+    generate a (unique) png image
+
+    Args:
+        seed: the seed used to generate the image's pixels
+        size (optional): the width/height of the image
+
+    Returns:
+        the image's data
+    """
+    rng = random.Random(seed)
+
+    raw = b''
+    for _ in range(size):
+        raw += b'\x00' + bytes(rng.getrandbits(8) for _ in range(size * 3))
+
+    def chunk(type_, data):
+        return struct.pack('>I', len(data)) + type_ + data + \
+            struct.pack('>I', zlib.crc32(type_ + data))
+
+    return b''.join([
+        b'\x89PNG\r\n\x1a\n',
+        chunk(b'IHDR', struct.pack('>IIBBBBB', size, size, 8, 2, 0, 0, 0)),
+        chunk(b'IDAT', zlib.compress(raw)),
+        chunk(b'IEND', b''),
+    ])
+
+
+def generate_publish_set(pages, depth, images, references, changed=None):
+    """
+    generate the sources of a documentation set to publish
+
+    Generates a documentation set with a hierarchy of pages (the root document
+    and its descendants), where each page contains text, images and
+    references to other pages. Pages only reference pages before them, so
+    removing the last pages of a set will not modify the content of other
+    pages (outside of the toctree of their parents).
+
+    Args:
+        pages: the number of pages
+        depth: the (maximum) depth of the page hierarchy
+        images: the number of images on each page
+        references: the number of cross-references on each page
+        changed (optional): page index to include a change on
+
+    Returns:
+        a dictionary of filenames to file data
+    """
+    files = {}
+
+    # determine the number of children for each page to (roughly) fit all
+    # pages within the requested depth
+    width = max(2, int(pages ** (1 / max(depth, 1))) + 1)
+
+    for idx in range(pages):
+        docname = 'index' if idx == 0 else f'page{idx}'
+        title = f'Page {idx}'
+
+        lines = [f'.. _page{idx}:', '', title, '=' * len(title), '']
+
+        for paragraph in range(3):
+            lines.append('Paragraph {} of page {} contains text with '
+                '**strong**, *emphasized* and ``literal`` content, along with '
+                'characters such as <, > and & which require encoding.'.format(
+                    paragraph, idx))
+            lines.append('')
+
+        if idx == changed:
+            lines.append(f'Page {idx} has been changed.')
+            lines.append('')
+
+        for ref in range(references if idx else 0):
+            target = (idx * 31 + ref * 17) % idx
+            lines.append(f'See :ref:`page{target}`.')
+            lines.append('')
+
+        for image in range(images):
+            image_name = f'images/page{idx}-{image}.png'
+            files[image_name] = generate_png(idx * 1000 + image)
+            lines.append(f'.. image:: {image_name}')
+            lines.append('')
+
+        children = range(idx * width + 1, min(idx * width + width + 1, pages))
+        if children:
+            lines.append('.. toctree::')
+            lines.append('')
+            for child in children:
+                lines.append(f'    page{child}')
+            lines.append('')
+
+        files[docname + '.rst'] = '\n'.join(lines).encode('utf-8')
+
+    return files
+
+
+def update_publish_set(src_dir, files):
+    """
+    update a documentation set's sources
+
+    Writes the provided files into a source directory, where only files which
+    have changed are written (to allow incremental builds to only process
+    changed documents). Files which are no longer part of the set are removed.
+
+    Args:
+        src_dir: the source directory
+        files: a dictionary of filenames to file data
+    """
+    for root, _, filenames in os.walk(src_dir):
+        for filename in filenames:
+            target = os.path.join(root, filename)
+            relpath = os.path.relpath(target, src_dir).replace(os.sep, '/')
+            if relpath not in files:
+                os.remove(target)
+
+    for filename, data in files.items():
+        target = os.path.join(src_dir, filename)
+
+        if os.path.isfile(target):
+            with open(target, 'rb') as f:
+                if f.read() == data:
+                    continue
+
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, 'wb') as f:
+            f.write(data)
+
+
+def benchmark_publish(iterations, scale, pages=None,
+        depth=DEFAULT_PUBLISH_DEPTH, images=DEFAULT_PUBLISH_IMAGES,
+        references=DEFAULT_PUBLISH_REFERENCES, latency=0, rate_limit=None,
+        workers=None, pipeline=False):
+    """
+    benchmark building and publishing a documentation set
+
+    Generates a documentation set and publishes it to a stand-in Confluence
+    instance over a series of scenarios:
+
+    - ``cold``: publishing to an empty space
+    - ``warm``: republishing all documents (where nothing has changed)
+    - ``changed``: publishing (incrementally) after a single page has changed
+    - ``cleanup``: republishing all documents with cleanup (purge) enabled,
+      after the last tenth of the pages have been removed
+
+    Each scenario reports the duration of the build, the number of requests
+    made (per page in the documentation set), the number of rate-limited
+    requests and the peak memory allocated while building (traced memory
+    allocations add an overhead to builds, which is applied consistently over
+    all runs).
+
+    Args:
+        iterations: the number of times to run each scenario
+        scale: the scale of the generated documentation set
+        pages (optional): the number of pages (overrides scale)
+        depth (optional): the (maximum) depth of the page hierarchy
+        images (optional): the number of images on each page
+        references (optional): the number of cross-references on each page
+        latency (optional): the latency (in seconds) of each request
+        rate_limit (optional): the requests per second permitted before the
+                                stand-in instance reports rate-limiting
+        workers (optional): the number of publish workers to use
+        pipeline (optional): whether to publish documents while writing
+
+    Returns:
+        a dictionary of scenario names to measurements
+    """
+    if not pages:
+        pages = DEFAULT_PUBLISH_PAGES * scale
+    removed = max(1, pages // 10)
+
+    src_dir = prepare_dirs('benchmark-publish', postfix='-src')
+    os.makedirs(src_dir)
+
+    with open(os.path.join(src_dir, 'conf.py'), 'w', encoding='utf-8') as f:
+        f.write('')
+
+    def generate(total=pages, changed=None):
+        files = generate_publish_set(total, depth, images, references,
+            changed=changed)
+        files['conf.py'] = b''
+        return files
+
+    # scenario name, sources, number of pages, force all and extra options
+    scenarios = [
+        ('cold', generate(), pages, True, {}),
+        ('warm', generate(), pages, True, {}),
+        ('changed', generate(changed=pages - 1), pages, False, {}),
+        ('cleanup', generate(pages - removed), pages - removed, True, {
+            'confluence_cleanup_purge': True,
+        }),
+    ]
+
+    results = defaultdict(lambda: defaultdict(list))
+    for _ in range(iterations):
+        out_dir = prepare_dirs('benchmark-publish')
+        update_publish_set(src_dir, generate())
+
+        config = prepare_conf()
+        config['confluence_publish'] = True
+        config['confluence_publish_pipeline'] = pipeline
+        config['confluence_publish_workers'] = workers
+        config['confluence_timeout'] = 30
+
+        with standin_confluence_instance(config, latency=latency,
+                rate_limit=rate_limit) as url:
+            for name, files, total, force_all, options in scenarios:
+                update_publish_set(src_dir, files)
+
+                stats = fetch_standin_stats(url)
+
+                tracemalloc.start()
+                start = time.perf_counter()
+                with prepare_sphinx(src_dir, config=config, out_dir=out_dir,
+                        extra_config=options, relax=True) as app:
+                    app.build(force_all=force_all)
+                duration = time.perf_counter() - start
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+
+                new_stats = fetch_standin_stats(url)
+                requests = new_stats['requests'] - stats.get('requests', 0)
+                limited = new_stats.get('rate_limited', 0) - \
+                    stats.get('rate_limited', 0)
+
+                result = results[name]
+                result['time'].append(duration)
+                result['requests/page'].append(requests / total)
+                result['429s'].append(limited)
+                result['peak-MiB'].append(peak / (1024 * 1024))
+
+    return results
+
+
+# available benchmark suites
+SUITES = {
+    'publish': benchmark_publish,
+    'translator': benchmark_translator,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(prog=__name__,
+        description='Atlassian Confluence Sphinx Extension Benchmarks')
+    parser.add_argument('suite', nargs='*', choices=[[], *SUITES],
+        help='benchmark suites to run (default: all)')
+    parser.add_argument('--iterations', '-n', type=int,
+        default=DEFAULT_ITERATIONS)
+    parser.add_argument('--scale', '-s', type=int, default=DEFAULT_SCALE)
+
+    publish_group = parser.add_argument_group('publish suite options')
+    publish_group.add_argument('--pages', type=int,
+        help='number of pages (default: {} per scale)'.format(
+            DEFAULT_PUBLISH_PAGES))
+    publish_group.add_argument('--depth', type=int,
+        default=DEFAULT_PUBLISH_DEPTH)
+    publish_group.add_argument('--images', type=int,
+        default=DEFAULT_PUBLISH_IMAGES)
+    publish_group.add_argument('--references', type=int,
+        default=DEFAULT_PUBLISH_REFERENCES)
+    publish_group.add_argument('--latency', type=float, default=0,
+        help='latency (in seconds) of each request')
+    publish_group.add_argument('--rate-limit', type=float,
+        help='requests per second permitted before rate-limiting')
+    publish_group.add_argument('--workers', type=int,
+        help='number of publish workers')
+    publish_group.add_argument('--pipeline', action='store_true',
+        help='publish documents while other documents are being written')
+
+    args = parser.parse_args()
+
+    suite_options = {
+        'publish': {
+            'depth': args.depth,
+            'images': args.images,
+            'latency': args.latency,
+            'pages': args.pages,
+            'pipeline': args.pipeline,
+            'rate_limit': args.rate_limit,
+            'references': args.references,
+            'workers': args.workers,
+        },
+    }
+
+    for suite in args.suite or SUITES:
+        print(f'[benchmark] {suite}')
+
+        results = SUITES[suite](args.iterations, args.scale,
+            **suite_options.get(suite, {}))
+        for name, measurements in results.items():
+            durations = measurements['time']
+            line = '  {:<16} min {:8.2f} ms  mean {:8.2f} ms'.format(name,
+                min(durations) * 1000, statistics.mean(durations) * 1000)
+
+            for measure, values in measurements.items():
+                if measure != 'time':
+                    line += '  {} {:.2f}'.format(
+                        measure, statistics.mean(values))
+
+            print(line)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
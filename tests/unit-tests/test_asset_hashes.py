@@ -0,0 +1,59 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright Sphinx Confluence Builder Contributors (AUTHORS)
+
+from sphinxcontrib.confluencebuilder.assets import ConfluenceAssetHashes
+from sphinxcontrib.confluencebuilder.util import ConfluenceUtil
+from tests.lib import prepare_dirs
+import os
+import unittest
+
+
+class TestAssetHashes(unittest.TestCase):
+    def test_asset_hashes(self):
+        """validate asset hashes are indexed between runs"""
+        #
+        # Verify that an asset hash index will provide the hashes of assets,
+        # re-use indexed hashes for assets which have not changed (even after
+        # being saved/loaded) and re-hash assets which have changed.
+
+        work_dir = prepare_dirs(postfix='-hashes')
+        os.makedirs(work_dir)
+
+        assets = []
+        for idx in range(4):
+            asset = os.path.join(work_dir, f'asset{idx}.bin')
+            with open(asset, 'wb') as f:
+                f.write(os.urandom(1024))
+            assets.append(asset)
+
+        index_file = os.path.join(work_dir, 'index.json')
+        index = ConfluenceAssetHashes(index_file)
+        index.load()
+        index.prepare(assets, workers=2)
+
+        for asset in assets:
+            self.assertEqual(index.hash(asset),
+                ConfluenceUtil.hash_asset(asset))
+
+        index.save()
+
+        # an unchanged asset uses its indexed hash
+        index = ConfluenceAssetHashes(index_file)
+        index.load()
+        self.assertEqual(len(index.entries), len(assets))
+
+        index.entries[assets[0]][3] = 'indexed'
+        self.assertEqual(index.hash(assets[0]), 'indexed')
+
+        # a changed asset is hashed again
+        with open(assets[1], 'ab') as f:
+            f.write(b'changed')
+
+        index.prepare(assets)
+        self.assertEqual(index.hash(assets[1]),
+            ConfluenceUtil.hash_asset(assets[1]))
+
+        # only assets used are saved
+        index.save()
+        index.load()
+        self.assertEqual(sorted(index.entries), assets[:2])
@@ -0,0 +1,83 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright Sphinx Confluence Builder Contributors (AUTHORS)
+
+from tests.lib import prepare_dirs
+from tests.lib.standin import fetch_standin_stats
+from tests.lib.standin import standin_confluence_instance
+from tests.lib.testcase import ConfluenceTestCase
+from unittest.mock import patch
+import os
+
+# documents which become legacy pages once removed from the index
+LEGACY_DOCUMENTS = ['first', 'second', 'third', 'fourth', 'fifth']
+
+
+class TestBuilderCleanupArchive(ConfluenceTestCase):
+    def _prepare_dataset(self, docnames):
+        src_dir = prepare_dirs(postfix='-src')
+        os.makedirs(src_dir)
+        self._update_dataset(src_dir, docnames)
+        return src_dir
+
+    def _update_dataset(self, src_dir, docnames):
+        for filename in os.listdir(src_dir):
+            os.remove(os.path.join(src_dir, filename))
+
+        toctree = ''.join(f'\n    {docname}' for docname in docnames)
+        with open(os.path.join(src_dir, 'index.rst'), 'w') as f:
+            f.write(f'index\n=====\n\n.. toctree::\n{toctree}\n')
+
+        for docname in docnames:
+            with open(os.path.join(src_dir, docname + '.rst'), 'w') as f:
+                f.write(f'{docname}\n{"=" * len(docname)}\n\ncontent\n')
+
+    def _archive_legacy_pages(self, bulk_archive=True):
+        config = self.config.clone()
+        config['confluence_cleanup_archive'] = True
+        config['confluence_cleanup_from_root'] = True
+        config['confluence_publish'] = True
+        config['confluence_timeout'] = 5
+
+        src_dir = self._prepare_dataset(LEGACY_DOCUMENTS)
+
+        with standin_confluence_instance(config,
+                bulk_archive=bulk_archive) as url:
+            self.build(src_dir, config=config)
+
+            stats = fetch_standin_stats(url)
+            self.assertEqual(stats['pages'], len(LEGACY_DOCUMENTS) + 1)
+            self.assertEqual(stats['archived'], 0)
+
+            # remove all documents except the root document, which should
+            # result in all other pages being archived
+            self._update_dataset(src_dir, [])
+            self.build(src_dir, config=config)
+
+            new_stats = fetch_standin_stats(url)
+            self.assertEqual(new_stats['archived'], len(LEGACY_DOCUMENTS))
+
+            return new_stats.get('op:page-archive', 0) - \
+                stats.get('op:page-archive', 0)
+
+    def test_builder_cleanup_archive_batches(self):
+        """validate builder archives legacy pages in batches"""
+        #
+        # Verify that legacy pages (tracked as a set) are archived using
+        # multiple bulk archive requests when exceeding a batch's size.
+
+        with patch('sphinxcontrib.confluencebuilder.publisher.'
+                'ARCHIVE_BATCH_SIZE', 2):
+            requests = self._archive_legacy_pages()
+
+        self.assertEqual(requests, 3)
+
+    def test_builder_cleanup_archive_fallback(self):
+        """validate builder archives legacy pages individually if needed"""
+        #
+        # Verify that if an instance does not support bulk archiving, each
+        # legacy page is archived individually.
+
+        requests = self._archive_legacy_pages(bulk_archive=False)
+
+        # one (failed) bulk archive request followed by a request per page
+        self.assertEqual(requests, 1 + len(LEGACY_DOCUMENTS))
@@ -0,0 +1,47 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright Sphinx Confluence Builder Contributors (AUTHORS)
+
+from tests.lib import prepare_dirs
+from tests.lib.testcase import ConfluenceTestCase
+import os
+
+
+class TestBuilderDoctreeCache(ConfluenceTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.dataset = os.path.join(cls.datasets, 'shared-asset')
+
+    def test_builder_doctree_cache_size(self):
+        """validate a limited doctree cache generates the same output"""
+        #
+        # Verify that when the doctree cache is limited in size (forcing
+        # prepared doctrees to be evicted and restored), the generated output
+        # matches the output generated when all doctrees are held in memory.
+
+        config = dict(self.config)
+        config['confluence_prev_next_buttons_location'] = 'both'
+        config['confluence_remove_title'] = True
+
+        ref_dir = self.build(self.dataset, config=config,
+            out_dir=prepare_dirs(postfix='-ref'))
+
+        config['confluence_doctree_cache_size'] = 1
+        out_dir = self.build(self.dataset, config=config)
+
+        generated = sorted(f for f in os.listdir(ref_dir) if
+            f.endswith('.conf'))
+        self.assertTrue(generated)
+
+        for filename in generated:
+            with open(os.path.join(ref_dir, filename), encoding='utf-8') as f:
+                expected = f.read()
+
+            with open(os.path.join(out_dir, filename), encoding='utf-8') as f:
+                self.assertEqual(f.read(), expected)
+
+        # temporarily stored doctrees should be removed after a build
+        doctree_dir = os.path.join(out_dir, '.doctrees')
+        self.assertFalse([f for f in os.listdir(doctree_dir) if
+            f.startswith('.confluence-doctrees-')])
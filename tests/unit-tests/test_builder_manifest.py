@@ -0,0 +1,133 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright Sphinx Confluence Builder Contributors (AUTHORS)
+
+from tests.lib import prepare_dirs
+from tests.lib.standin import fetch_standin_stats
+from tests.lib.standin import standin_confluence_instance
+from tests.lib.standin import standin_request
+from tests.lib.testcase import ConfluenceTestCase
+import os
+import shutil
+
+# documents for a dataset where a document (with an image) has a child document
+DOCUMENTS = {
+    'index': '''\
+index
+=====
+
+.. toctree::
+
+    parent
+''',
+    'parent': '''\
+parent
+======
+
+.. image:: image.png
+
+.. toctree::
+
+    child
+''',
+    'child': '''\
+child
+=====
+
+content
+''',
+}
+
+
+class TestBuilderManifest(ConfluenceTestCase):
+    def _prepare_dataset(self):
+        src_dir = prepare_dirs(postfix='-src')
+        os.makedirs(src_dir)
+
+        for docname, content in DOCUMENTS.items():
+            with open(os.path.join(src_dir, docname + '.rst'), 'w') as f:
+                f.write(content)
+
+        shutil.copyfile(os.path.join(self.assets_dir, 'image01.png'),
+            os.path.join(src_dir, 'image.png'))
+
+        return src_dir
+
+    def _prepare_config(self):
+        config = self.config.clone()
+        config['confluence_publish'] = True
+        config['confluence_publish_manifest'] = True
+        config['confluence_timeout'] = 5
+        return config
+
+    def _page(self, url, title):
+        rsp = standin_request(url, 'GET', 'content', {
+            'spaceKey': 'STANDIN',
+            'title': title,
+            'expand': 'ancestors',
+        })
+        return rsp['results'][0] if rsp['results'] else None
+
+    def test_builder_manifest_missing_page(self):
+        """validate builder republishes a missing tracked page"""
+        #
+        # Verify that if a page tracked in a publish manifest has been removed
+        # from the instance, a failure publishing a child page will result in
+        # the tracked page (and its assets) being published again.
+
+        config = self._prepare_config()
+        src_dir = self._prepare_dataset()
+        out_dir = prepare_dirs()
+
+        with standin_confluence_instance(config) as url:
+            self.build(src_dir, config=config, out_dir=out_dir)
+
+            stats = fetch_standin_stats(url)
+            self.assertEqual(stats['pages'], 3)
+            attachments = stats['attachments']
+
+            parent_page = self._page(url, 'parent')
+            standin_request(url, 'DELETE', 'content/' + parent_page['id'])
+
+            # update the child document, which is published under the tracked
+            # (now missing) page
+            with open(os.path.join(src_dir, 'child.rst'), 'a') as f:
+                f.write('\nupdated\n')
+
+            self.build(src_dir, config=config, out_dir=out_dir)
+
+            stats = fetch_standin_stats(url)
+            self.assertEqual(stats['pages'], 3)
+            self.assertEqual(stats['attachments'], attachments)
+
+            new_parent_page = self._page(url, 'parent')
+            self.assertIsNotNone(new_parent_page)
+            self.assertNotEqual(new_parent_page['id'], parent_page['id'])
+
+            child_page = self._page(url, 'child')
+            self.assertEqual(child_page['ancestors'][-1]['id'],
+                new_parent_page['id'])
+
+    def test_builder_manifest_prefetch(self):
+        """validate builder verifies tracked pages with prefetched pages"""
+        #
+        # Verify that if a page tracked in a publish manifest has been removed
+        # from the instance, an unchanged document will be published again
+        # when pages are prefetched.
+
+        config = self._prepare_config()
+        config['confluence_publish_prefetch'] = True
+        src_dir = self._prepare_dataset()
+        out_dir = prepare_dirs()
+
+        with standin_confluence_instance(config) as url:
+            self.build(src_dir, config=config, out_dir=out_dir)
+
+            child_page = self._page(url, 'child')
+            standin_request(url, 'DELETE', 'content/' + child_page['id'])
+            self.assertEqual(fetch_standin_stats(url)['pages'], 2)
+
+            # publish again without any changes
+            self.build(src_dir, config=config, out_dir=out_dir)
+
+            self.assertEqual(fetch_standin_stats(url)['pages'], 3)
+            self.assertIsNotNone(self._page(url, 'child'))
@@ -0,0 +1,137 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright Sphinx Confluence Builder Contributors (AUTHORS)
+
+from tests.lib import prepare_dirs
+from tests.lib.testcase import ConfluenceTestCase
+import os
+import time
+
+# documents for a dataset where a document links to another document
+DOCUMENTS = {
+    'index': '''\
+index
+=====
+
+.. toctree::
+
+    first
+    second
+    third
+''',
+    'first': '''\
+first
+=====
+
+See :doc:`second`.
+''',
+    'second': '''\
+second
+======
+
+content
+''',
+    'third': '''\
+third
+=====
+
+content
+''',
+}
+
+
+class TestBuilderOutdated(ConfluenceTestCase):
+    def _prepare_dataset(self):
+        src_dir = prepare_dirs(postfix='-src')
+        os.makedirs(src_dir)
+
+        for docname, content in DOCUMENTS.items():
+            with open(os.path.join(src_dir, docname + '.rst'), 'w') as f:
+                f.write(content)
+
+        return src_dir
+
+    def _touch(self, src_dir, docname):
+        # ensure the source is newer than any generated output
+        doc_path = os.path.join(src_dir, docname + '.rst')
+        mtime = time.time() + 10
+        os.utime(doc_path, (mtime, mtime))
+
+    def test_builder_outdated_dependents(self):
+        """validate dependents of a changed document are outdated"""
+        #
+        # Verify that when a document is changed, the builder reports the
+        # changed document along with any documents linking to it as outdated.
+
+        src_dir = self._prepare_dataset()
+        out_dir = self.build(src_dir)
+
+        with self.prepare(src_dir, out_dir=out_dir) as app:
+            self.assertEqual(set(app.builder.get_outdated_docs()), set())
+
+        self._touch(src_dir, 'second')
+
+        with self.prepare(src_dir, out_dir=out_dir) as app:
+            outdated = set(app.builder.get_outdated_docs())
+            self.assertEqual(outdated, {'first', 'index', 'second'})
+
+    def test_builder_outdated_dependents_link_transform(self):
+        """validate dependents are outdated with a custom link transform"""
+        #
+        # Verify that documents linking to a changed document are reported as
+        # outdated when a link transform produces uris which do not map
+        # directly to document names.
+
+        def link_transform(docname):
+            return docname + '/'
+
+        config = dict(self.config)
+        config['confluence_link_transform'] = link_transform
+
+        src_dir = self._prepare_dataset()
+        out_dir = self.build(src_dir, config=config)
+
+        self._touch(src_dir, 'second')
+
+        with self.prepare(src_dir, config=config, out_dir=out_dir) as app:
+            self.assertEqual(app.builder.dependencies.docs['first'],
+                ['second'])
+
+            outdated = set(app.builder.get_outdated_docs())
+            self.assertEqual(outdated, {'first', 'index', 'second'})
+
+    def test_builder_outdated_prevnext(self):
+        """validate navigational neighbors of a changed document are outdated"""
+        #
+        # Verify that when a document is changed, the builder reports the
+        # documents using it as a navigational neighbor as outdated.
+
+        config = dict(self.config)
+        config['confluence_prev_next_buttons_location'] = 'bottom'
+
+        src_dir = self._prepare_dataset()
+        out_dir = self.build(src_dir, config=config)
+
+        self._touch(src_dir, 'third')
+
+        with self.prepare(src_dir, config=config, out_dir=out_dir) as app:
+            outdated = set(app.builder.get_outdated_docs())
+            self.assertEqual(outdated, {'index', 'second', 'third'})
+
+    def test_builder_outdated_prevnext_structure(self):
+        """validate all documents are outdated on a structure change"""
+        #
+        # Verify that when a document with a toctree is changed, the builder
+        # reports all documents as outdated when navigational buttons are
+        # used (since the neighbors of any document may have changed).
+
+        config = dict(self.config)
+        config['confluence_prev_next_buttons_location'] = 'bottom'
+
+        src_dir = self._prepare_dataset()
+        out_dir = self.build(src_dir, config=config)
+
+        self._touch(src_dir, 'index')
+
+        with self.prepare(src_dir, config=config, out_dir=out_dir) as app:
+            outdated = set(app.builder.get_outdated_docs())
+            self.assertEqual(outdated, set(DOCUMENTS))
@@ -0,0 +1,106 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright Sphinx Confluence Builder Contributors (AUTHORS)
+
+from sphinxcontrib.confluencebuilder.state import ConfluenceState
+from tests.lib import prepare_dirs
+from tests.lib.testcase import ConfluenceTestCase
+import os
+import shutil
+
+# configuration for a dataset which injects an image into each document after
+# assets have been processed (i.e. an asset only found when translating)
+CONF = '''\
+from docutils import nodes
+from sphinx.transforms.post_transforms import SphinxPostTransform
+import os
+
+extensions = [
+    'sphinxcontrib.confluencebuilder',
+]
+
+
+class InjectImage(SphinxPostTransform):
+    default_priority = 999
+
+    def run(self):
+        image = os.path.join(self.env.srcdir, self.env.docname + '.png')
+        self.document.append(nodes.image(uri=image))
+
+
+def setup(app):
+    app.add_post_transform(InjectImage)
+'''
+
+# number of (child) documents to generate
+DOCUMENT_COUNT = 8
+
+
+class TestBuilderParallel(ConfluenceTestCase):
+    def test_builder_parallel_write_changes(self):
+        """validate changes from parallel writing are merged"""
+        #
+        # Verify that changes made while writing documents in parallel worker
+        # processes (e.g. assets registered by a translator) are available in
+        # the main process after writing has completed.
+
+        src_dir = prepare_dirs(postfix='-src')
+        os.makedirs(src_dir)
+
+        with open(os.path.join(src_dir, 'conf.py'), 'w') as f:
+            f.write(CONF)
+
+        docnames = ['doc{}'.format(idx) for idx in range(DOCUMENT_COUNT)]
+
+        image = os.path.join(self.assets_dir, 'image01.png')
+        for docname in ['index', *docnames]:
+            shutil.copyfile(image, os.path.join(src_dir, docname + '.png'))
+        with open(os.path.join(src_dir, 'index.rst'), 'w') as f:
+            f.write('index\n=====\n\n.. toctree::\n\n')
+            for docname in docnames:
+                f.write(f'    {docname}\n')
+
+        for idx, docname in enumerate(docnames):
+            next_docname = docnames[(idx + 1) % DOCUMENT_COUNT]
+            with open(os.path.join(src_dir, docname + '.rst'), 'w') as f:
+                f.write(f'{docname}\n=====\n\nSee :doc:`{next_docname}`.\n')
+
+        with self.prepare(src_dir, config=None, parallel=4) as app:
+            app.build(force_all=True)
+
+            self.assertTrue(app.builder.parallel_ok)
+
+            # assets registered in worker processes are tracked
+            for docname in ['index', *docnames]:
+                image = os.path.join(src_dir, docname + '.png')
+                asset = app.builder.assets.path2asset.get(image)
+                self.assertIsNotNone(asset)
+                self.assertEqual(asset.docnames, {docname})
+
+            # dependencies recorded in worker processes are tracked
+            for idx, docname in enumerate(docnames):
+                next_docname = docnames[(idx + 1) % DOCUMENT_COUNT]
+                self.assertIn(next_docname,
+                    app.builder.dependencies.docs[docname])
+
+    def test_builder_parallel_state_changes(self):
+        """validate state changes can be tracked and merged"""
+        #
+        # Verify that changes made to the state (after a snapshot) can be
+        # captured and merged back into another state.
+
+        ConfluenceState.reset()
+        ConfluenceState.register_target('existing', 'target')
+        snapshot = ConfluenceState.snapshot()
+
+        ConfluenceState.register_target('existing', 'updated')
+        ConfluenceState.register_target('new', 'target')
+        ConfluenceState.register_toctree_depth('index', 2)
+        changes = ConfluenceState.changes(snapshot)
+
+        ConfluenceState.reset()
+        ConfluenceState.merge(changes)
+
+        self.assertEqual(ConfluenceState.target('existing'), 'updated')
+        self.assertEqual(ConfluenceState.target('new'), 'target')
+        self.assertEqual(ConfluenceState.toctree_depth('index'), 2)
+        ConfluenceState.reset()
@@ -0,0 +1,161 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright Sphinx Confluence Builder Contributors (AUTHORS)
+
+from sphinxcontrib.confluencebuilder.builder import ConfluenceBuilder
+from sphinxcontrib.confluencebuilder.exceptions import ConfluenceMissingPageIdError
+from sphinxcontrib.confluencebuilder.pipeline import ConfluencePublishPipeline
+from tests.lib import prepare_dirs
+from tests.lib.standin import fetch_standin_stats
+from tests.lib.standin import standin_confluence_instance
+from tests.lib.testcase import ConfluenceTestCase
+from unittest.mock import patch
+import os
+import threading
+
+# number of (child) documents to generate
+DOCUMENT_COUNT = 8
+
+
+class TestBuilderPublishPipeline(ConfluenceTestCase):
+    def _prepare_dataset(self):
+        src_dir = prepare_dirs(postfix='-src')
+        os.makedirs(src_dir)
+
+        # (documents are named to be written after the root document, which
+        # is the first document published)
+        docnames = ['page{}'.format(idx) for idx in range(DOCUMENT_COUNT)]
+
+        with open(os.path.join(src_dir, 'index.rst'), 'w') as f:
+            f.write('overview\n========\n\n.. toctree::\n\n')
+            for docname in docnames:
+                f.write(f'    {docname}\n')
+
+        for idx, docname in enumerate(docnames):
+            next_docname = docnames[(idx + 1) % DOCUMENT_COUNT]
+            with open(os.path.join(src_dir, docname + '.rst'), 'w') as f:
+                f.write(f'{docname}\n=====\n\nSee :doc:`{next_docname}`.\n')
+
+        return src_dir, ['index', *docnames]
+
+    def _prepare_config(self):
+        config = self.config.clone()
+        config['confluence_publish'] = True
+        config['confluence_publish_pipeline'] = True
+        config['confluence_timeout'] = 5
+        config['confluence_use_index'] = True
+        return config
+
+    def _build(self, parallel):
+        config = self._prepare_config()
+        src_dir, docnames = self._prepare_dataset()
+
+        events = []
+        original_generate = ConfluenceBuilder._generate_special_document
+        original_join = ConfluencePublishPipeline.join
+        original_submit = ConfluencePublishPipeline.submit
+
+        def generate(builder, docname, *args, **kwargs):
+            events.append(('generate', docname))
+            return original_generate(builder, docname, *args, **kwargs)
+
+        def join(pipeline):
+            events.append(('join', None))
+            return original_join(pipeline)
+
+        def submit(pipeline, docname):
+            # a submitted document should have its writing changes merged
+            builder = pipeline.publish.__self__
+            if docname in docnames and docname != 'index':
+                self.assertIn(docname, builder.dependencies.docs)
+
+            events.append(('submit', docname))
+            return original_submit(pipeline, docname)
+
+        # track any publishing threads running when a process is forked
+        forked_threads = []
+        original_fork = os.fork
+
+        def fork():
+            forked_threads.append([t.name for t in threading.enumerate()
+                if t.name.startswith('ThreadPoolExecutor')])
+            return original_fork()
+
+        with standin_confluence_instance(config) as url, \
+                patch.object(os, 'fork', fork), \
+                patch.object(ConfluenceBuilder,
+                    '_generate_special_document', generate), \
+                patch.object(ConfluencePublishPipeline, 'join', join), \
+                patch.object(ConfluencePublishPipeline, 'submit', submit):
+            with self.prepare(src_dir, config=config,
+                    parallel=parallel) as app:
+                app.build(force_all=True)
+
+                self.assertEqual(app.builder.parallel_ok, parallel > 1)
+                self.assertIsNotNone(app.builder.state.upload_id('genindex'))
+                for docname in docnames:
+                    self.assertIsNotNone(app.builder.state.upload_id(docname))
+
+            stats = fetch_standin_stats(url)
+            self.assertEqual(stats['pages'], len(docnames) + 1)
+
+        # special documents are submitted when finishing
+        generated = events.index(('generate', 'genindex'))
+        self.assertGreater(events.index(('submit', 'genindex')), generated)
+        self.assertLess(events.index(('submit', 'genindex')),
+            events.index(('join', None)))
+
+        return docnames, events, forked_threads
+
+    def test_builder_publish_pipeline_failure(self):
+        """validate builder stops when failing to publish with a pipeline"""
+        #
+        # Verify that a failure to publish a document in a publish pipeline
+        # is raised by the build, no other documents are published and the
+        # pipeline is shutdown.
+
+        config = self._prepare_config()
+        config['confluence_publish_root'] = 999999
+        src_dir, _ = self._prepare_dataset()
+
+        with standin_confluence_instance(config) as url:
+            with self.assertRaises(ConfluenceMissingPageIdError):
+                self.build(src_dir, config=config)
+
+            stats = fetch_standin_stats(url)
+            self.assertEqual(stats['pages'], 0)
+
+        # no publishing threads should remain after a failed build
+        for thread in threading.enumerate():
+            self.assertFalse(thread.name.startswith('ThreadPoolExecutor'))
+
+    def test_builder_publish_pipeline_parallel(self):
+        """validate builder publishes with a pipeline (parallel)"""
+        #
+        # Verify that documents written in parallel are only submitted to a
+        # publish pipeline once all documents have been written, where no
+        # publishing threads are running when worker processes are forked.
+
+        docnames, events, forked_threads = self._build(parallel=4)
+
+        self.assertTrue(forked_threads)
+        for threads in forked_threads:
+            self.assertEqual(threads, [])
+
+        generated = events.index(('generate', 'genindex'))
+        for docname in docnames:
+            self.assertGreater(events.index(('submit', docname)), generated)
+
+    def test_builder_publish_pipeline_serial(self):
+        """validate builder publishes with a pipeline (serial)"""
+        #
+        # Verify that documents written serially are submitted to a publish
+        # pipeline as they are written (before any special document is
+        # generated).
+
+        docnames, events, forked_threads = self._build(parallel=0)
+
+        self.assertEqual(forked_threads, [])
+
+        generated = events.index(('generate', 'genindex'))
+        for docname in docnames:
+            self.assertLess(events.index(('submit', docname)), generated)
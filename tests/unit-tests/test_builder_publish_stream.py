@@ -0,0 +1,81 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright Sphinx Confluence Builder Contributors (AUTHORS)
+
+from sphinxcontrib.confluencebuilder.builder import ConfluenceBuilder
+from tests.lib import prepare_dirs
+from tests.lib.standin import standin_confluence_instance
+from tests.lib.standin import standin_request
+from tests.lib.testcase import ConfluenceTestCase
+from unittest.mock import patch
+import os
+import tracemalloc
+
+# (approximate) size of the large document to publish
+DOCUMENT_SIZE = 16 * 1024 * 1024
+
+
+class TestBuilderPublishStream(ConfluenceTestCase):
+    def test_builder_publish_stream_large_document(self):
+        """validate a large document is streamed when published"""
+        #
+        # Verify that when publishing a large document, the document's
+        # generated content is streamed into the page request (i.e. the
+        # entire document is never held in memory when publishing) while
+        # still publishing the complete document.
+
+        src_dir = prepare_dirs(postfix='-src')
+        os.makedirs(src_dir)
+
+        line = '<p>content "quoted" &amp; ☃</p>\n'
+        with open(os.path.join(src_dir, 'large.txt'), 'w',
+                encoding='utf-8') as f:
+            f.write(line * (DOCUMENT_SIZE // len(line.encode('utf-8'))))
+
+        with open(os.path.join(src_dir, 'index.rst'), 'w') as f:
+            f.write('''\
+large
+=====
+
+.. raw:: confluence_storage
+    :file: large.txt
+''')
+
+        config = self.config.clone()
+        config['confluence_publish'] = True
+        config['confluence_timeout'] = 30
+
+        peaks = []
+        original_publish_docname = ConfluenceBuilder._publish_docname
+
+        def tracked_publish_docname(builder, docname):
+            tracemalloc.start()
+            try:
+                original_publish_docname(builder, docname)
+                peaks.append(tracemalloc.get_traced_memory()[1])
+            finally:
+                tracemalloc.stop()
+
+        with standin_confluence_instance(config) as url, \
+                patch.object(ConfluenceBuilder, '_publish_docname',
+                    tracked_publish_docname):
+            out_dir = self.build(src_dir, config=config)
+
+            rsp = standin_request(url, 'GET', 'content', {
+                'spaceKey': 'STANDIN',
+                'title': 'large',
+                'expand': 'body.storage',
+            })
+
+        self.assertEqual(len(rsp['results']), 1)
+        published = rsp['results'][0]['body']['storage']['value']
+
+        with open(os.path.join(out_dir, 'index.conf'), encoding='utf-8') as f:
+            expected = f.read()
+
+        self.assertGreater(len(expected), DOCUMENT_SIZE // 2)
+        self.assertEqual(published, expected)
+
+        # the memory allocated when publishing should be a fraction of the
+        # document's size
+        self.assertEqual(len(peaks), 1)
+        self.assertLess(peaks[0], DOCUMENT_SIZE // 4)
@@ -0,0 +1,133 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright Sphinx Confluence Builder Contributors (AUTHORS)
+
+from concurrent.futures import ThreadPoolExecutor
+from sphinxcontrib.confluencebuilder.exceptions import ConfluenceBadApiError
+from sphinxcontrib.confluencebuilder.publisher import ConfluencePublisher
+from tests.lib import prepare_dirs
+from tests.lib.standin import fetch_standin_stats
+from tests.lib.standin import standin_confluence_instance
+from tests.lib.testcase import ConfluenceTestCase
+from unittest.mock import patch
+import os
+
+# number of (child) documents to generate
+DOCUMENT_COUNT = 4
+
+
+class TrackedThreadPoolExecutor(ThreadPoolExecutor):
+    """
+    a thread pool executor which tracks if it has been shutdown
+    """
+    instances = []
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.closed = False
+        TrackedThreadPoolExecutor.instances.append(self)
+
+    def shutdown(self, *args, **kwargs):
+        self.closed = True
+        super().shutdown(*args, **kwargs)
+
+
+class TestBuilderPublishWorkers(ConfluenceTestCase):
+    def setUp(self):
+        TrackedThreadPoolExecutor.instances = []
+
+        executor_patch = patch('sphinxcontrib.confluencebuilder.builder.'
+            'ThreadPoolExecutor', TrackedThreadPoolExecutor)
+        executor_patch.start()
+        self.addCleanup(executor_patch.stop)
+
+    def _prepare_dataset(self):
+        src_dir = prepare_dirs(postfix='-src')
+        os.makedirs(src_dir)
+
+        docnames = ['doc{}'.format(idx) for idx in range(DOCUMENT_COUNT)]
+
+        with open(os.path.join(src_dir, 'index.rst'), 'w') as f:
+            f.write('overview\n========\n\n.. toctree::\n\n')
+            for docname in docnames:
+                f.write(f'    {docname}\n')
+
+        for docname in docnames:
+            with open(os.path.join(src_dir, docname + '.rst'), 'w') as f:
+                f.write(f'{docname}\n====\n\ncontent\n')
+
+        return src_dir
+
+    def _prepare_config(self):
+        config = self.config.clone()
+        config['confluence_publish'] = True
+        config['confluence_publish_workers'] = 4
+        config['confluence_timeout'] = 5
+        return config
+
+    def _check_executors(self):
+        executors = TrackedThreadPoolExecutor.instances
+        self.assertTrue(executors)
+        for executor in executors:
+            self.assertTrue(executor.closed)
+
+    def test_builder_publish_workers(self):
+        """validate builder publishes with multiple workers"""
+        #
+        # Verify that documents can be published with multiple workers, where
+        # the pool of workers is shutdown once publishing has completed.
+
+        config = self._prepare_config()
+        src_dir = self._prepare_dataset()
+
+        with standin_confluence_instance(config) as url:
+            self.build(src_dir, config=config)
+
+            stats = fetch_standin_stats(url)
+            self.assertEqual(stats['pages'], DOCUMENT_COUNT + 1)
+
+        self._check_executors()
+
+    def test_builder_publish_workers_connections(self):
+        """validate builder limits connections used by multiple workers"""
+        #
+        # Verify that when publishing with multiple workers and a limited
+        # number of connections, the number of requests in-flight with an
+        # instance never exceeds the number of connections.
+
+        config = self._prepare_config()
+        config['confluence_publish_connections'] = 2
+        src_dir = self._prepare_dataset()
+
+        # (latency ensures requests from workers would overlap)
+        with standin_confluence_instance(config, latency=0.1) as url:
+            self.build(src_dir, config=config)
+
+            stats = fetch_standin_stats(url)
+            self.assertEqual(stats['pages'], DOCUMENT_COUNT + 1)
+            self.assertGreater(stats['peak_inflight'], 0)
+            self.assertLessEqual(stats['peak_inflight'], 2)
+
+        self._check_executors()
+
+    def test_builder_publish_workers_failure(self):
+        """validate builder shuts down workers when failing to publish"""
+        #
+        # Verify that if publishing a document with multiple workers fails,
+        # the failure is raised and the pool of workers is shutdown.
+
+        config = self._prepare_config()
+        src_dir = self._prepare_dataset()
+
+        original_store_page = ConfluencePublisher.store_page
+
+        def store_page(publisher, page_name, data, parent_id=None):
+            if page_name == 'doc1':
+                raise ConfluenceBadApiError(400, 'failed to publish')
+            return original_store_page(publisher, page_name, data, parent_id)
+
+        with standin_confluence_instance(config), \
+                patch.object(ConfluencePublisher, 'store_page', store_page):
+            with self.assertRaises(ConfluenceBadApiError):
+                self.build(src_dir, config=config)
+
+        self._check_executors()
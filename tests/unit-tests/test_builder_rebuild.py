@@ -0,0 +1,228 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright Sphinx Confluence Builder Contributors (AUTHORS)
+
+from sphinxcontrib.confluencebuilder.builder import ConfluenceBuilder
+from sphinxcontrib.confluencebuilder.cmd import watch
+from sphinxcontrib.confluencebuilder.cmd.watch import snapshot_sources
+from sphinxcontrib.confluencebuilder.cmd.watch import watch_main
+from sphinxcontrib.confluencebuilder.state import ConfluenceState
+from tests.lib import prepare_dirs
+from tests.lib.testcase import ConfluenceTestCase
+from unittest.mock import patch
+import argparse
+import io
+import os
+import sys
+import time
+
+# documents for a dataset where a document links to another document
+DOCUMENTS = {
+    'index': '''\
+index
+=====
+
+.. toctree::
+
+    first
+    second
+''',
+    'first': '''\
+first
+=====
+
+See :doc:`second`.
+''',
+    'second': '''\
+second
+======
+
+content
+''',
+}
+
+
+class TestBuilderRebuild(ConfluenceTestCase):
+    def _prepare_dataset(self):
+        src_dir = prepare_dirs(postfix='-src')
+        os.makedirs(src_dir)
+
+        for docname, content in DOCUMENTS.items():
+            with open(os.path.join(src_dir, docname + '.rst'), 'w') as f:
+                f.write(content)
+
+        return src_dir
+
+    def _change(self, src_dir, docname, content):
+        doc_path = os.path.join(src_dir, docname + '.rst')
+        with open(doc_path, 'w') as f:
+            f.write(content)
+
+        # ensure the source is newer than any generated output
+        mtime = time.time() + 10
+        os.utime(doc_path, (mtime, mtime))
+
+    def test_builder_rebuild(self):
+        """validate a builder kept alive can rebuild changed documents"""
+        #
+        # Verify that a builder which is kept alive can perform another build
+        # using the same application, where only affected documents are
+        # written and titles are registered without conflicts.
+
+        src_dir = self._prepare_dataset()
+        out_dir = prepare_dirs()
+
+        with self.prepare(src_dir, out_dir=out_dir) as app:
+            app.builder.keep_alive = True
+            app.build(force_all=True)
+
+            self.assertEqual(ConfluenceState.title('first'), 'first')
+            ConfluenceState.register_upload_id('index', '1')
+
+            second_file = os.path.join(out_dir, 'second.conf')
+            mtime = os.path.getmtime(second_file)
+            read_time = app.env.all_docs['second']
+
+            self._change(src_dir, 'first', DOCUMENTS['first'].replace(
+                'first\n=====', 'updated\n======='))
+
+            app.builder.prepare_rebuild()
+            app.build()
+
+            # only the changed document is read, and only the changed document
+            # and documents depending on it are written/published
+            self.assertEqual(app.env.all_docs['second'], read_time)
+            self.assertEqual(app.builder.publish_docnames, ['index', 'first'])
+            self.assertEqual(os.path.getmtime(second_file), mtime)
+
+            self.assertEqual(ConfluenceState.title('first'), 'updated')
+            self.assertEqual(ConfluenceState.title('second'), 'second')
+            self.assertEqual(ConfluenceState.upload_id('index'), '1')
+
+            with open(os.path.join(out_dir, 'index.conf'),
+                    encoding='utf-8') as f:
+                self.assertIn('updated', f.read())
+
+    def _change_template(self, template, content, offset):
+        with open(template, 'w') as f:
+            f.write(content)
+
+        # ensure the template is newer than any generated output
+        mtime = time.time() + offset
+        os.utime(template, (mtime, mtime))
+
+    def test_builder_rebuild_template(self):
+        """validate a rebuild applies a modified header template"""
+        #
+        # Verify that when a header template is modified, a rebuild considers
+        # all documents as outdated and the updated template is used.
+
+        src_dir = self._prepare_dataset()
+        out_dir = prepare_dirs()
+
+        template = os.path.join(src_dir, 'header.tpl')
+        with open(template, 'w') as f:
+            f.write('header v1')
+
+        config = dict(self.config)
+        config['confluence_header_file'] = template
+
+        with self.prepare(src_dir, config=config, out_dir=out_dir) as app:
+            app.builder.keep_alive = True
+            app.build(force_all=True)
+
+            self._change_template(template, 'header v2', 10)
+
+            app.builder.prepare_rebuild()
+            self.assertEqual(app.builder._templates, {})
+            app.build()
+
+            self.assertEqual(set(app.builder.publish_docnames), set(DOCUMENTS))
+
+            for docname in DOCUMENTS:
+                output = os.path.join(out_dir, docname + '.conf')
+                with open(output, encoding='utf-8') as f:
+                    self.assertIn('header v2', f.read())
+
+    def test_builder_rebuild_watch(self):
+        """validate watching rebuilds on changes and survives failures"""
+        #
+        # Verify that a watch session rebuilds documents when a header template
+        # is modified, and that a failed rebuild (with an error which is not a
+        # Sphinx error) is reported without stopping the watch session.
+
+        src_dir = self._prepare_dataset()
+        out_dir = prepare_dirs()
+
+        template = os.path.join(src_dir, 'header.tpl')
+        with open(template, 'w') as f:
+            f.write('header v1')
+
+        with open(os.path.join(src_dir, 'conf.py'), 'w') as f:
+            f.write("extensions = ['sphinxcontrib.confluencebuilder']\n")
+            f.write("confluence_header_file = 'header.tpl'\n")
+
+        parser = argparse.ArgumentParser(add_help=False)
+        parser.add_argument('action', nargs='?')
+        parser.add_argument('--verbose', '-V', action='count', default=0)
+        parser.add_argument('--work-dir')
+
+        argv = ['sphinx-build-confluence', 'watch', '--interval', '0',
+            '--output-dir', out_dir, '--work-dir', src_dir]
+
+        # each rebuild triggered by a template change: the first rebuild fails
+        finish_calls = []
+        original_finish = ConfluenceBuilder.finish
+
+        def finish(builder):
+            finish_calls.append(None)
+            if len(finish_calls) == 2:
+                raise OSError('failed to write')
+            original_finish(builder)
+
+        sleeps = []
+
+        def sleep(_):
+            sleeps.append(None)
+            if len(sleeps) == 1:
+                self._change_template(template, 'header v2', 10)
+            elif len(sleeps) == 3:
+                self._change_template(template, 'header v3', 20)
+            elif len(sleeps) == 5:
+                raise KeyboardInterrupt
+
+        with patch.object(sys, 'argv', argv), \
+                patch.object(sys, 'stdout', io.StringIO()), \
+                patch.object(sys, 'stderr', io.StringIO()), \
+                patch.object(watch.time, 'sleep', sleep), \
+                patch.object(ConfluenceBuilder, 'finish', finish):
+            rv = watch_main(parser)
+
+        self.assertEqual(rv, 0)
+        self.assertEqual(len(finish_calls), 3)
+
+        with open(os.path.join(out_dir, 'index.conf'), encoding='utf-8') as f:
+            self.assertIn('header v3', f.read())
+
+    def test_builder_rebuild_snapshot(self):
+        """validate source snapshots detect changes"""
+        #
+        # Verify that a snapshot of a source directory changes when a source
+        # is modified or added, and ignores configured/hidden directories.
+
+        src_dir = self._prepare_dataset()
+        out_dir = os.path.join(src_dir, '_build')
+        hidden_dir = os.path.join(src_dir, '.hidden')
+        os.makedirs(out_dir)
+        os.makedirs(hidden_dir)
+
+        snapshot = snapshot_sources(src_dir, [out_dir])
+        self.assertEqual(len(snapshot), len(DOCUMENTS))
+
+        with open(os.path.join(out_dir, 'index.conf'), 'w') as f:
+            f.write('output')
+        with open(os.path.join(hidden_dir, 'file'), 'w') as f:
+            f.write('hidden')
+        self.assertEqual(snapshot_sources(src_dir, [out_dir]), snapshot)
+
+        self._change(src_dir, 'first', 'changed\n=======\n')
+        self.assertNotEqual(snapshot_sources(src_dir, [out_dir]), snapshot)
@@ -293,6 +293,21 @@ class TestConfluenceConfigChecks(unittest.TestCase):
         with self.assertRaises(ConfluenceConfigurationError):
             self._try_config()
 
+    def test_config_check_doctree_cache_size(self):
+        self.config['confluence_doctree_cache_size'] = 100
+        self._try_config()
+
+        self.config['confluence_doctree_cache_size'] = '50'
+        self._try_config()
+
+        self.config['confluence_doctree_cache_size'] = 0
+        with self.assertRaises(ConfluenceConfigurationError):
+            self._try_config()
+
+        self.config['confluence_doctree_cache_size'] = 'abc'
+        with self.assertRaises(ConfluenceConfigurationError):
+            self._try_config()
+
     def test_config_check_editor(self):
         self.config['confluence_editor'] = None
         self._try_config()
@@ -590,6 +605,21 @@ class TestConfluenceConfigChecks(unittest.TestCase):
         with self.assertRaises(ConfluenceConfigurationError):
             self._try_config()
 
+    def test_config_check_publish_connections(self):
+        self.config['confluence_publish_connections'] = 4
+        self._try_config()
+
+        self.config['confluence_publish_connections'] = '2'
+        self._try_config()
+
+        self.config['confluence_publish_connections'] = 0
+        with self.assertRaises(ConfluenceConfigurationError):
+            self._try_config()
+
+        self.config['confluence_publish_connections'] = 'abc'
+        with self.assertRaises(ConfluenceConfigurationError):
+            self._try_config()
+
     def test_config_check_publish_delay(self):
         self.config['confluence_publish_delay'] = 0.3
         self._try_config()
@@ -604,6 +634,21 @@ class TestConfluenceConfigChecks(unittest.TestCase):
         with self.assertRaises(ConfluenceConfigurationError):
             self._try_config()
 
+    def test_config_check_publish_workers(self):
+        self.config['confluence_publish_workers'] = 4
+        self._try_config()
+
+        self.config['confluence_publish_workers'] = '2'
+        self._try_config()
+
+        self.config['confluence_publish_workers'] = 0
+        with self.assertRaises(ConfluenceConfigurationError):
+            self._try_config()
+
+        self.config['confluence_publish_workers'] = 'abc'
+        with self.assertRaises(ConfluenceConfigurationError):
+            self._try_config()
+
     def test_config_check_publish_headers(self):
         self.config['confluence_publish_headers'] = {}
         self._try_config()
@@ -1,6 +1,7 @@
 # SPDX-License-Identifier: BSD-2-Clause
 # Copyright Sphinx Confluence Builder Contributors (AUTHORS)
 
+from tests.lib import prepare_dirs
 from tests.lib.parse import parse
 from tests.lib.testcase import ConfluenceTestCase
 from tests.lib.testcase import setup_builder
@@ -78,3 +79,56 @@ class TestConfluenceConfigHeaderFooter(ConfluenceTestCase):
 
             footer_data = body.nextSibling.strip()
             self.assertEqual(footer_data, 'footer content footer_value')
+
+    @setup_builder('confluence')
+    def test_storage_config_headerfooter_with_jinja_callable(self):
+        config = dict(self.config)
+
+        tpl_dir = prepare_dirs(postfix='-tpl')
+        os.makedirs(tpl_dir)
+        header_tpl = os.path.join(tpl_dir, 'header.tpl')
+        with open(header_tpl, 'w') as f:
+            f.write('header content {{ variable() }}')
+
+        config['confluence_header_data'] = {
+            'variable': lambda: 'header_value',
+        }
+        config['confluence_header_file'] = header_tpl
+
+        out_dir = self.build(self.dataset, config=config)
+
+        with parse('index', out_dir) as data:
+            body = data.find('p')
+            self.assertIsNotNone(body)
+
+            header_data = body.previousSibling.strip()
+            self.assertEqual(header_data, 'header content header_value')
+
+    @setup_builder('confluence')
+    def test_storage_config_headerfooter_modified(self):
+        config = dict(self.config)
+
+        tpl_dir = prepare_dirs(postfix='-tpl')
+        os.makedirs(tpl_dir)
+        header_tpl = os.path.join(tpl_dir, 'header.tpl')
+        with open(header_tpl, 'w') as f:
+            f.write('header content {{ variable }}')
+
+        config['confluence_header_data'] = {
+            'variable': 'header_value',
+        }
+        config['confluence_header_file'] = header_tpl
+
+        with self.prepare(self.dataset, config=config) as app:
+            header_data = app.builder.template_data('header')
+            self.assertEqual(header_data, 'header content header_value')
+
+            # a modified template should be loaded again
+            with open(header_tpl, 'w') as f:
+                f.write('updated header content {{ variable }}')
+            mtime = os.path.getmtime(header_tpl) + 10
+            os.utime(header_tpl, (mtime, mtime))
+
+            header_data = app.builder.template_data('header')
+            self.assertEqual(header_data,
+                'updated header content header_value')
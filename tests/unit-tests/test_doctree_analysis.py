@@ -0,0 +1,89 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright Sphinx Confluence Builder Contributors (AUTHORS)
+
+from docutils import nodes
+from docutils.core import publish_doctree
+from sphinx import addnodes
+from sphinxcontrib.confluencebuilder.analysis import ConfluenceDoctreeAnalysis
+from sphinxcontrib.confluencebuilder.nodes import confluence_metadata
+import unittest
+
+# sample document with a title, subsections and an image
+SAMPLE_DOCUMENT = '''\
+first
+=====
+
+content
+
+.. image:: image.png
+
+second
+------
+
+content
+
+third
+-----
+
+content
+'''
+
+
+class TestDoctreeAnalysis(unittest.TestCase):
+    def test_doctree_analysis(self):
+        """validate information collected by a doctree analysis"""
+        #
+        # Verify that a doctree analysis collects the same information which
+        # would be found by searching a doctree for each individual item.
+
+        settings = {
+            'doctitle_xform': False,
+            'report_level': 5,
+        }
+        doctree = publish_doctree(SAMPLE_DOCUMENT,
+            settings_overrides=settings)
+
+        toctree = addnodes.toctree()
+        metadata = confluence_metadata()
+        doctree.append(toctree)
+        doctree.append(metadata)
+
+        analysis = ConfluenceDoctreeAnalysis(doctree)
+
+        section = doctree.next_node(nodes.section)
+        self.assertIs(analysis.title_element, section.next_node(nodes.title))
+
+        titles = [node.astext() for node in analysis.section_titles]
+        self.assertEqual(titles, ['first', 'second', 'third'])
+
+        self.assertIs(analysis.toctree, toctree)
+        self.assertEqual(analysis.metadata, [metadata])
+
+        self.assertTrue(analysis.contains(nodes.image))
+        self.assertTrue(analysis.contains(nodes.Element))
+        self.assertFalse(analysis.contains(nodes.math, nodes.math_block))
+        self.assertFalse(analysis.has_extension_nodes())
+
+        analysis.track(nodes.math)
+        self.assertTrue(analysis.contains(nodes.math, nodes.math_block))
+
+    def test_doctree_analysis_extension_nodes(self):
+        """validate a doctree analysis detects third-party node types"""
+        #
+        # Verify that a doctree analysis reports when a doctree contains
+        # node types which are not provided by docutils, Sphinx or this
+        # extension.
+
+        class custom_node(nodes.General, nodes.Element):
+            pass
+        custom_node.__module__ = 'third_party'
+
+        doctree = publish_doctree('content', settings_overrides={
+            'report_level': 5,
+        })
+        self.assertFalse(
+            ConfluenceDoctreeAnalysis(doctree).has_extension_nodes())
+
+        doctree.append(custom_node())
+        self.assertTrue(
+            ConfluenceDoctreeAnalysis(doctree).has_extension_nodes())
@@ -0,0 +1,190 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright Sphinx Confluence Builder Contributors (AUTHORS)
+
+from sphinxcontrib.confluencebuilder.metrics import METRICS_FILENAME
+from sphinxcontrib.confluencebuilder.metrics import ConfluenceMetrics
+from sphinxcontrib.confluencebuilder.metrics import rest_operation
+from sphinxcontrib.confluencebuilder.publisher import ConfluencePublisher
+from tests.lib import autocleanup_publisher
+from tests.lib import build_sphinx
+from tests.lib import mock_confluence_instance
+from tests.lib import prepare_conf
+from tests.lib import prepare_conf_publisher
+from tests.lib import prepare_dirs
+import json
+import os
+import unittest
+
+
+class TestMetrics(unittest.TestCase):
+    def test_metrics_build_report(self):
+        """validate a build generates a metrics report (if configured)"""
+        #
+        # Verify that a build configured to generate a metrics report will
+        # store a report with the timings of each build phase.
+
+        dataset = os.path.join(os.path.dirname(os.path.realpath(__file__)),
+            'datasets', 'common')
+
+        config = prepare_conf()
+        out_dir = build_sphinx(dataset, config=config)
+        self.assertFalse(os.path.exists(
+            os.path.join(out_dir, METRICS_FILENAME)))
+
+        config['confluence_publish_metrics'] = True
+        out_dir = build_sphinx(dataset, config=config)
+
+        with open(os.path.join(out_dir, METRICS_FILENAME),
+                encoding='utf-8') as f:
+            report = json.load(f)
+
+        for phase in ('prepare', 'transmute', 'write'):
+            self.assertIn(phase, report['phases'])
+            self.assertGreater(report['phases'][phase]['count'], 0)
+
+        self.assertEqual(report['operations'], {})
+
+    def test_metrics_report(self):
+        """validate metrics are aggregated into a report"""
+        #
+        # Verify that tracked calls, requests and phases are aggregated into
+        # a report which can be saved as json.
+
+        metrics = ConfluenceMetrics()
+
+        metrics.call('page-update', 3.5, retries=1, backoff=2.5)
+        metrics.request('page-update', 0.2, sent=100, received=10,
+            status=429)
+        metrics.request('page-update', 0.8, sent=100, received=50,
+            status=200)
+        metrics.call('page-lookup', 0.1)
+        metrics.request('page-lookup', 0.01, received=20, status=200)
+        metrics.call('page-lookup', 0.1, failed=True)
+        metrics.request('page-lookup', 30, status=404)
+
+        with metrics.phase('write'):
+            pass
+        with metrics.phase('write'):
+            pass
+
+        out_dir = prepare_dirs()
+        os.makedirs(out_dir)
+        metrics_file = os.path.join(out_dir, 'metrics.json')
+        metrics.save(metrics_file)
+
+        with open(metrics_file, encoding='utf-8') as f:
+            report = json.load(f)
+
+        update = report['operations']['page-update']
+        self.assertEqual(update['calls'], 1)
+        self.assertEqual(update['requests'], 2)
+        self.assertEqual(update['rate_limited'], 1)
+        self.assertEqual(update['retries'], 1)
+        self.assertEqual(update['backoff'], 2.5)
+        self.assertEqual(update['sent'], 200)
+        self.assertEqual(update['received'], 60)
+        self.assertEqual(update['latency']['min'], 0.2)
+        self.assertEqual(update['latency']['max'], 0.8)
+        self.assertAlmostEqual(update['latency']['mean'], 0.5)
+        self.assertEqual(update['latency']['histogram']['0.25'], 1)
+        self.assertEqual(update['latency']['histogram']['1'], 1)
+
+        lookup = report['operations']['page-lookup']
+        self.assertEqual(lookup['calls'], 2)
+        self.assertEqual(lookup['errors'], 1)
+        self.assertEqual(lookup['failures'], 1)
+        self.assertEqual(lookup['latency']['histogram']['inf'], 1)
+
+        self.assertEqual(report['phases']['write']['count'], 2)
+        self.assertEqual(report['totals']['calls'], 3)
+        self.assertEqual(report['totals']['requests'], 4)
+        self.assertEqual(report['totals']['sent'], 200)
+
+    def test_metrics_rest_operation(self):
+        """validate rest requests are mapped to operations"""
+        #
+        # Verify that the method/key of each REST request made by a publisher
+        # maps to an expected operation.
+
+        expected = [
+            ('get', 'content', 'page-lookup'),
+            ('get', 'content/123', 'page-lookup'),
+            ('post', 'content', 'page-create'),
+            ('post', 'content?expand=metadata.labels', 'page-create'),
+            ('put', 'content', 'page-update'),
+            ('DELETE', 'content', 'delete'),
+            ('get', 'content/search', 'search'),
+            ('get', 'search', 'search'),
+            ('get', 'content/123/descendant/page', 'descendant-search'),
+            ('get', 'content/123/child/attachment', 'attachment-lookup'),
+            ('post', 'content/123/child/attachment', 'attachment-upload'),
+            ('post', 'content/123/child/attachment/456/data',
+                'attachment-upload'),
+            ('post', 'content/123/label', 'label-update'),
+            ('post', 'content/archive', 'page-archive'),
+            ('get', 'longtask/123', 'task-status'),
+            ('get', 'space', 'space-lookup'),
+            ('put', 'space', 'space-update'),
+            ('delete', 'user/watch/content', 'watch-update'),
+            ('get', 'user/watch/content/123', 'watch-lookup'),
+            ('get', 'other/endpoint', 'get:other'),
+        ]
+
+        for method, key, operation in expected:
+            self.assertEqual(rest_operation(method, key), operation,
+                msg=f'{method} {key}')
+
+    def test_metrics_rest_requests(self):
+        """validate rest requests are tracked in metrics"""
+        #
+        # Verify that requests made by a publisher are tracked in the
+        # provided metrics instance.
+
+        config = prepare_conf_publisher()
+        config.confluence_watch = True
+        metrics = ConfluenceMetrics()
+
+        space_rsp = {
+            'size': 1,
+            'results': [{
+                'name': 'Mock Space',
+                'type': 'global',
+            }],
+        }
+
+        page_rsp = {
+            'id': '7456',
+            'title': 'mock page',
+            'type': 'page',
+            'version': {
+                'number': '28',
+            },
+        }
+
+        with mock_confluence_instance(config) as daemon, \
+                autocleanup_publisher(ConfluencePublisher) as publisher:
+            daemon.register_get_rsp(200, space_rsp)
+            daemon.register_get_rsp(200, page_rsp)
+            daemon.register_put_rsp(200, dict(page_rsp))
+
+            publisher.metrics = metrics
+            publisher.init(config)
+            publisher.connect()
+            publisher.store_page_by_id('dummy-name', 7456, {
+                'content': 'dummy page data',
+                'labels': [],
+            })
+
+        report = metrics.report()
+        operations = report['operations']
+
+        self.assertEqual(operations['space-lookup']['calls'], 1)
+        self.assertEqual(operations['page-lookup']['calls'], 1)
+        self.assertGreater(operations['page-lookup']['received'], 0)
+
+        update = operations['page-update']
+        self.assertEqual(update['calls'], 1)
+        self.assertEqual(update['requests'], 1)
+        self.assertGreater(update['sent'], 0)
+        self.assertGreater(update['received'], 0)
+        self.assertEqual(update['rate_limited'], 0)
@@ -0,0 +1,76 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright Sphinx Confluence Builder Contributors (AUTHORS)
+
+from sphinxcontrib.confluencebuilder.manifest import ConfluencePublishManifest
+from tests.lib import prepare_dirs
+import os
+import unittest
+
+
+class TestPublishManifest(unittest.TestCase):
+    def test_publish_manifest_load_save(self):
+        """validate a publish manifest can be restored"""
+        #
+        # Verify that entries tracked in a saved publish manifest can be
+        # used by a new manifest instance for the same target.
+
+        out_dir = prepare_dirs()
+        os.makedirs(out_dir)
+        manifest_file = os.path.join(out_dir, 'manifest.json')
+        target = ['https://example.com/', 'TEST', None, None]
+
+        manifest = ConfluencePublishManifest(manifest_file, target)
+        manifest.load()
+        self.assertIsNone(manifest.page('index', 'abc'))
+
+        manifest.track_page('index', '123', 4, 'abc')
+        manifest.track_attachment('index', 'image.png', 'att456', 'def')
+        manifest.save()
+
+        manifest = ConfluencePublishManifest(manifest_file, target)
+        manifest.load()
+
+        self.assertEqual(manifest.page('index', 'abc'), '123')
+        self.assertIsNone(manifest.page('index', 'changed'))
+        self.assertIsNone(manifest.page('other', 'abc'))
+        self.assertEqual(manifest.version('index'), 4)
+        self.assertIsNone(manifest.version('other'))
+
+        self.assertEqual(manifest.attachment(
+            'index', '123', 'image.png', 'def'), 'att456')
+        self.assertIsNone(manifest.attachment(
+            'index', '123', 'image.png', 'changed'))
+        self.assertIsNone(manifest.attachment(
+            'index', '789', 'image.png', 'def'))
+
+        # a page published to a new page should drop tracked attachments
+        manifest.track_page('index', '789', 1, 'abc')
+        self.assertIsNone(manifest.attachment(
+            'index', '789', 'image.png', 'def'))
+
+        # entries for removed documents can be pruned
+        manifest.prune(['other'])
+        self.assertIsNone(manifest.page('index', 'abc'))
+
+        # entries can be discarded (e.g. a tracked page no longer exists)
+        manifest.track_page('index', '789', 1, 'abc')
+        manifest.discard('index')
+        self.assertIsNone(manifest.page('index', 'abc'))
+
+    def test_publish_manifest_target_change(self):
+        """validate a publish manifest is ignored for another target"""
+        #
+        # Verify that a saved publish manifest will not be used when
+        # publishing to a different target.
+
+        out_dir = prepare_dirs()
+        os.makedirs(out_dir)
+        manifest_file = os.path.join(out_dir, 'manifest.json')
+
+        manifest = ConfluencePublishManifest(manifest_file, ['a', 'SPACE'])
+        manifest.track_page('index', '123', 4, 'abc')
+        manifest.save()
+
+        manifest = ConfluencePublishManifest(manifest_file, ['b', 'SPACE'])
+        manifest.load()
+        self.assertIsNone(manifest.page('index', 'abc'))
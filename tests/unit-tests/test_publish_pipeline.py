@@ -0,0 +1,124 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright Sphinx Confluence Builder Contributors (AUTHORS)
+
+from sphinxcontrib.confluencebuilder.pipeline import ConfluencePublishPipeline
+import threading
+import time
+import unittest
+
+
+class TestPublishPipeline(unittest.TestCase):
+    def setUp(self):
+        self.lock = threading.Lock()
+        self.published = []
+
+        # index
+        #  +- a
+        #  |  +- a1
+        #  |  +- a2
+        #  +- b
+        #     +- b1
+        self.parents = {
+            'a': 'index',
+            'a1': 'a',
+            'a2': 'a',
+            'b': 'index',
+            'b1': 'b',
+        }
+        self.docnames = ['index', 'a', 'a1', 'a2', 'b', 'b1']
+
+    def publish(self, docname):
+        time.sleep(0.01)
+        with self.lock:
+            self.published.append(docname)
+
+    def test_publish_pipeline_failure(self):
+        """validate a publish pipeline reports publish failures"""
+        #
+        # Verify that a failure to publish a document will prevent other
+        # documents from being published and is raised to the caller.
+
+        def publish(docname):
+            if docname == 'a':
+                msg = 'failed to publish'
+                raise RuntimeError(msg)
+            self.publish(docname)
+
+        pipeline = ConfluencePublishPipeline(publish, self.docnames,
+            self.parents.get, root='index')
+
+        for docname in ['index', 'a', 'a1']:
+            pipeline.submit(docname)
+
+        with self.assertRaises(RuntimeError):
+            list(pipeline.join())
+
+        self.assertEqual(self.published, ['index'])
+
+        with self.assertRaises(RuntimeError):
+            pipeline.submit('b')
+
+    def test_publish_pipeline_missing_parent(self):
+        """validate a publish pipeline handles unsubmitted parents"""
+        #
+        # Verify that documents waiting on a parent document which has not
+        # been submitted are published once the pipeline is joined.
+
+        pipeline = ConfluencePublishPipeline(self.publish, self.docnames,
+            self.parents.get, root='index')
+
+        for docname in ['index', 'a1', 'b', 'b1']:
+            pipeline.submit(docname)
+
+        # wait for documents with submitted parents to be published
+        for _ in range(100):
+            with self.lock:
+                if len(self.published) == 3:
+                    break
+            time.sleep(0.01)
+
+        with self.lock:
+            self.assertNotIn('a1', self.published)
+
+        published = list(pipeline.join())
+        self.assertCountEqual(published, ['index', 'a1', 'b', 'b1'])
+        self.assertEqual(self.published[-1], 'a1')
+
+    def test_publish_pipeline_order(self):
+        """validate a publish pipeline publishes parents before children"""
+        #
+        # Verify that documents submitted in any order are published after the
+        # root document and their parent documents.
+
+        for workers in (None, 4):
+            self.published = []
+
+            pipeline = ConfluencePublishPipeline(self.publish, self.docnames,
+                self.parents.get, root='index', workers=workers)
+
+            for docname in reversed(self.docnames):
+                pipeline.submit(docname)
+
+            published = list(pipeline.join())
+            self.assertCountEqual(published, self.docnames)
+            self.assertEqual(published, self.published)
+
+            self.assertEqual(self.published[0], 'index')
+            for docname, parent in self.parents.items():
+                self.assertLess(self.published.index(parent),
+                    self.published.index(docname))
+
+    def test_publish_pipeline_unexpected(self):
+        """validate a publish pipeline publishes unexpected documents"""
+        #
+        # Verify that documents which were not expected to be published (e.g.
+        # generated documents) are published after the root document.
+
+        pipeline = ConfluencePublishPipeline(self.publish, self.docnames,
+            self.parents.get, root='index')
+
+        pipeline.submit('genindex')
+        pipeline.submit('index')
+
+        published = list(pipeline.join())
+        self.assertEqual(published, ['index', 'genindex'])
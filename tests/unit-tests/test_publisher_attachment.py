@@ -0,0 +1,82 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright Sphinx Confluence Builder Contributors (AUTHORS)
+
+from sphinxcontrib.confluencebuilder.publisher import ConfluencePublisher
+from tests.lib import autocleanup_publisher
+from tests.lib import mock_confluence_instance
+from tests.lib import prepare_conf_publisher
+import unittest
+
+
+class TestConfluencePublisherAttachment(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.config = prepare_conf_publisher()
+
+        cls.std_space_connect_rsp = {
+            'size': 1,
+            'results': [{
+                'name': 'Mock Space',
+                'type': 'global',
+            }],
+        }
+
+    def test_publisher_attachment_store_unchanged(self):
+        """validate publisher will not publish an unchanged attachment"""
+        #
+        # Verify that a publisher will check a page's attachments once and
+        # will not perform any requests for attachments which have already
+        # been published with the same hash.
+
+        with mock_confluence_instance(self.config) as daemon, \
+                autocleanup_publisher(ConfluencePublisher) as publisher:
+            daemon.register_get_rsp(200, self.std_space_connect_rsp)
+
+            publisher.init(self.config)
+            publisher.connect()
+
+            # consume connect request
+            self.assertIsNotNone(daemon.pop_get_request())
+
+            # prepare response for a page's attachments
+            page_id = '9134'
+            attachments_rsp = {
+                'limit': 1000,
+                'results': [
+                    {
+                        'id': 'att101',
+                        'title': 'image-a.png',
+                        'metadata': {
+                            'comment': 'SCB_KEY:1234abcd',
+                        },
+                    },
+                    {
+                        'id': 'att102',
+                        'title': 'image-b.png',
+                        'metadata': {
+                            'comment': 'SCB_KEY:5678\nefab',
+                        },
+                    },
+                ],
+                'size': 2,
+            }
+            daemon.register_get_rsp(200, attachments_rsp)
+
+            attachment_id = publisher.store_attachment(page_id,
+                'image-a.png', b'', 'image/png', '1234abcd')
+            self.assertEqual(attachment_id, 'att101')
+
+            attachment_id = publisher.store_attachment(page_id,
+                'image-b.png', b'', 'image/png', '5678efab')
+            self.assertEqual(attachment_id, 'att102')
+
+            # check that a single attachment listing request was made
+            fetch_req = daemon.pop_get_request()
+            self.assertIsNotNone(fetch_req)
+            req_path, _ = fetch_req
+
+            expected_request = f'/rest/api/content/{page_id}/child/attachment?'
+            self.assertTrue(req_path.startswith(expected_request))
+
+            # verify that no other request was made
+            daemon.check_unhandled_requests()
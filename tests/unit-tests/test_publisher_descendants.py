@@ -0,0 +1,94 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright Sphinx Confluence Builder Contributors (AUTHORS)
+
+from sphinxcontrib.confluencebuilder.publisher import ConfluencePublisher
+from tests.lib import autocleanup_publisher
+from tests.lib import mock_confluence_instance
+from tests.lib import prepare_conf_publisher
+import unittest
+
+
+class TestConfluencePublisherDescendants(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.config = prepare_conf_publisher()
+
+        cls.std_space_connect_rsp = {
+            'size': 1,
+            'results': [{
+                'name': 'Mock Space',
+                'type': 'global',
+            }],
+        }
+
+    def test_publisher_descendants_sweep(self):
+        """validate publisher can find descendants with a sweep"""
+        #
+        # Verify that a publisher can find descendants using a sweep of a
+        # space's pages, re-checking only pages which are not reported by a
+        # descendant search.
+
+        with mock_confluence_instance(self.config) as daemon, \
+                autocleanup_publisher(ConfluencePublisher) as publisher:
+            daemon.register_get_rsp(200, self.std_space_connect_rsp)
+
+            publisher.init(self.config)
+            publisher.connect()
+
+            # consume connect request
+            self.assertIsNotNone(daemon.pop_get_request())
+
+            def page(id_, ancestors):
+                return {
+                    'id': id_,
+                    'title': 'page ' + id_,
+                    'ancestors': [{'id': ancestor} for ancestor in ancestors],
+                }
+
+            # prepare response for a space's pages, where the page `4` has
+            # an incomplete ancestor chain (only its direct parent)
+            sweep_rsp = {
+                'limit': 1000,
+                'results': [
+                    page('1', ['100']),
+                    page('2', ['100', '1']),
+                    page('3', []),
+                    page('4', ['2']),
+                ],
+                'size': 4,
+            }
+            daemon.register_get_rsp(200, sweep_rsp)
+
+            # prepare response for a descendant search, which does not report
+            # the page `4`
+            search_rsp = {
+                'limit': 1000,
+                'results': [
+                    page('1', ['100']),
+                    page('2', ['100', '1']),
+                ],
+                'size': 2,
+            }
+            daemon.register_get_rsp(200, search_rsp)
+
+            # prepare response for a re-check on the page `4`
+            daemon.register_get_rsp(200, {
+                'limit': 1000,
+                'results': [],
+                'size': 0,
+            })
+
+            descendants = publisher.get_descendants('100', 'sweep')
+            self.assertEqual(descendants, {'1', '2', '4'})
+
+            # sweep, descendant search and re-check requests
+            self.assertIsNotNone(daemon.pop_get_request())
+            self.assertIsNotNone(daemon.pop_get_request())
+
+            recheck_req = daemon.pop_get_request()
+            self.assertIsNotNone(recheck_req)
+            req_path, _ = recheck_req
+            self.assertIn('ancestor%3D4', req_path)
+
+            # verify that no other request was made
+            daemon.check_unhandled_requests()
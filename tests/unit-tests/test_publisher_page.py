@@ -2,6 +2,7 @@
 # Copyright Sphinx Confluence Builder Contributors (AUTHORS)
 
 from sphinxcontrib.confluencebuilder.publisher import ConfluencePublisher
+from sphinxcontrib.confluencebuilder.publisher import PAGE_FINGERPRINT_KEY
 from tests.lib import autocleanup_publisher
 from tests.lib import mock_confluence_instance
 from tests.lib import prepare_conf_publisher
@@ -118,7 +119,8 @@ class TestConfluencePublisherPage(unittest.TestCase):
             # prepare response for update event
             daemon.register_put_rsp(200, dict(page_fetch_rsp))
 
-            # prepare response for unwatch event
+            # prepare response for watch check and unwatch event
+            daemon.register_get_rsp(200, {'watching': True})
             daemon.register_delete_rsp(200)
 
             # perform page update request
@@ -144,6 +146,13 @@ class TestConfluencePublisherPage(unittest.TestCase):
             update_req = daemon.pop_put_request()
             self.assertIsNotNone(update_req)
 
+            # check that the watch state of the page is checked
+            watch_req = daemon.pop_get_request()
+            self.assertIsNotNone(watch_req)
+            req_path, _ = watch_req
+            ereq = f'/rest/api/user/watch/content/{expected_page_id}'
+            self.assertEqual(req_path, ereq)
+
             # check that the page is unwatched
             unwatch_req = daemon.pop_delete_request()
             self.assertIsNotNone(unwatch_req)
@@ -199,3 +208,335 @@ class TestConfluencePublisherPage(unittest.TestCase):
 
             # verify that no update request was made
             daemon.check_unhandled_requests()
+
+    def test_publisher_page_store_page_id_unchanged(self):
+        """validate publisher will skip an unchanged page"""
+        #
+        # Verify that a publisher will not update an existing page if the
+        # page's tracked fingerprint matches the page to be published and the
+        # page has not been modified since it was last published.
+
+        with mock_confluence_instance(self.config) as daemon, \
+                autocleanup_publisher(ConfluencePublisher) as publisher:
+            daemon.register_get_rsp(200, self.std_space_connect_rsp)
+
+            publisher.init(self.config)
+            publisher.connect()
+
+            # consume connect request
+            self.assertIsNotNone(daemon.pop_get_request())
+
+            # prepare response for a page id fetch
+            expected_page_id = 3874
+            mocked_version = 12
+
+            data = {
+                'content': 'dummy page data',
+                'labels': [],
+            }
+
+            expected_page = publisher._build_page('dummy-name', data)
+            fingerprint = publisher._fingerprint(expected_page)
+
+            page_fetch_rsp = {
+                'id': str(expected_page_id),
+                'title': 'dummy-name',
+                'type': 'page',
+                'metadata': {
+                    'properties': {
+                        PAGE_FINGERPRINT_KEY: {
+                            'value': {
+                                'hash': fingerprint,
+                                'version': mocked_version,
+                            },
+                        },
+                    },
+                },
+                'version': {
+                    'number': str(mocked_version),
+                },
+            }
+            daemon.register_get_rsp(200, page_fetch_rsp)
+
+            # perform page update request
+            page_id = publisher.store_page_by_id(
+                'dummy-name', expected_page_id, data)
+
+            # check expected page id returned
+            self.assertEqual(page_id, expected_page_id)
+
+            # check that the page fetch was performed
+            fetch_req = daemon.pop_get_request()
+            self.assertIsNotNone(fetch_req)
+
+            # verify that no update or unwatch request was made
+            daemon.check_unhandled_requests()
+
+    def test_publisher_page_store_page_id_modified(self):
+        """validate publisher will update a remotely modified page"""
+        #
+        # Verify that a publisher will update an existing page if the page's
+        # tracked fingerprint matches the page to be published, but the page
+        # has been modified since it was last published.
+
+        config = self.config.clone()
+        config.confluence_watch = True
+
+        with mock_confluence_instance(config) as daemon, \
+                autocleanup_publisher(ConfluencePublisher) as publisher:
+            daemon.register_get_rsp(200, self.std_space_connect_rsp)
+
+            publisher.init(config)
+            publisher.connect()
+
+            # consume connect request
+            self.assertIsNotNone(daemon.pop_get_request())
+
+            # prepare response for a page id fetch
+            expected_page_id = 9124
+            mocked_version = 7
+
+            data = {
+                'content': 'dummy page data',
+                'labels': [],
+            }
+
+            expected_page = publisher._build_page('dummy-name', data)
+            fingerprint = publisher._fingerprint(expected_page)
+
+            page_fetch_rsp = {
+                'id': str(expected_page_id),
+                'title': 'dummy-name',
+                'type': 'page',
+                'metadata': {
+                    'properties': {
+                        PAGE_FINGERPRINT_KEY: {
+                            'value': {
+                                'hash': fingerprint,
+                                'version': mocked_version - 1,
+                            },
+                        },
+                    },
+                },
+                'version': {
+                    'number': str(mocked_version),
+                },
+            }
+            daemon.register_get_rsp(200, page_fetch_rsp)
+
+            # prepare response for update event
+            daemon.register_put_rsp(200, dict(page_fetch_rsp))
+
+            # perform page update request
+            page_id = publisher.store_page_by_id(
+                'dummy-name', expected_page_id, data)
+
+            # check expected page id returned
+            self.assertEqual(page_id, expected_page_id)
+
+            # check that the page fetch was performed
+            fetch_req = daemon.pop_get_request()
+            self.assertIsNotNone(fetch_req)
+
+            # check that an update request is processed
+            update_req = daemon.pop_put_request()
+            self.assertIsNotNone(update_req)
+
+            # verify that no other request was made
+            daemon.check_unhandled_requests()
+
+    def test_publisher_page_prefetch(self):
+        """validate publisher can lookup pages from a prefetched index"""
+        #
+        # Verify that a publisher which has prefetched the pages of a space
+        # will use the prefetched results for page lookups, instead of
+        # performing a request for each page.
+
+        with mock_confluence_instance(self.config) as daemon, \
+                autocleanup_publisher(ConfluencePublisher) as publisher:
+            daemon.register_get_rsp(200, self.std_space_connect_rsp)
+
+            publisher.init(self.config)
+            publisher.connect()
+
+            # consume connect request
+            self.assertIsNotNone(daemon.pop_get_request())
+
+            # prepare response for a space's pages
+            search_rsp = {
+                'limit': 1000,
+                'results': [
+                    {
+                        'id': '101',
+                        'title': 'Page A',
+                        'type': 'page',
+                        'version': {
+                            'number': '2',
+                        },
+                    },
+                    {
+                        'id': '102',
+                        'title': 'Page B',
+                        'type': 'page',
+                        'version': {
+                            'number': '5',
+                        },
+                    },
+                ],
+                'size': 2,
+            }
+            daemon.register_get_rsp(200, search_rsp)
+
+            publisher.prefetch_pages()
+
+            # check that a single search request was made
+            fetch_req = daemon.pop_get_request()
+            self.assertIsNotNone(fetch_req)
+            req_path, _ = fetch_req
+            self.assertTrue(req_path.startswith('/rest/api/content/search?'))
+            self.assertIsNone(daemon.pop_get_request())
+
+            # lookups for known pages should use the page index
+            page_id, page = publisher.get_page('Page A')
+            self.assertEqual(page_id, '101')
+            self.assertEqual(page['version']['number'], '2')
+
+            page_id, _ = publisher.get_page('page b')
+            self.assertIsNone(page_id)
+
+            page_id, _ = publisher.get_page_case_insensitive('page b')
+            self.assertEqual(page_id, '102')
+
+            # lookups for unknown pages should not need a request
+            page_id, page = publisher.get_page('Page C')
+            self.assertIsNone(page_id)
+            self.assertIsNone(page)
+
+            # verify that no other request was made
+            daemon.check_unhandled_requests()
+
+    def test_publisher_page_store_page_id_reuse(self):
+        """validate publisher will reuse known page information"""
+        #
+        # Verify that a publisher which has stored a page will not query the
+        # instance again for the page's ancestors or when updating the space's
+        # homepage to the stored page (or when the homepage is unchanged).
+
+        config = self.config.clone()
+        config.confluence_watch = True
+
+        with mock_confluence_instance(config) as daemon, \
+                autocleanup_publisher(ConfluencePublisher) as publisher:
+            daemon.register_get_rsp(200, self.std_space_connect_rsp)
+
+            publisher.init(config)
+            publisher.connect()
+
+            # consume connect request
+            self.assertIsNotNone(daemon.pop_get_request())
+
+            # prepare response for a page id fetch
+            expected_page_id = '5621'
+            mocked_version = 3
+
+            page_fetch_rsp = {
+                'id': expected_page_id,
+                'title': 'mock page',
+                'type': 'page',
+                'ancestors': [
+                    {'id': '100'},
+                    {'id': '200'},
+                ],
+                'version': {
+                    'number': str(mocked_version),
+                },
+            }
+            daemon.register_get_rsp(200, page_fetch_rsp)
+
+            # prepare response for update event
+            daemon.register_put_rsp(200, dict(page_fetch_rsp))
+
+            data = {
+                'content': 'dummy page data',
+                'labels': [],
+            }
+            publisher.store_page_by_id('dummy-name', expected_page_id, data)
+
+            self.assertIsNotNone(daemon.pop_get_request())
+            self.assertIsNotNone(daemon.pop_put_request())
+
+            # check that ancestors are provided without a request
+            ancestors = publisher.get_ancestors(expected_page_id)
+            self.assertEqual(ancestors, {'100', '200'})
+
+            # prepare response for space update event
+            daemon.register_put_rsp(200, {'homepage': page_fetch_rsp})
+
+            # check that the space home is updated without a page fetch
+            publisher.update_space_home(expected_page_id)
+
+            self.assertIsNotNone(daemon.pop_put_request())
+
+            # no other request should be made if the homepage is unchanged
+            publisher.update_space_home(expected_page_id)
+
+            # verify that no other request was made
+            daemon.check_unhandled_requests()
+
+    def test_publisher_page_store_page_id_unwatched(self):
+        """validate publisher will skip unwatching content not watched"""
+        #
+        # Verify that a publisher configured to not watch content will only
+        # unwatch pages if the instance watches updated pages, where the
+        # watch state is only checked once.
+
+        with mock_confluence_instance(self.config) as daemon, \
+                autocleanup_publisher(ConfluencePublisher) as publisher:
+            daemon.register_get_rsp(200, self.std_space_connect_rsp)
+
+            publisher.init(self.config)
+            publisher.connect()
+
+            # consume connect request
+            self.assertIsNotNone(daemon.pop_get_request())
+
+            data = {
+                'content': 'dummy page data',
+                'labels': [],
+            }
+
+            for idx, expected_page_id in enumerate([6718, 6719]):
+                page_fetch_rsp = {
+                    'id': str(expected_page_id),
+                    'title': 'mock page',
+                    'type': 'page',
+                    'version': {
+                        'number': '1',
+                    },
+                }
+
+                # prepare response for a page id fetch and update event
+                daemon.register_get_rsp(200, page_fetch_rsp)
+                daemon.register_put_rsp(200, dict(page_fetch_rsp))
+
+                # prepare response for watch check (first page only)
+                if idx == 0:
+                    daemon.register_get_rsp(200, {'watching': False})
+
+                publisher.store_page_by_id(
+                    'dummy-name', expected_page_id, data)
+
+                # check that the page is fetched and updated
+                self.assertIsNotNone(daemon.pop_get_request())
+                self.assertIsNotNone(daemon.pop_put_request())
+
+                # check that the watch state is only checked once
+                if idx == 0:
+                    watch_req = daemon.pop_get_request()
+                    self.assertIsNotNone(watch_req)
+                    req_path, _ = watch_req
+                    ereq = f'/rest/api/user/watch/content/{expected_page_id}'
+                    self.assertEqual(req_path, ereq)
+
+                # verify that no unwatch (or other) request was made
+                daemon.check_unhandled_requests()
@@ -0,0 +1,87 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright Sphinx Confluence Builder Contributors (AUTHORS)
+
+from sphinxcontrib.confluencebuilder.rest import FileContent
+from sphinxcontrib.confluencebuilder.rest import JSON_SPOOL_SIZE
+from sphinxcontrib.confluencebuilder.rest import JsonStream
+from sphinxcontrib.confluencebuilder.rest import STREAM_CHUNK_SIZE
+from sphinxcontrib.confluencebuilder.rest import iterencode_json
+from tests.lib import prepare_dirs
+import json
+import os
+import unittest
+
+
+class TestRestJson(unittest.TestCase):
+    def test_rest_json_stream(self):
+        """validate a json stream can be parsed"""
+        #
+        # Verify that a json stream produces a body which matches the provided
+        # data (for both small and spooled bodies) and reports a length which
+        # matches the amount of data produced.
+
+        small = {
+            'title': 'example ☃',
+            'value': 1,
+        }
+
+        large = {
+            'body': {
+                'storage': {
+                    'representation': 'storage',
+                    'value': '<p>content</p>' * (JSON_SPOOL_SIZE // 10),
+                },
+            },
+        }
+
+        for data in (small, large):
+            stream = JsonStream(data)
+            try:
+                body = b''.join(stream)
+            finally:
+                stream.close()
+
+            self.assertEqual(len(body), len(stream))
+            self.assertEqual(json.loads(body.decode('utf-8')), data)
+            self.assertEqual(stream.content_type, 'application/json')
+
+    def test_rest_json_file_content(self):
+        """validate file content is encoded into json"""
+        #
+        # Verify that file content values are encoded (in chunks) into the
+        # same json data as if the file's content was provided as a string.
+
+        content = '<p>"quoted" \\ ☃ \U0001f600</p>\n\t' * STREAM_CHUNK_SIZE
+
+        out_dir = prepare_dirs()
+        os.makedirs(out_dir)
+        content_file = os.path.join(out_dir, 'content.conf')
+        with open(content_file, 'w', encoding='utf-8') as f:
+            f.write(content)
+
+        data = {
+            'body': FileContent(content_file),
+            'other': [FileContent(content_file), 'value'],
+            'title': 'example',
+        }
+
+        expected_data = {
+            'body': content,
+            'other': [content, 'value'],
+            'title': 'example',
+        }
+
+        for options in ({}, {'ensure_ascii': False}, {'sort_keys': True}):
+            encoded = ''.join(iterencode_json(data, **options))
+            self.assertEqual(encoded, json.dumps(expected_data, **options))
+
+        stream = JsonStream(data)
+        try:
+            body = b''.join(stream)
+        finally:
+            stream.close()
+
+        self.assertEqual(json.loads(body.decode('utf-8')), expected_data)
+
+        with self.assertRaises(TypeError):
+            ''.join(iterencode_json({'value': object()}))
@@ -0,0 +1,59 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright Sphinx Confluence Builder Contributors (AUTHORS)
+
+from email.parser import BytesParser
+from sphinxcontrib.confluencebuilder.rest import MultipartStream
+import io
+import unittest
+
+
+class TestRestMultipart(unittest.TestCase):
+    def test_rest_multipart_stream(self):
+        """validate a multipart stream can be parsed"""
+        #
+        # Verify that a multipart stream produces a multipart/form-data
+        # body which contains all provided fields and reports a length which
+        # matches the amount of data produced.
+
+        file_data = b'0123456789' * 10000
+        fields = {
+            'comment': 'SCB_KEY:1234',
+            'file': ('asset.bin', io.BytesIO(file_data), 'application/pdf'),
+            'minorEdit': 'true',
+        }
+
+        stream = MultipartStream(fields)
+        body = b''.join(iter(lambda: stream.read(4096), b''))
+        self.assertEqual(len(body), len(stream))
+
+        header = 'Content-Type: {}\r\n\r\n'.format(stream.content_type)
+        msg = BytesParser().parsebytes(header.encode() + body)
+        parts = msg.get_payload()
+        self.assertEqual(len(parts), 3)
+
+        comment, file, minor = parts
+        self.assertEqual(comment.get_payload(decode=True), b'SCB_KEY:1234')
+        self.assertEqual(file.get_filename(), 'asset.bin')
+        self.assertEqual(file.get_content_type(), 'application/pdf')
+        self.assertEqual(file.get_payload(decode=True), file_data)
+        self.assertEqual(minor.get_payload(decode=True), b'true')
+
+    def test_rest_multipart_stream_rewind(self):
+        """validate a new multipart stream will rewind file objects"""
+        #
+        # Verify that a file object used in a consumed stream can be used in
+        # a new stream (e.g. retrying a request).
+
+        file = io.BytesIO(b'data')
+        fields = {
+            'file': ('asset.bin', file, 'application/octet-stream'),
+        }
+
+        first = MultipartStream(fields)
+        first_body = first.read()
+
+        second = MultipartStream(fields)
+        second_body = second.read()
+
+        self.assertEqual(len(first_body), len(second_body))
+        self.assertIn(b'\r\n\r\ndata\r\n', second_body)
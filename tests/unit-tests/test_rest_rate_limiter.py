@@ -0,0 +1,69 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright Sphinx Confluence Builder Contributors (AUTHORS)
+
+from sphinxcontrib.confluencebuilder.rest import RATE_LIMIT_MAX_RATE
+from sphinxcontrib.confluencebuilder.rest import RATE_LIMIT_MIN_RATE
+from sphinxcontrib.confluencebuilder.rest import RateLimiter
+import unittest
+
+
+class TestRestRateLimiter(unittest.TestCase):
+    def test_rest_rate_limiter_default(self):
+        """validate rate limiter does not pace requests by default"""
+
+        limiter = RateLimiter()
+        for _ in range(100):
+            self.assertEqual(limiter.acquire(), 0)
+            limiter.succeeded()
+
+        self.assertIsNone(limiter.rate)
+
+    def test_rest_rate_limiter_limited(self):
+        """validate rate limiter paces requests when rate-limited"""
+
+        limiter = RateLimiter()
+        for _ in range(20):
+            limiter.acquire()
+
+        # a rate limit should pace requests based on the recent request rate
+        limiter.limited()
+        self.assertIsNotNone(limiter.rate)
+        self.assertGreaterEqual(limiter.rate, RATE_LIMIT_MIN_RATE)
+
+        first = limiter.acquire()
+        second = limiter.acquire()
+        self.assertGreater(second, first)
+
+        # a burst of rate-limited requests should only decrease the rate once
+        rate = limiter.rate
+        limiter.limited()
+        self.assertEqual(limiter.rate, rate)
+
+        # successful requests should increase the rate until pacing stops
+        limiter.succeeded()
+        self.assertGreater(limiter.rate, rate)
+
+        for _ in range(RATE_LIMIT_MAX_RATE * 10):
+            limiter.succeeded()
+        self.assertIsNone(limiter.rate)
+
+    def test_rest_rate_limiter_headers(self):
+        """validate rate limiter paces requests with rate-limit headers"""
+
+        limiter = RateLimiter()
+
+        # ignore headers when not near a limit
+        limiter.observe({
+            'X-RateLimit-FillRate': '10',
+            'X-RateLimit-Interval-Seconds': '1',
+            'X-RateLimit-NearLimit': 'false',
+        })
+        self.assertIsNone(limiter.rate)
+
+        # pace to the fill rate when near a limit
+        limiter.observe({
+            'X-RateLimit-FillRate': '10',
+            'X-RateLimit-Interval-Seconds': '2',
+            'X-RateLimit-NearLimit': 'true',
+        })
+        self.assertEqual(limiter.rate, 5)
@@ -103,6 +103,39 @@ class TestSdocGenindex(ConfluenceTestCase):
             footer_data = data.find_all(recursive=False)[-1].nextSibling.strip()
             self.assertEqual(footer_data, 'footer content')
 
+    @setup_builder('confluence')
+    def test_storage_sdoc_genindex_header_footer_with_jinja(self):
+        """validate genindex generation includes templated header/footer"""
+        #
+        # Ensures that when the extension adds a "genindex" document; any custom
+        # defined header/footer templates are rendered into the document.
+
+        dataset = os.path.join(self.datasets, 'sdoc', 'genindex')
+        footer_tpl = os.path.join(self.templates_dir,
+            'sample-footer-with-jinja.tpl')
+        header_tpl = os.path.join(self.templates_dir,
+            'sample-header-with-jinja.tpl')
+
+        config = dict(self.config)
+        config['confluence_use_index'] = True
+        config['confluence_footer_data'] = {
+            'variable': 'footer_value',
+        }
+        config['confluence_footer_file'] = footer_tpl
+        config['confluence_header_data'] = {
+            'variable': 'header_value',
+        }
+        config['confluence_header_file'] = header_tpl
+
+        out_dir = self.build(dataset, config=config)
+
+        with parse('genindex', out_dir) as data:
+            header_data = data.find().previousSibling.strip()
+            self.assertEqual(header_data, 'header content header_value')
+
+            footer_data = data.find_all(recursive=False)[-1].nextSibling.strip()
+            self.assertEqual(footer_data, 'footer content footer_value')
+
     @setup_builder('confluence')
     def test_storage_sdoc_genindex_implicit_enabled_toctree(self):
         """validate genindex generation is auto-added via toctree (storage)"""
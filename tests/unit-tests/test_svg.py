@@ -1,6 +1,9 @@
 # SPDX-License-Identifier: BSD-2-Clause
 # Copyright Sphinx Confluence Builder Contributors (AUTHORS)
 
+from sphinxcontrib.confluencebuilder.render import RENDER_CACHE_FILENAME
+from sphinxcontrib.confluencebuilder.render import ConfluenceRenderCache
+from tests.lib import prepare_dirs
 from tests.lib.parse import parse
 from tests.lib.testcase import ConfluenceTestCase
 from tests.lib.testcase import setup_builder
@@ -169,3 +172,33 @@ class TestSvg(ConfluenceTestCase):
             svg_width, svg_height = self._extract_svg_size(fname)
             self.assertEqual(svg_height, 200)
             self.assertEqual(svg_width, 50)
+
+    @setup_builder('confluence')
+    def test_storage_svgs_cached(self):
+        """validate processed svgs are cached between builds"""
+        #
+        # Verify that each processed svg (and the options applied to it) is
+        # tracked in the render cache, and that a rebuild using the cache
+        # produces the same results.
+
+        out_dir = prepare_dirs()
+
+        def build_attachments():
+            self.build(self.dataset, out_dir=out_dir)
+
+            with parse('index', out_dir) as data:
+                return [image.find('ri:attachment')['ri:filename']
+                    for image in data.find_all('ac:image', recursive=False)]
+
+        attachments = build_attachments()
+
+        cache = ConfluenceRenderCache(
+            os.path.join(out_dir, RENDER_CACHE_FILENAME))
+        cache.load()
+        self.assertEqual(len(cache.entries), 10)
+
+        svgs_dir = os.path.join(out_dir, 'svgs')
+        for svg in os.listdir(svgs_dir):
+            self.assertIn(os.path.join(svgs_dir, svg), cache.entries.values())
+
+        self.assertEqual(build_attachments(), attachments)
@@ -0,0 +1,111 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright Sphinx Confluence Builder Contributors (AUTHORS)
+
+from tests.lib import prepare_dirs
+from tests.lib.testcase import ConfluenceTestCase
+import os
+import sys
+
+# configuration for a dataset using graphviz with a mocked dot command
+CONF = '''\
+extensions = [
+    'sphinx.ext.graphviz',
+    'sphinxcontrib.confluencebuilder',
+]
+
+graphviz_dot = {dot!r}
+'''
+
+# mocked dot command which logs each invocation and generates a sample image
+DOT = '''\
+#!{python}
+import shutil
+import sys
+
+if '-V' in sys.argv:
+    sys.exit(0)
+
+sys.stdin.read()
+
+with open({log!r}, 'a') as f:
+    f.write('invoked\\n')
+
+for arg in sys.argv[1:]:
+    if arg.startswith('-o'):
+        shutil.copyfile({image!r}, arg[2:])
+'''
+
+# graph used in multiple documents
+COMMON_GRAPH = '''
+.. graphviz::
+
+    digraph {
+        a -> b
+    }
+'''
+
+# graph used in a single document
+UNIQUE_GRAPH = '''
+.. graphviz::
+
+    digraph {
+        c -> d
+    }
+'''
+
+
+class TestTransmutePrerender(ConfluenceTestCase):
+    def test_transmute_prerender_graphviz(self):
+        """validate diagrams are rendered once when building in parallel"""
+        #
+        # Verify that when building in parallel, diagrams used across multiple
+        # documents are only rendered once and each document refers to a
+        # rendered image. Rendered images are also re-used between builds.
+
+        out_dir = prepare_dirs()
+        src_dir = prepare_dirs(postfix='-src')
+        os.makedirs(src_dir)
+
+        dot = os.path.join(src_dir, 'dot')
+        log = os.path.join(src_dir, 'dot.log')
+        image = os.path.join(self.assets_dir, 'image01.png')
+
+        with open(dot, 'w') as f:
+            f.write(DOT.format(python=sys.executable, log=log, image=image))
+        os.chmod(dot, 0o755)
+
+        with open(os.path.join(src_dir, 'conf.py'), 'w') as f:
+            f.write(CONF.format(dot=dot))
+
+        docnames = ['doc1', 'doc2', 'doc3']
+        with open(os.path.join(src_dir, 'index.rst'), 'w') as f:
+            f.write('index\n=====\n\n.. toctree::\n\n')
+            for docname in docnames:
+                f.write(f'    {docname}\n')
+
+        for docname in docnames:
+            with open(os.path.join(src_dir, docname + '.rst'), 'w') as f:
+                f.write(f'{docname}\n====\n')
+                f.write(COMMON_GRAPH)
+                if docname == 'doc3':
+                    f.write(UNIQUE_GRAPH)
+
+        with self.prepare(src_dir, config=None, out_dir=out_dir,
+                parallel=2) as app:
+            app.build(force_all=True)
+
+            for docname in docnames:
+                fname = os.path.join(app.outdir, docname + '.conf')
+                with open(fname, encoding='utf-8') as f:
+                    self.assertIn('<ri:attachment', f.read())
+
+        with open(log) as f:
+            self.assertEqual(len(f.readlines()), 2)
+
+        # rebuilding will re-use the previously rendered images
+        with self.prepare(src_dir, config=None, out_dir=out_dir,
+                parallel=2) as app:
+            app.build(force_all=True)
+
+        with open(log) as f:
+            self.assertEqual(len(f.readlines()), 2)
@@ -2,7 +2,9 @@
 # Copyright Sphinx Confluence Builder Contributors (AUTHORS)
 
 from sphinxcontrib.confluencebuilder.util import ConfluenceUtil
+from sphinxcontrib.confluencebuilder.util import remove_nonspace_control_chars
 import unittest
+import unicodedata
 
 
 class TestConfluenceUtil(unittest.TestCase):
@@ -20,3 +22,12 @@ class TestConfluenceUtil(unittest.TestCase):
         }
         for key in data:
             self.assertEqual(ConfluenceUtil.normalize_base_url(key), data[key])
+
+    def test_util_remove_nonspace_control_chars(self):
+        text = ''.join(chr(c) for c in range(0x200))
+        expected = ''.join(c for c in text if c.isspace()
+            or unicodedata.category(c) != 'Cc')
+
+        self.assertEqual(remove_nonspace_control_chars(text), expected)
+        self.assertEqual(remove_nonspace_control_chars('a\tb\x00c\x85d'),
+            'a\tbc\x85d')